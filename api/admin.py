@@ -1,8 +1,15 @@
 from django.contrib import admin
-from .models import PredictionHistory
+from .models import DailyPredictionRollup, PredictionHistory
 
 
 @admin.register(PredictionHistory)
 class PredictionHistoryAdmin(admin.ModelAdmin):
-    list_display = ('timestamp', 'outcome', 'goal_diff')
+    list_display = ('timestamp', 'user', 'home_team', 'away_team', 'outcome', 'goal_diff')
+    list_select_related = ('user',)
+    raw_id_fields = ('user',)
     readonly_fields = ('timestamp',)
+
+
+@admin.register(DailyPredictionRollup)
+class DailyPredictionRollupAdmin(admin.ModelAdmin):
+    list_display = ('day', 'predictions', 'home_wins', 'draws', 'away_wins')
@@ -4,3 +4,18 @@ from django.apps import AppConfig
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+        from .dbtuning import configure_connection
+
+        connection_created.connect(configure_connection, dispatch_uid='api.dbtuning')
+
+        from django.contrib.auth.models import User
+        from django.db.models.signals import post_delete, post_save
+        from .auth import forget_user
+
+        post_save.connect(forget_user, sender=User, dispatch_uid='api.auth.save')
+        post_delete.connect(forget_user, sender=User, dispatch_uid='api.auth.delete')
+        # models are preloaded by the server entry points (wsgi.py, asgi.py),
+        # not here, so management commands and tests don't pay for them
@@ -0,0 +1,44 @@
+"""Authentication without database reads for AUTH_MODE = 'cached'.
+
+Sessions are kept in signed cookies (no ``django_session`` lookup) and
+``CachedModelBackend`` answers ``get_user`` from a per-process
+PredictionCache, so a logged-in request touches the database only when
+its user is not cached (AUTH_USER_CACHE_TTL seconds). Saving or deleting
+a user drops it from this process's cache; other workers see the change
+once their entry expires.
+"""
+import copy
+import threading
+from django.contrib.auth.backends import ModelBackend
+
+from .cache import PredictionCache
+
+_users = None
+_users_lock = threading.Lock()
+
+
+def get_user_cache():
+    global _users
+    from django.conf import settings
+
+    if _users is None:
+        with _users_lock:
+            if _users is None:
+                _users = PredictionCache(settings.AUTH_USER_CACHE_SIZE, settings.AUTH_USER_CACHE_TTL)
+    return _users
+
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend whose ``get_user`` is served from the in-process user cache."""
+
+    def get_user(self, user_id):
+        load = super().get_user
+        user = get_user_cache().get_or_compute(None, str(user_id), lambda: load(user_id))
+        # each request gets its own copy, so nothing it sets leaks into the cache
+        return copy.copy(user) if user is not None else None
+
+
+def forget_user(sender, instance, **kwargs):
+    """post_save/post_delete receiver: drop a changed user from the cache."""
+    if _users is not None:
+        _users.discard(str(instance.pk))
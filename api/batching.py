@@ -0,0 +1,181 @@
+"""Micro-batching of concurrent predictions for the async predict endpoint.
+
+Requests arriving within a short window are queued and handed to the
+inferencer as one ``predict_batch`` call, which costs little more than a
+single-row prediction. Inference runs on a thread pool so the event loop
+keeps accepting requests while a batch is being evaluated.
+"""
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import threading
+import time
+import weakref
+import numpy as np
+from django.conf import settings
+
+
+class BatchStats:
+    """Thread-safe latency and throughput counters shared by all batchers."""
+
+    def __init__(self, window=10000, clock=time.perf_counter):
+        self._clock = clock
+        self._lock = threading.Lock()
+        # (completed_at, latency_seconds) of the most recent requests
+        self._samples = deque(maxlen=window)
+        self.requests = 0
+        self.batches = 0
+        self.errors = 0
+        self.max_batch_seen = 0
+
+    def record_batch(self, size):
+        with self._lock:
+            self.batches += 1
+            self.max_batch_seen = max(self.max_batch_seen, size)
+
+    def record_request(self, latency, ok=True):
+        with self._lock:
+            self.requests += 1
+            if not ok:
+                self.errors += 1
+            self._samples.append((self._clock(), latency))
+
+    def snapshot(self):
+        with self._lock:
+            samples = np.array(self._samples, dtype=np.float64).reshape(-1, 2)
+            data = {
+                'requests': self.requests,
+                'batches': self.batches,
+                'errors': self.errors,
+                'mean_batch_size': round(self.requests / self.batches, 2) if self.batches else 0.0,
+                'max_batch_size': self.max_batch_seen,
+            }
+        if len(samples):
+            p50, p95, p99 = np.percentile(samples[:, 1] * 1000.0, [50, 95, 99]).tolist()
+            span = float(samples[-1, 0] - (samples[0, 0] - samples[0, 1]))
+            data.update({
+                'latency_ms': {'p50': round(p50, 3), 'p95': round(p95, 3), 'p99': round(p99, 3),
+                               'max': round(float(samples[:, 1].max()) * 1000.0, 3)},
+                'throughput_rps': round(len(samples) / span, 1) if span > 0 else None,
+                'sample_size': len(samples),
+            })
+        return data
+
+
+class MicroBatcher:
+    """Coalesce concurrent ``submit`` calls into batched ``handler`` calls.
+
+    ``handler`` takes a list of payloads and returns one result per payload.
+    A batch is flushed ``window`` seconds after its first payload arrives
+    (0: at the next event loop iteration), or as soon as it holds
+    ``max_batch`` payloads. If a batch raises, its
+    payloads are retried one by one so a single bad request only fails
+    itself.
+
+    A batcher belongs to the event loop it is first used on; use
+    ``get_batcher`` to get the one for the running loop.
+    """
+
+    def __init__(self, handler, window=0.005, max_batch=64, executor=None, stats=None):
+        self.handler = handler
+        self.window = window
+        self.max_batch = max(1, int(max_batch))
+        self.executor = executor
+        self.stats = stats if stats is not None else BatchStats()
+        self._pending = []
+        self._timer = None
+        # the loop only keeps weak references to tasks
+        self._tasks = set()
+
+    async def submit(self, payload):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((payload, future, time.perf_counter()))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            # a zero window still gathers everything submitted in this loop iteration
+            self._timer = loop.call_later(self.window, self._flush) if self.window > 0 else loop.call_soon(self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.get_running_loop().create_task(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch):
+        loop = asyncio.get_running_loop()
+        self.stats.record_batch(len(batch))
+        payloads = [payload for payload, _, _ in batch]
+        try:
+            results = await loop.run_in_executor(self.executor, self._call, payloads)
+        except Exception as e:
+            results = [e] * len(batch)
+
+        done = time.perf_counter()
+        for (_, future, started), result in zip(batch, results):
+            ok = not isinstance(result, Exception)
+            self.stats.record_request(done - started, ok)
+            if future.done():  # the caller went away
+                continue
+            if ok:
+                future.set_result(result)
+            else:
+                future.set_exception(result)
+
+    def _call(self, payloads):
+        try:
+            results = self.handler(payloads)
+        except Exception:
+            if len(payloads) == 1:
+                raise
+        else:
+            if len(results) != len(payloads):
+                raise RuntimeError(f'batch handler returned {len(results)} results for {len(payloads)} payloads')
+            return results
+
+        results = []
+        for payload in payloads:
+            try:
+                results.append(self.handler([payload])[0])
+            except Exception as e:
+                results.append(e)
+        return results
+
+
+_executor = None
+_executor_lock = threading.Lock()
+_batchers = weakref.WeakKeyDictionary()
+_stats = BatchStats()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=settings.PREDICT_ASYNC_THREADS, thread_name_prefix='predict')
+        return _executor
+
+
+def get_batcher(handler):
+    """Return the MicroBatcher for the running event loop, creating it on first use."""
+    loop = asyncio.get_running_loop()
+    batcher = _batchers.get(loop)
+    if batcher is None:
+        batcher = _batchers[loop] = MicroBatcher(
+            handler,
+            window=settings.PREDICT_ASYNC_WINDOW_MS / 1000.0,
+            max_batch=settings.PREDICT_ASYNC_MAX_BATCH,
+            executor=_get_executor(),
+            stats=_stats,
+        )
+    return batcher
+
+
+def batch_stats():
+    return _stats.snapshot()
@@ -0,0 +1,207 @@
+"""Benchmark cases for the inferencer, the HTTP endpoints and simulation.
+
+``run`` times each case for a fixed budget and reports latency
+percentiles and throughput; ``compare`` checks a run against a stored
+baseline. HTTP and simulation cases go through the Django test client
+against a throwaway test database, so they exercise middleware, DRF and
+history writes without touching real data. Driven by ``manage.py bench``.
+"""
+from contextlib import contextmanager
+from pathlib import Path
+from time import perf_counter
+import copy
+import platform
+import numpy as np
+
+from .inference import STAT_KEYS, get_inferencer
+
+GROUPS = ('inference', 'http', 'simulation')
+BATCH_SIZES = (1, 16, 128, 1024)
+
+
+def measure(fn, seconds=1.0, warmup=3, min_iterations=5, rows=1):
+    """Call ``fn`` repeatedly for about ``seconds``; returns latency percentiles and throughput."""
+    for _ in range(warmup):
+        fn()
+    times = []
+    started = perf_counter()
+    while len(times) < min_iterations or perf_counter() - started < seconds:
+        t0 = perf_counter()
+        fn()
+        times.append(perf_counter() - t0)
+    elapsed = perf_counter() - started
+    ms = np.asarray(times) * 1000
+    result = {
+        'iterations': len(times),
+        'mean_ms': round(float(ms.mean()), 4),
+        'p50_ms': round(float(np.percentile(ms, 50)), 4),
+        'p95_ms': round(float(np.percentile(ms, 95)), 4),
+        'p99_ms': round(float(np.percentile(ms, 99)), 4),
+        'ops_per_sec': round(len(times) / elapsed, 2),
+    }
+    if rows > 1:
+        result['rows_per_sec'] = round(len(times) * rows / elapsed, 2)
+    return result
+
+
+def _payloads(teams, n, seed=0):
+    """``n`` distinct payloads with random match stats, so each one misses the prediction cache."""
+    rng = np.random.default_rng(seed)
+    pairs = rng.choice(len(teams), size=(n, 2))
+    stats = rng.integers(0, 15, size=(n, len(STAT_KEYS)))
+    return [
+        {'HomeTeam': teams[h], 'AwayTeam': teams[a if a != h else (a + 1) % len(teams)],
+         **dict(zip(STAT_KEYS, map(int, row)))}
+        for (h, a), row in zip(pairs, stats)
+    ]
+
+
+def _cycle(items):
+    state = {'i': 0}
+
+    def next_item():
+        item = items[state['i'] % len(items)]
+        state['i'] += 1
+        return item
+    return next_item
+
+
+def inference_cases():
+    """(name, fn, rows) for the in-process inferencer."""
+    inf = get_inferencer(local=True)
+    # same models, no prediction cache: every call does the full work
+    uncached = copy.copy(inf)
+    uncached.cache = None
+    payloads = _payloads(inf.teams(), 4096)
+    next_payload = _cycle(payloads)
+    cases = [
+        ('inference.build_vector', lambda: uncached._build_vector(next_payload()), 1),
+        ('inference.predict_single', lambda: uncached.predict_single(next_payload()), 1),
+        ('inference.predict_single_cached', lambda: inf.predict_single(payloads[0]), 1),
+    ]
+    for n in BATCH_SIZES:
+        batch = payloads[:n]
+        cases.append((f'inference.predict_batch_{n}', lambda batch=batch: uncached.predict_batch(batch), n))
+    return cases
+
+
+@contextmanager
+def throwaway_database():
+    """A migrated throwaway test database and test-client settings, removed afterwards."""
+    from django.db import connection
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    setup_test_environment()
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+def http_cases():
+    """(name, fn, rows) for the API through the test client; needs throwaway_database()."""
+    from django.contrib.auth.models import User
+    from django.test import Client
+    from .models import UserProfile
+
+    inf = get_inferencer()
+    next_payload = _cycle(_payloads(inf.teams(), 4096, seed=1))
+    anon = Client()
+    user = User.objects.create_user('bench@example.com', 'bench@example.com', 'bench', first_name='Bench')
+    UserProfile.objects.create(user=user, favorite_team='')
+    auth = Client()
+    auth.force_login(user)
+
+    def predict(client):
+        p = next_payload()
+        body = {'home_team': p['HomeTeam'], 'away_team': p['AwayTeam'], **{k: p[k] for k in STAT_KEYS}}
+        resp = client.post('/api/predict_v2', body, content_type='application/json')
+        assert resp.status_code == 200, resp.content
+
+    return [
+        ('http.teams.anon', lambda: anon.get('/api/teams'), 1),
+        ('http.teams.auth', lambda: auth.get('/api/teams'), 1),
+        ('http.predict_v2.anon', lambda: predict(anon), 1),
+        # HISTORY_FLUSH_INTERVAL=0 while running, so each request writes its history row
+        ('http.predict_v2.auth', lambda: predict(auth), 1),
+    ]
+
+
+def simulation_cases(dataset):
+    """(name, fn, rows) posting ``dataset`` to the simulate endpoints; needs throwaway_database()."""
+    from django.core.files.uploadedfile import SimpleUploadedFile
+    from django.test import Client
+
+    content = Path(dataset).read_bytes()
+    fixtures = max(content.count(b'\n') - 1, 1)
+    client = Client()
+
+    def post(path, **data):
+        upload = SimpleUploadedFile('fixtures.csv', content, content_type='text/csv')
+        resp = client.post(path, {'file': upload, **data})
+        assert resp.status_code == 200, resp.content
+
+    return [
+        ('simulation.standings', lambda: post('/api/simulate'), fixtures),
+        ('simulation.monte_carlo_1000', lambda: post('/api/simulate/monte_carlo', sims=1000, seed=0), fixtures),
+    ]
+
+
+def run(groups=GROUPS, seconds=1.0, dataset=None, only=None, log=None):
+    """Run the selected benchmark groups; returns ``{'meta': ..., 'results': {name: stats}}``."""
+    from django.conf import settings
+    from django.test import override_settings
+
+    results = {}
+
+    def run_cases(cases):
+        for name, fn, rows in cases:
+            if only and not any(name.startswith(prefix) for prefix in only):
+                continue
+            results[name] = measure(fn, seconds=seconds, rows=rows)
+            if log is not None:
+                log(name, results[name])
+
+    if 'inference' in groups:
+        run_cases(inference_cases())
+    if 'http' in groups or 'simulation' in groups:
+        with throwaway_database(), override_settings(HISTORY_FLUSH_INTERVAL=0):
+            if 'http' in groups:
+                run_cases(http_cases())
+            if 'simulation' in groups:
+                run_cases(simulation_cases(dataset or get_inferencer().base / 'cleaned_merged_dataset.csv'))
+
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'model_version': get_inferencer().version,
+            'inference_engine': settings.INFERENCE_ENGINE,
+            'seconds_per_case': seconds,
+        },
+        'results': results,
+    }
+
+
+def compare(current, baseline, threshold=0.2):
+    """Per-case changes against ``baseline``; a case regresses when its p50 rises
+    or its throughput falls by more than ``threshold`` (a fraction)."""
+    rows = []
+    for name, now in current['results'].items():
+        before = baseline.get('results', {}).get(name)
+        if before is None:
+            continue
+        p50 = now['p50_ms'] / before['p50_ms'] - 1 if before['p50_ms'] else 0.0
+        ops = now['ops_per_sec'] / before['ops_per_sec'] - 1 if before['ops_per_sec'] else 0.0
+        rows.append({
+            'name': name,
+            'p50_ms': (before['p50_ms'], now['p50_ms']),
+            'ops_per_sec': (before['ops_per_sec'], now['ops_per_sec']),
+            'p50_change': round(p50, 4),
+            'ops_change': round(ops, 4),
+            'regressed': p50 > threshold or ops < -threshold,
+        })
+    return rows
@@ -0,0 +1,137 @@
+"""Pickle-free, memory-mapped artifact bundle.
+
+``manage.py build_bundle`` converts the artifacts/ layout (joblib pickles,
+model_meta.json and the 140-column dataset CSV) into ``artifacts/bundle/``:
+
+- one ``.npy`` file per array: the compiled engine (api/engine.py) and
+  the rolling-form feature store (api/features.py)
+- ``manifest.json``: the bundle format version, the model meta, the
+  feature store's team names, every array's file, dtype and shape, and a
+  digest of the source files it was built from
+
+``ArtifactBundle.open`` maps the arrays read-only (``mmap_mode='r'``), so
+opening a bundle executes no pickle code and reads almost nothing up
+front, and every worker on a host shares one page-cache copy of the
+arrays instead of holding a private unpickled one. The bundle is written
+to a temporary directory and swapped in with renames; workers still
+mapping the old files keep reading them until they reload.
+"""
+from datetime import datetime, timezone
+from pathlib import Path
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import numpy as np
+
+from .engine import CompiledModels
+from .features import FeatureStore
+
+BUNDLE_DIR = 'bundle'
+MANIFEST = 'manifest.json'
+FORMAT = 'scoresight-artifacts'
+FORMAT_VERSION = 1
+
+# feature store arrays; its team names are kept in the manifest
+STORE_ARRAYS = ('offsets', 'dates', 'values')
+
+
+class BundleError(ValueError):
+    """Raised when a bundle is missing, malformed or of another format version."""
+
+
+def source_digest(base, names):
+    """SHA-1 over the names and contents of the files in ``names`` that exist under ``base``.
+
+    Contents rather than mtimes, so checkouts and copies that touch the
+    files don't make a bundle look stale.
+    """
+    h = hashlib.sha1()
+    for name in names:
+        path = Path(base) / name
+        if not path.exists():
+            continue
+        h.update(f'{name}\0'.encode())
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                h.update(chunk)
+    return h.hexdigest()
+
+
+class ArtifactBundle:
+    """An opened bundle: ``meta``, the ``engine`` and the ``feature_store`` (or None)."""
+
+    def __init__(self, path, manifest, arrays):
+        self.path = Path(path)
+        self.manifest = manifest
+        self.meta = manifest.get('meta', {})
+        self.source_digest = manifest.get('source_digest')
+        self.engine = CompiledModels(**{name[len('engine.'):]: arr for name, arr in arrays.items()
+                                        if name.startswith('engine.')})
+        store = manifest.get('feature_store')
+        self.feature_store = None
+        if store is not None:
+            self.feature_store = FeatureStore(store['teams'], *(arrays[f'store.{name}'] for name in STORE_ARRAYS))
+
+    @classmethod
+    def open(cls, path):
+        path = Path(path)
+        try:
+            manifest = json.loads((path / MANIFEST).read_text(encoding='utf-8'))
+        except (OSError, ValueError) as e:
+            raise BundleError(f'cannot read {path / MANIFEST}: {e}')
+        if manifest.get('format') != FORMAT or manifest.get('format_version') != FORMAT_VERSION:
+            raise BundleError(f"unsupported bundle format {manifest.get('format')!r} "
+                              f"v{manifest.get('format_version')}; expected {FORMAT} v{FORMAT_VERSION}")
+        arrays = {}
+        for name, spec in manifest.get('arrays', {}).items():
+            try:
+                arr = np.load(path / spec['file'], mmap_mode='r', allow_pickle=False)
+            except (OSError, ValueError) as e:
+                raise BundleError(f"cannot map {spec['file']}: {e}")
+            if arr.dtype.str != spec['dtype'] or list(arr.shape) != spec['shape']:
+                raise BundleError(f"{spec['file']} is {arr.dtype.str}{list(arr.shape)}, "
+                                  f"manifest says {spec['dtype']}{spec['shape']}")
+            arrays[name] = arr
+        return cls(path, manifest, arrays)
+
+
+def write_bundle(path, meta, engine, feature_store=None, digest=None):
+    """Write a bundle to ``path``, replacing any bundle there; returns the manifest."""
+    path = Path(path)
+    arrays = {f'engine.{name}': getattr(engine, name) for name in CompiledModels.ARRAYS
+              if getattr(engine, name) is not None}
+    if feature_store is not None:
+        arrays.update({f'store.{name}': getattr(feature_store, name) for name in STORE_ARRAYS})
+
+    manifest = {
+        'format': FORMAT,
+        'format_version': FORMAT_VERSION,
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'source_digest': digest,
+        'meta': meta,
+        'feature_store': {'teams': feature_store.teams} if feature_store is not None else None,
+        'arrays': {},
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = Path(tempfile.mkdtemp(dir=path.parent, prefix=f'.{path.name}-'))
+    try:
+        for name, arr in arrays.items():
+            arr = np.asarray(arr)
+            np.save(tmp / f'{name}.npy', arr, allow_pickle=False)
+            manifest['arrays'][name] = {'file': f'{name}.npy', 'dtype': arr.dtype.str, 'shape': list(arr.shape)}
+        (tmp / MANIFEST).write_text(json.dumps(manifest, indent=2), encoding='utf-8')
+        os.chmod(tmp, 0o755)
+
+        old = None
+        if path.exists():
+            old = path.with_name(f'{tmp.name}-old')
+            os.replace(path, old)
+        os.replace(tmp, path)
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+    if old is not None:
+        shutil.rmtree(old, ignore_errors=True)
+    return manifest
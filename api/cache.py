@@ -0,0 +1,145 @@
+"""Bounded in-process cache for prediction results."""
+from collections import OrderedDict
+import threading
+import time
+
+
+class _Call:
+    """An in-flight computation that concurrent identical misses wait on."""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+        # set by clear()/discard(): the result is returned to its waiters but not stored
+        self.stale = False
+
+
+class PredictionCache:
+    """Thread-safe LRU cache with a TTL and single-flight misses.
+
+    Entries belong to one model version: the first version asked for, then
+    whichever one ``advance()`` (called when a reload goes live) moves to,
+    dropping every older entry. Calls for any other version, e.g. requests
+    still finishing on the previous model during a reload, compute their
+    result without reading or storing entries, so they never evict the live
+    version's results or get served its answers. While one thread computes
+    a missing key, other threads asking for the same key wait for that
+    result instead of recomputing it; requests after ``advance()``,
+    ``clear()`` or ``discard()`` start a fresh computation rather than join
+    an older one.
+    """
+
+    def __init__(self, maxsize=4096, ttl=300.0, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._data = OrderedDict()
+        self._inflight = {}
+        self._version = None
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self.bypassed = 0
+
+    def get_or_compute(self, version, key, compute):
+        """Return the cached value for ``key`` or store ``compute()``'s result."""
+        with self._lock:
+            if self._version is None:
+                self._version = version
+            stale = version != self._version
+            if stale:
+                self.bypassed += 1
+        if stale:
+            return compute()
+
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > self._clock():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+                self.expirations += 1
+
+            call = self._inflight.get((version, key))
+            leader = call is None
+            if leader:
+                call = self._inflight[(version, key)] = _Call()
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value
+
+        try:
+            call.value = compute()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                if self._inflight.get((version, key)) is call:
+                    del self._inflight[(version, key)]
+                if call.error is None and not call.stale and version == self._version:
+                    self._data[key] = (self._clock() + self.ttl, call.value)
+                    if len(self._data) > self.maxsize:
+                        self._data.popitem(last=False)
+                        self.evictions += 1
+            call.event.set()
+        return call.value
+
+    def discard(self, key):
+        """Drop ``key`` if it is cached; a computation of it in flight won't be stored."""
+        with self._lock:
+            self._data.pop(key, None)
+            for inflight_key in [k for k in self._inflight if k[1] == key]:
+                self._inflight.pop(inflight_key).stale = True
+
+    def advance(self, version):
+        """Make ``version`` the cached one, dropping entries and computations of the previous one."""
+        with self._lock:
+            if version == self._version:
+                return
+            if self._data:
+                self.invalidations += 1
+            self._clear()
+            self._version = version
+
+    def clear(self):
+        with self._lock:
+            self._clear()
+
+    def _clear(self):
+        self._data.clear()
+        for call in self._inflight.values():
+            call.stale = True
+        self._inflight.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses + self.coalesced
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'version': self._version,
+                'hits': self.hits,
+                'misses': self.misses,
+                'coalesced': self.coalesced,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations,
+                'bypassed': self.bypassed,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            }
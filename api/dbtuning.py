@@ -0,0 +1,157 @@
+"""SQLite tuning for several workers sharing one database file.
+
+With SQLITE_PROFILE = 'production' every new SQLite connection gets
+SQLITE_PRAGMAS (WAL journal, synchronous=NORMAL, a busy timeout and an
+mmap window) from the ``connection_created`` signal, and settings keep
+connections open between requests with health checks. WAL lets readers
+run while one writer commits, so session reads no longer queue behind
+history writes.
+
+``stress`` measures the difference: worker processes run request-like
+transactions (a read, and for a share of them an insert) against a
+scratch database and count how often they found it locked.
+"""
+from multiprocessing import get_context
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+
+def apply_pragmas(conn, pragmas):
+    """Run ``PRAGMA name=value`` for each entry on a DB-API connection."""
+    cursor = conn.cursor()
+    try:
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name}={value}')
+    finally:
+        cursor.close()
+
+
+def configure_connection(sender, connection, **kwargs):
+    """``connection_created`` receiver applying SQLITE_PRAGMAS to SQLite connections."""
+    from django.conf import settings
+
+    if connection.vendor != 'sqlite' or settings.SQLITE_PROFILE != 'production':
+        return
+    apply_pragmas(connection.connection, settings.SQLITE_PRAGMAS)
+
+
+# what ``stress`` compares, and whether its workers keep their connection open
+PROFILES = {
+    # Django's defaults: rollback journal, synchronous=FULL, a connection per request
+    'default': {'persistent': False},
+    # SQLITE_PRAGMAS, as deployed
+    'production': {'persistent': True},
+}
+
+
+def profile_pragmas(profile):
+    """The pragmas ``stress`` applies under ``profile``.
+
+    For 'production' this is SQLITE_PRAGMAS without busy_timeout: the
+    workers count lock waits themselves.
+    """
+    from django.conf import settings
+
+    if profile != 'production':
+        return {}
+    return {name: value for name, value in settings.SQLITE_PRAGMAS.items() if name != 'busy_timeout'}
+
+
+def _setup(path):
+    conn = sqlite3.connect(path)
+    conn.executescript(
+        'CREATE TABLE IF NOT EXISTS session (key TEXT PRIMARY KEY, data TEXT);'
+        'CREATE TABLE IF NOT EXISTS history (id INTEGER PRIMARY KEY, worker INTEGER, payload TEXT);'
+    )
+    conn.executemany('INSERT OR REPLACE INTO session VALUES (?, ?)', [(str(i), 'x' * 200) for i in range(100)])
+    conn.commit()
+    conn.close()
+
+
+def _worker(args):
+    path, pragmas, persistent, worker, seconds, write_ratio, give_up = args
+    rng = random.Random(worker)
+    # both profiles retry locked transactions the same way, 1 ms apart
+    connect = lambda: sqlite3.connect(path, timeout=0, isolation_level=None)
+    conn = None
+    writes = reads = waits = failed = 0
+    latencies = []
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        write = rng.random() < write_ratio
+        started = time.perf_counter()
+        ok = True
+        while True:
+            try:
+                if conn is None:
+                    conn = connect()
+                    apply_pragmas(conn, pragmas)
+                conn.execute('BEGIN')
+                conn.execute('SELECT data FROM session WHERE key = ?', (str(rng.randrange(100)),)).fetchone()
+                if write:
+                    conn.execute('INSERT INTO history (worker, payload) VALUES (?, ?)', (worker, 'y' * 200))
+                conn.execute('COMMIT')
+                break
+            except sqlite3.OperationalError as e:
+                if 'locked' not in str(e) and 'busy' not in str(e):
+                    raise
+                if conn is not None and conn.in_transaction:
+                    conn.execute('ROLLBACK')
+                waits += 1
+                if time.perf_counter() - started > give_up:
+                    ok = False
+                    break
+                time.sleep(0.001)
+        latencies.append(time.perf_counter() - started)
+        if not ok:
+            failed += 1
+        elif write:
+            writes += 1
+        else:
+            reads += 1
+        if not persistent and conn is not None:
+            conn.close()
+            conn = None
+    if conn is not None:
+        conn.close()
+    return {'writes': writes, 'reads': reads, 'lock_waits': waits, 'failed': failed, 'latencies': latencies}
+
+
+def stress(profile, workers=4, seconds=3.0, write_ratio=0.5, give_up=5.0):
+    """Run ``workers`` processes against a scratch database under ``profile``; returns a summary dict.
+
+    Transactions still locked out after ``give_up`` seconds count as
+    failed rather than as reads or writes.
+    """
+    if profile not in PROFILES:
+        raise ValueError(f'unknown profile {profile!r}; expected one of {", ".join(PROFILES)}')
+    pragmas = profile_pragmas(profile)
+    with tempfile.TemporaryDirectory() as tmp:
+        db = os.path.join(tmp, 'stress.sqlite3')
+        _setup(db)
+        jobs = [(db, pragmas, PROFILES[profile]['persistent'], i, seconds, write_ratio, give_up)
+                for i in range(workers)]
+        started = time.perf_counter()
+        with get_context('spawn').Pool(workers) as pool:
+            results = pool.map(_worker, jobs)
+        elapsed = time.perf_counter() - started
+
+    latencies = sorted(x for r in results for x in r['latencies'])
+    pct = lambda q: round(latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000, 3) if latencies else None
+    writes = sum(r['writes'] for r in results)
+    return {
+        'profile': profile,
+        'pragmas': pragmas,
+        'workers': workers,
+        'seconds': round(elapsed, 3),
+        'writes': writes,
+        'reads': sum(r['reads'] for r in results),
+        'writes_per_sec': round(writes / seconds, 1),
+        'lock_waits': sum(r['lock_waits'] for r in results),
+        'failed': sum(r['failed'] for r in results),
+        'p50_ms': pct(0.50),
+        'p99_ms': pct(0.99),
+    }
@@ -0,0 +1,150 @@
+"""Pure-NumPy evaluator for the exported scikit-learn models.
+
+sklearn's ``predict``/``predict_proba`` validate and dispatch on every call,
+which dominates single-row latency. ``compile_models`` flattens the fitted
+StandardScaler, multinomial LogisticRegression and GradientBoostingRegressor
+into plain arrays, and ``CompiledModels`` evaluates them with a fused
+matmul + softmax and a vectorised walk over all trees at once.
+
+The arithmetic mirrors sklearn's (float32 scaling, float32 tree inputs,
+stage-by-stage boosting sums), so outputs match sklearn to floating-point
+round-off. Compiled arrays can be exported with ``manage.py export_engine``
+and loaded without sklearn or pickles.
+"""
+from pathlib import Path
+import numpy as np
+
+ENGINE_FILE = 'compiled_engine.npz'
+
+
+class UnsupportedModel(ValueError):
+    """Raised when a fitted estimator can't be compiled to arrays."""
+
+
+class CompiledModels:
+    """Array form of (scaler, classifier, regressor); any of them may be absent."""
+
+    ARRAYS = (
+        'scaler_mean', 'scaler_scale',
+        'lr_coef', 'lr_intercept', 'classes',
+        'gbr_init', 'gbr_learning_rate',
+        'tree_roots', 'tree_left', 'tree_right', 'tree_feature', 'tree_threshold', 'tree_value', 'tree_depth',
+    )
+
+    def __init__(self, **arrays):
+        for name in self.ARRAYS:
+            setattr(self, name, arrays.get(name))
+        self.has_classifier = self.lr_coef is not None
+        self.has_regressor = self.tree_roots is not None
+        if self.has_regressor:
+            # children[2 * node] is the left child, children[2 * node + 1] the right
+            self._children = np.stack([self.tree_left, self.tree_right], axis=1).ravel()
+
+    def scale(self, X):
+        """StandardScaler.transform on float32 input, rounding like sklearn's in-place ops."""
+        X = np.asarray(X, dtype=np.float32)
+        if self.scaler_mean is None:
+            return X
+        return ((X - self.scaler_mean).astype(np.float32) / self.scaler_scale).astype(np.float32)
+
+    def predict_proba(self, Xs):
+        """Class probabilities (N, n_classes), columns in ``classes`` order."""
+        logits = Xs.astype(np.float64) @ self.lr_coef.T + self.lr_intercept
+        logits -= logits.max(axis=1, keepdims=True)
+        np.exp(logits, out=logits)
+        logits /= logits.sum(axis=1, keepdims=True)
+        return logits
+
+    def predict_goal_diff(self, Xs):
+        """Boosted regression output (N,) from every tree evaluated together."""
+        X = np.asarray(Xs, dtype=np.float32)
+        n, n_features = X.shape
+        flat = X.ravel()
+        row_base = (np.arange(n) * n_features)[:, None]
+        node = np.broadcast_to(self.tree_roots, (n, len(self.tree_roots)))
+        # leaves point back at themselves, so depth steps settle every path
+        for _ in range(int(self.tree_depth)):
+            go_right = flat.take(row_base + self.tree_feature.take(node)) > self.tree_threshold.take(node)
+            node = self._children.take(2 * node + go_right)
+
+        # accumulate stage by stage (not pairwise) to match sklearn's summation order
+        stages = np.empty((n, len(self.tree_roots) + 1))
+        stages[:, 0] = self.gbr_init
+        np.multiply(self.gbr_learning_rate, self.tree_value.take(node), out=stages[:, 1:])
+        return np.add.accumulate(stages, axis=1)[:, -1]
+
+    def save(self, path):
+        arrays = {name: getattr(self, name) for name in self.ARRAYS if getattr(self, name) is not None}
+        np.savez(path, **arrays)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(Path(path), allow_pickle=False) as data:
+            return cls(**{name: data[name] for name in data.files})
+
+
+def _compile_scaler(scaler):
+    if type(scaler).__name__ != 'StandardScaler':
+        raise UnsupportedModel(f'unsupported scaler {type(scaler).__name__}')
+    n = scaler.n_features_in_
+    mean = scaler.mean_ if scaler.with_mean else np.zeros(n)
+    scale = scaler.scale_ if scaler.with_std else np.ones(n)
+    return {'scaler_mean': np.asarray(mean, dtype=np.float64), 'scaler_scale': np.asarray(scale, dtype=np.float64)}
+
+
+def _compile_classifier(clf):
+    if type(clf).__name__ != 'LogisticRegression' or clf.coef_.shape[0] < 3:
+        raise UnsupportedModel(f'unsupported classifier {type(clf).__name__}')
+    if getattr(clf, 'multi_class', 'auto') == 'ovr' or getattr(clf, 'solver', None) == 'liblinear':
+        raise UnsupportedModel('one-vs-rest LogisticRegression is not supported')
+    return {
+        'lr_coef': np.asarray(clf.coef_, dtype=np.float64),
+        'lr_intercept': np.asarray(clf.intercept_, dtype=np.float64),
+        'classes': np.asarray(clf.classes_).astype(str),
+    }
+
+
+def _compile_regressor(reg):
+    if type(reg).__name__ != 'GradientBoostingRegressor' or reg.loss != 'squared_error':
+        raise UnsupportedModel(f'unsupported regressor {type(reg).__name__}')
+    if type(reg.init_).__name__ != 'DummyRegressor' or reg.init_.strategy != 'mean':
+        raise UnsupportedModel('only the default mean init estimator is supported')
+
+    trees = [est.tree_ for est in reg.estimators_[:, 0]]
+    offsets = np.concatenate([[0], np.cumsum([t.node_count for t in trees])])
+    left, right, feature, threshold, value = [], [], [], [], []
+    for off, t in zip(offsets, trees):
+        ids = np.arange(t.node_count)
+        leaf = t.children_left < 0
+        left.append(np.where(leaf, ids, t.children_left) + off)
+        right.append(np.where(leaf, ids, t.children_right) + off)
+        feature.append(np.where(leaf, 0, t.feature))
+        threshold.append(t.threshold)
+        value.append(t.value[:, 0, 0])
+    return {
+        'gbr_init': np.float64(np.ravel(reg.init_.constant_)[0]),
+        'gbr_learning_rate': np.float64(reg.learning_rate),
+        'tree_roots': offsets[:-1].astype(np.intp),
+        'tree_left': np.concatenate(left).astype(np.intp),
+        'tree_right': np.concatenate(right).astype(np.intp),
+        'tree_feature': np.concatenate(feature).astype(np.intp),
+        'tree_threshold': np.concatenate(threshold).astype(np.float64),
+        'tree_value': np.concatenate(value).astype(np.float64),
+        'tree_depth': np.int64(max(t.max_depth for t in trees)),
+    }
+
+
+def compile_models(classifier=None, regressor=None, scaler=None):
+    """Flatten fitted estimators into a CompiledModels.
+
+    Raises UnsupportedModel if any given estimator isn't one of the
+    supported types, so callers can keep using sklearn for it.
+    """
+    arrays = {}
+    if scaler is not None:
+        arrays.update(_compile_scaler(scaler))
+    if classifier is not None:
+        arrays.update(_compile_classifier(classifier))
+    if regressor is not None:
+        arrays.update(_compile_regressor(regressor))
+    return CompiledModels(**arrays)
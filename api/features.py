@@ -0,0 +1,189 @@
+"""Per-team rolling-form feature store.
+
+The models are trained on rolling means of each team's recent matches
+(``H_goals_last3_mean`` ... ``A_red_last5_mean``). This store precomputes,
+for every team and every point in its match history, the last-3/last-5
+means of its own stats, so a team-only prediction can be served from the
+form each side had going into the match.
+
+The store is built from ``cleaned_merged_dataset.csv`` and cached next to
+it as ``feature_store.npz``; the sidecar is rebuilt when the CSV changes.
+"""
+from bisect import bisect_left
+from datetime import date
+from pathlib import Path
+import os
+import tempfile
+import numpy as np
+
+# team stat -> (column when playing at home, column when playing away)
+STAT_COLUMNS = {
+    'goals': ('FTHG', 'FTAG'),
+    'shots': ('HS', 'AS'),
+    'sot': ('HST', 'AST'),
+    'fouls': ('HF', 'AF'),
+    'corners': ('HC', 'AC'),
+    'yellow': ('HY', 'AY'),
+    'red': ('HR', 'AR'),
+}
+WINDOWS = (3, 5)
+
+# form columns, e.g. 'goals_last3_mean'; model features prefix these with H_/A_
+FORM_COLUMNS = tuple(f'{stat}_last{w}_mean' for w in WINDOWS for stat in STAT_COLUMNS)
+
+SIDECAR_NAME = 'feature_store.npz'
+
+_EPOCH = date(1970, 1, 1)
+
+# lookup day meaning "after every known match"
+_LATEST = np.iinfo(np.int64).max
+
+
+def to_day(value):
+    """Convert a date, ISO string or None to days since epoch (None if unparseable)."""
+    if value is None or value == '':
+        return None
+    if hasattr(value, 'date') and callable(value.date):
+        value = value.date()
+    if isinstance(value, date):
+        return (value - _EPOCH).days
+    try:
+        return (date.fromisoformat(str(value)[:10]) - _EPOCH).days
+    except ValueError:
+        return None
+
+
+class FeatureStore:
+    """Rolling-form lookup table indexed by (team, date).
+
+    Arrays are stored flat: team ``t`` owns ``dates[offsets[t]:offsets[t+1]]``
+    (days since epoch, ascending) and ``values[offsets[t] + t : offsets[t+1] + t + 1]``,
+    one more row than dates, where row ``k`` is the team's form after its
+    first ``k`` matches (row 0 is all zeros).
+    """
+
+    def __init__(self, teams, offsets, dates, values):
+        self.teams = [str(t) for t in teams]
+        self.offsets = offsets
+        self.dates = dates
+        self.values = values
+        self._index = {t: i for i, t in enumerate(self.teams)}
+        self._bounds = [(int(lo), int(hi)) for lo, hi in zip(offsets[:-1], offsets[1:])]
+        # any day after this selects every team's latest form
+        self.last_day = int(dates.max()) if len(dates) else -1
+
+    @classmethod
+    def from_csv(cls, csv_path):
+        import pandas as pd
+
+        home_cols = [h for h, _ in STAT_COLUMNS.values()]
+        away_cols = [a for _, a in STAT_COLUMNS.values()]
+        df = pd.read_csv(csv_path, usecols=['Date', 'HomeTeam', 'AwayTeam'] + home_cols + away_cols)
+        df['Date'] = pd.to_datetime(df['Date'], errors='coerce')
+        df = df.dropna(subset=['Date', 'HomeTeam', 'AwayTeam'])
+
+        # one row per (team, match) from that team's point of view
+        stats = list(STAT_COLUMNS)
+        home = df[['HomeTeam', 'Date'] + home_cols].set_axis(['team', 'date'] + stats, axis=1)
+        away = df[['AwayTeam', 'Date'] + away_cols].set_axis(['team', 'date'] + stats, axis=1)
+        long = pd.concat([home, away], ignore_index=True).sort_values(['team', 'date'], kind='stable')
+
+        grouped = long.groupby('team', sort=True)[stats]
+        form = pd.concat(
+            [grouped.rolling(w, min_periods=1).mean().reset_index(level=0, drop=True) for w in WINDOWS],
+            axis=1,
+        ).loc[long.index].fillna(0.0)
+
+        teams = list(grouped.groups)
+        counts = long.groupby('team', sort=True).size().to_numpy()
+        offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+        dates = long['date'].to_numpy().astype('datetime64[D]').astype(np.int64)
+
+        # insert a zero "no history" row ahead of each team's block
+        form_values = form.to_numpy(dtype=np.float32)
+        values = np.zeros((len(form_values) + len(teams), len(FORM_COLUMNS)), dtype=np.float32)
+        rows = np.arange(len(form_values)) + np.repeat(np.arange(len(teams)), counts) + 1
+        values[rows] = form_values
+        return cls(teams, offsets, dates, values)
+
+    @classmethod
+    def load(cls, csv_path, sidecar_path=None):
+        """Load the store from its sidecar, rebuilding it if the CSV changed."""
+        csv_path = Path(csv_path)
+        sidecar_path = Path(sidecar_path) if sidecar_path else csv_path.with_name(SIDECAR_NAME)
+        st = csv_path.stat()
+        source = np.array([st.st_mtime_ns, st.st_size], dtype=np.int64)
+
+        if sidecar_path.exists():
+            try:
+                with np.load(sidecar_path, allow_pickle=False) as data:
+                    if np.array_equal(data['source'], source):
+                        return cls(data['teams'], data['offsets'], data['dates'], data['values'])
+            except Exception as e:
+                print(f"⚠️ Ignoring unreadable feature store at {sidecar_path}: {e}")
+
+        store = cls.from_csv(csv_path)
+        try:
+            store.save(sidecar_path, source)
+        except OSError as e:
+            print(f"⚠️ Could not persist feature store to {sidecar_path}: {e}")
+        return store
+
+    def save(self, path, source):
+        path = Path(path)
+        # write then rename so concurrent workers never read a partial file
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix='.npz')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.savez(f, teams=np.array(self.teams), offsets=self.offsets, dates=self.dates,
+                         values=self.values, source=source)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def lookup(self, team, day=None):
+        """Return the team's form (float32, len(FORM_COLUMNS)) going into ``day``.
+
+        ``day`` is days since epoch; None means the latest known form.
+        Returns None for teams not in the dataset.
+        """
+        t = self._index.get(team)
+        if t is None:
+            return None
+        return self.values[self._row(t, day)]
+
+    def _row(self, t, day):
+        lo, hi = self._bounds[t]
+        k = hi if day is None else bisect_left(self.dates, day, lo, hi)
+        return k + t
+
+    def lookup_many(self, teams, days=None):
+        """Vectorised lookup() for parallel sequences of teams and days.
+
+        Returns ``(values, found)``: an (N, len(FORM_COLUMNS)) float32 array
+        (zeros for unknown teams) and a boolean mask of known teams.
+        """
+        tidx = [self._index.get(t, -1) for t in teams]
+        if days is None:
+            days = [None] * len(tidx)
+
+        if len(tidx) <= 8:
+            # small batches (single predictions): per-item bisection is cheapest
+            rows = [0 if t < 0 else self._row(t, d) for t, d in zip(tidx, days)]
+            tarr = np.array(tidx, dtype=np.int64)
+        else:
+            tarr = np.array(tidx, dtype=np.int64)
+            days = np.array([_LATEST if d is None else d for d in days], dtype=np.int64)
+            rows = np.zeros(len(tidx), dtype=np.int64)
+            for t in set(tidx):
+                if t < 0:
+                    continue
+                lo, hi = self._bounds[t]
+                sel = tarr == t
+                rows[sel] = lo + t + np.searchsorted(self.dates[lo:hi], days[sel], side='left')
+
+        found = tarr >= 0
+        values = self.values[rows]
+        values[~found] = 0.0
+        return values, found
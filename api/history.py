@@ -0,0 +1,166 @@
+"""Buffered write path for prediction history and profile counters.
+
+Predictions made by logged-in users add a PredictionHistory row and bump
+UserProfile.predictions_count. Instead of writing both in the response
+path, views queue them here; a background thread flushes the queue with
+one ``bulk_create`` and one ``F()`` update per distinct increment, every
+HISTORY_FLUSH_INTERVAL seconds or as soon as HISTORY_FLUSH_SIZE rows are
+pending, then refreshes those users' leaderboard rows (api/leaderboard.py).
+The queue is drained at interpreter exit (gunicorn's graceful worker
+shutdown). HISTORY_FLUSH_INTERVAL = 0 writes synchronously.
+"""
+from collections import Counter, defaultdict
+import atexit
+import os
+import threading
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+
+class HistoryBuffer:
+    """Thread-safe queue of history rows and per-user counter increments."""
+
+    def __init__(self, flush_interval=1.0, max_pending=500):
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._rows = []
+        self._increments = Counter()
+        self._thread = None
+        self._pid = None
+        self._closed = False
+        self.flushes = 0
+        self.written = 0
+        self.dropped = 0
+
+    @property
+    def sync(self):
+        return self.flush_interval <= 0
+
+    def record(self, user_id, rows):
+        """Queue history rows (PredictionHistory kwargs) made by ``user_id``."""
+        now = timezone.now()
+        rows = [dict(row, user_id=user_id, timestamp=row.get('timestamp') or now) for row in rows]
+        with self._lock:
+            self._rows.extend(rows)
+            self._increments[user_id] += len(rows)
+            pending = len(self._rows)
+
+        if self.sync or self._closed:
+            self.flush()
+            return
+        self._ensure_thread()
+        if pending >= self.max_pending:
+            self._wake.set()
+
+    def pending(self):
+        with self._lock:
+            return len(self._rows)
+
+    def flush(self):
+        """Write everything queued so far; returns the number of history rows written."""
+        from django.contrib.auth.models import User
+        from .leaderboard import refresh_users
+        from .models import PredictionHistory, UserProfile
+
+        with self._lock:
+            rows, self._rows = self._rows, []
+            increments, self._increments = self._increments, Counter()
+        if not rows and not increments:
+            return 0
+
+        # one UPDATE per distinct increment rather than one per user
+        by_amount = defaultdict(list)
+        for user_id, n in increments.items():
+            by_amount[n].append(user_id)
+
+        try:
+            with transaction.atomic():
+                # accounts deleted since their rows were queued would fail the whole insert
+                live = set(User.objects.filter(pk__in=list(increments)).values_list('pk', flat=True))
+                rows = [row for row in rows if row['user_id'] in live]
+                PredictionHistory.objects.bulk_create([PredictionHistory(**row) for row in rows], batch_size=500)
+                for n, user_ids in by_amount.items():
+                    UserProfile.objects.filter(user_id__in=user_ids).update(
+                        predictions_count=F('predictions_count') + n
+                    )
+        except Exception as e:
+            # history is best effort, as it was when written inline
+            self.dropped += len(rows)
+            print(f"⚠️ Dropped {len(rows)} prediction history rows: {e}")
+            return 0
+        try:
+            refresh_users(list(increments))
+        except Exception as e:
+            # the counters are written; manage.py refresh_leaderboard rebuilds the rows
+            print(f"⚠️ Leaderboard refresh failed: {e}")
+        self.flushes += 1
+        self.written += len(rows)
+        return len(rows)
+
+    def _ensure_thread(self):
+        # started lazily so each forked worker gets its own flusher
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name='history-flush', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        try:
+            while not self._closed:
+                self._wake.wait(self.flush_interval)
+                self._wake.clear()
+                self.flush()
+        finally:
+            connection.close()
+
+    def close(self):
+        """Stop the flusher and write whatever is still queued."""
+        self._closed = True
+        self._wake.set()
+        thread = self._thread
+        if thread is not None and thread.is_alive() and self._pid == os.getpid():
+            thread.join(timeout=5)
+        self.flush()
+
+    def stats(self):
+        return {
+            'pending': self.pending(),
+            'flushes': self.flushes,
+            'written': self.written,
+            'dropped': self.dropped,
+            'flush_interval': self.flush_interval,
+            'max_pending': self.max_pending,
+        }
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_history_buffer():
+    """Process-wide HistoryBuffer configured from HISTORY_FLUSH_INTERVAL/HISTORY_FLUSH_SIZE."""
+    global _buffer
+    from django.conf import settings
+
+    interval, size = settings.HISTORY_FLUSH_INTERVAL, settings.HISTORY_FLUSH_SIZE
+    buffer = _buffer
+    if buffer is None or (buffer.flush_interval, buffer.max_pending) != (interval, size):
+        with _buffer_lock:
+            if _buffer is None or (_buffer.flush_interval, _buffer.max_pending) != (interval, size):
+                old, _buffer = _buffer, HistoryBuffer(interval, size)
+                if old is not None:
+                    old.close()
+            buffer = _buffer
+    return buffer
+
+
+@atexit.register
+def _drain():
+    if _buffer is not None:
+        _buffer.close()
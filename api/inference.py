@@ -1,22 +1,156 @@
 """TorchScript model loader and inference helpers."""
 """SKLearn model loader and inference helpers."""
 from pathlib import Path
+import hashlib
 import json
+import re
+import threading
+import time
 import numpy as np
-import joblib
 from typing import Optional
+from .bundle import BUNDLE_DIR, MANIFEST, ArtifactBundle, BundleError, source_digest
+from .cache import PredictionCache
+from .engine import CompiledModels, UnsupportedModel, compile_models, ENGINE_FILE
+from .features import FeatureStore, FORM_COLUMNS, to_day
+from .metrics import stage
 
+# raw match stats a payload may carry
+STAT_KEYS = ('HTHG', 'HTAG', 'HS', 'AS', 'HST', 'AST', 'HF', 'AF', 'HC', 'AC', 'HY', 'AY', 'HR', 'AR')
 
-class SklearnInferencer:
+# files whose contents determine predictions; the artifact bundle is built from them
+SOURCE_FILES = (
+    'model_meta.json',
+    'match_outcome_classifier.pkl',
+    'goal_diff_regressor.pkl',
+    'feature_scaler.pkl',
+    'cleaned_merged_dataset.csv',
+    ENGINE_FILE,
+)
+
+# their fingerprint, with the bundle's manifest, is the model version
+ARTIFACT_FILES = SOURCE_FILES + (f'{BUNDLE_DIR}/{MANIFEST}',)
+
+# largest batch evaluated with the NumPy engine when sklearn models are loaded
+ENGINE_MAX_ROWS = 256
+
+# model feature stat -> (home payload key, away payload key) used as its proxy;
+# half-time goals stand in for goals
+PROXY_STATS = {
+    'goals': ('HTHG', 'HTAG'),
+    'shots': ('HS', 'AS'),
+    'sot': ('HST', 'AST'),
+    'fouls': ('HF', 'AF'),
+    'corners': ('HC', 'AC'),
+    'yellow': ('HY', 'AY'),
+    'red': ('HR', 'AR'),
+}
+
+FEATURE_PATTERN = re.compile(r'^(?P<side>[HA])_(?P<stat>[a-z]+)_last(?P<window>\d+)_mean$')
+
+
+class BaseInferencer:
+    """Request-shaping shared by the in-process and model-server inferencers.
+
+    Subclasses provide predict_arrays() and class_labels(); this turns
+    payload dicts and DataFrames into columns and column results back into
+    the per-match dicts the views return.
+    """
+
+    @staticmethod
+    def _payload_columns(payloads):
+        """Split payload dicts into (raw stats, home teams, away teams, days)."""
+        raw = np.array([[p.get(k) or 0 for k in STAT_KEYS] for p in payloads], dtype=np.float32)
+        home = [p.get('HomeTeam') for p in payloads]
+        away = [p.get('AwayTeam') for p in payloads]
+        days = [to_day(p.get('match_date') or p.get('Date')) for p in payloads]
+        return raw.reshape(len(payloads), len(STAT_KEYS)), home, away, days
+
+    @staticmethod
+    def _suggested_scores(gd):
+        """Map predicted goal differences to a (home, away) scoreline, 1-1 based."""
+        diff = np.rint(gd).astype(int)
+        home = np.where(diff > 0, 1 + diff, 1)
+        away = np.where(diff < 0, 1 - diff, 1)
+        return home, away
+
+    def predict_arrays(self, raw, home, away, days=None):
+        raise NotImplementedError
+
+    def _rows(self, out):
+        """Convert predict_arrays() columns into the per-match result dicts."""
+        labels = self.class_labels()
+        probs, gd = out['probs'], out['goal_diff']
+        rows = []
+        for i in range(len(out['home_goals'])):
+            res = {'outcome': None, 'probabilities': [], 'goal_diff': None, 'suggested_score': {'home': 0, 'away': 0}}
+            if probs is not None:
+                res['probabilities'] = [{'label': lab, 'prob': float(round(float(p), 4))} for lab, p in zip(labels, probs[i])]
+                res['outcome'] = labels[int(np.argmax(probs[i]))]
+            if gd is not None:
+                res['goal_diff'] = float(gd[i])
+                res['suggested_score'] = {'home': int(out['home_goals'][i]), 'away': int(out['away_goals'][i])}
+            rows.append(res)
+        return rows
+
+    def predict_batch(self, payloads):
+        """Predict many matches at once.
+
+        Builds a single feature matrix, scales it once and calls each model
+        once. Returns a list of dicts shaped like predict_single().
+        """
+        return self._rows(self.predict_arrays(*self._payload_columns(list(payloads))))
+
+    def predict_frame(self, df):
+        """Predict every row of a fixtures DataFrame in one pass.
+
+        ``df`` needs HomeTeam/AwayTeam columns; any stat columns it carries
+        are used and missing ones default to 0. A ``match_date`` or ``Date``
+        column selects the rolling form for team-only rows. Returns the
+        column arrays from predict_arrays().
+        """
+        return self.predict_arrays(*self._frame_columns(df))
+
+    @staticmethod
+    def _frame_columns(df):
+        """Split a fixtures DataFrame into (raw stats, home teams, away teams, days)."""
+        n = len(df)
+        raw = np.column_stack([
+            df[k].fillna(0).to_numpy(dtype=np.float32) if k in df.columns else np.zeros(n, dtype=np.float32)
+            for k in STAT_KEYS
+        ]).reshape(n, len(STAT_KEYS))
+        days = None
+        for col in ('match_date', 'Date'):
+            if col in df.columns:
+                days = [to_day(d) for d in df[col]]
+                break
+        return raw, df['HomeTeam'].tolist(), df['AwayTeam'].tolist(), days
+
+    def predict_single(self, payload: dict):
+        """Predict one match; returns a dict shaped like a predict_batch() item."""
+        return self._rows(self.predict_arrays(*self._payload_columns([payload])))[0]
+
+
+class SklearnInferencer(BaseInferencer):
     """Loader for scikit-learn models saved as .pkl in an artifacts/ folder.
 
+    An instance is a versioned model bundle: everything it loads is fixed
+    at construction, and a reload builds a new instance and swaps it in
+    (see reload_inferencer), so callers holding one keep a consistent view.
+
     It looks for artifacts/model_meta.json and the following files:
       - artifacts/match_outcome_classifier.pkl
       - artifacts/goal_diff_regressor.pkl
       - artifacts/feature_scaler.pkl  (optional)
+      - artifacts/cleaned_merged_dataset.csv  (optional, feeds the rolling-form store)
+      - artifacts/compiled_engine.npz  (optional, used when the pickles can't be loaded)
+
+    With ``use_bundle``, a memory-mapped artifacts/bundle/ (api/bundle.py)
+    built from these same files replaces all of them, and sklearn is
+    never imported.
     """
 
-    def __init__(self, base_path: Optional[str] = None):
+    def __init__(self, base_path: Optional[str] = None, cache: Optional[PredictionCache] = None,
+                 use_engine: bool = True, use_bundle: bool = False):
         # attempt to locate artifacts directory in common places
         base = Path(base_path) if base_path else None
         if base is None:
@@ -33,10 +167,65 @@ class SklearnInferencer:
         self.classifier = None
         self.regressor = None
         self.scaler = None
+        self.engine = None
+        self.feature_store = None
+        self.cache = cache
+        self.use_engine = use_engine
+        self.matchups = None
+        self.load_report = {}
+        started = time.perf_counter()
+        self.version = artifact_version(self.base)
+        # the bundle evaluates through the NumPy engine only
+        self.bundle = self._open_bundle() if use_bundle and use_engine else None
         self._load_meta()
+        self._compile_feature_plan()
         self._load_models()
+        self._load_engine()
+        self._labels = self._resolve_class_labels()
+        self._load_feature_store()
+        self._build_matchups()
+        self.load_seconds = round(time.perf_counter() - started, 4)
+        self.loaded_at = time.time()
+
+    def is_ready(self):
+        """True when both models needed for real predictions are loaded."""
+        if self.engine is not None and self.engine.has_classifier and self.engine.has_regressor:
+            return True
+        return self.classifier is not None and self.regressor is not None
+
+    def has_models(self):
+        """False when neither model is available and predictions fall back to the demo."""
+        return self.classifier is not None or self.regressor is not None or self.engine is not None
+
+    def _open_bundle(self):
+        """The artifact bundle, or None if it is absent, unreadable or built from other artifacts."""
+        started = time.perf_counter()
+        path = self.base / BUNDLE_DIR
+        if not (path / MANIFEST).exists():
+            self._record('bundle', 'missing', started)
+            return None
+        try:
+            bundle = ArtifactBundle.open(path)
+        except BundleError as e:
+            print(f"⚠️ Ignoring artifact bundle: {e}")
+            self._record('bundle', 'error', started, e)
+            return None
+        # without any source files (a bundle-only deploy) there is nothing to be stale against
+        if any((self.base / name).exists() for name in SOURCE_FILES) and \
+                bundle.source_digest != source_digest(self.base, SOURCE_FILES):
+            print(f"⚠️ Artifact bundle at {path} is stale; rebuild it with manage.py build_bundle")
+            self._record('bundle', 'stale', started)
+            return None
+        print(f"✅ Mapped artifact bundle from {path}")
+        self._record('bundle', 'loaded', started)
+        return bundle
 
     def _load_meta(self):
+        started = time.perf_counter()
+        if self.bundle is not None:
+            self.meta = self.bundle.meta
+            self._record('meta', 'bundle', started)
+            return
         meta_path = self.base / 'model_meta.json'
         if not meta_path.exists():
             # try legacy path under project root
@@ -46,43 +235,194 @@ class SklearnInferencer:
         if meta_path.exists():
             with open(meta_path, 'r', encoding='utf-8') as f:
                 self.meta = json.load(f)
+            self._record('meta', 'loaded', started)
         else:
             self.meta = {}
+            self._record('meta', 'missing', started)
 
-    def _load_models(self):
-        try:
-            cls_path = self.base / 'match_outcome_classifier.pkl'
-            reg_path = self.base / 'goal_diff_regressor.pkl'
-            scaler_path = self.base / 'feature_scaler.pkl'
+    def _record(self, name, state, started, error=None):
+        """Record load state and wall time of one artifact for /api/ready."""
+        entry = {'state': state, 'seconds': round(time.perf_counter() - started, 4)}
+        if error is not None:
+            entry['error'] = str(error)
+        self.load_report[name] = entry
 
-            if cls_path.exists():
-                self.classifier = joblib.load(str(cls_path))
-                print(f"✅ Loaded classifier from {cls_path}")
+    def _load_pickle(self, name, path, optional=False):
+        started = time.perf_counter()
+        if not path.exists():
+            if optional:
+                print(f"⚠️ {name.capitalize()} not found at {path} (optional)")
             else:
-                print(f"❌ Classifier not found at {cls_path}")
+                print(f"❌ {name.capitalize()} not found at {path}")
+            self._record(name, 'missing', started)
+            return None
+        try:
+            import joblib
+
+            obj = joblib.load(str(path))
+        except Exception as e:
+            print(f"{'⚠️' if optional else '❌'} Error loading {name}: {e}")
+            self._record(name, 'error', started, e)
+            return None
+        print(f"✅ Loaded {name} from {path}")
+        self._record(name, 'loaded', started)
+        return obj
+
+    def _load_models(self):
+        if self.bundle is not None:
+            # arrays only: nothing is unpickled and sklearn stays unimported
+            started = time.perf_counter()
+            self.engine = self.bundle.engine
+            self._record('engine', 'bundle', started)
+            return
+        self.classifier = self._load_pickle('classifier', self.base / 'match_outcome_classifier.pkl')
+        self.regressor = self._load_pickle('regressor', self.base / 'goal_diff_regressor.pkl')
+        self.scaler = self._load_pickle('scaler', self.base / 'feature_scaler.pkl', optional=True)
+
+    def _load_engine(self):
+        """Compile the loaded models into the NumPy engine.
+
+        If the pickles could not be loaded (e.g. an sklearn version
+        mismatch), fall back to arrays exported by ``manage.py export_engine``.
+        """
+        if not self.use_engine or self.bundle is not None:
+            return
+        started = time.perf_counter()
+        if self.classifier is not None or self.regressor is not None:
+            try:
+                self.engine = compile_models(self.classifier, self.regressor, self.scaler)
+                print("✅ Compiled models to the NumPy engine")
+                self._record('engine', 'compiled', started)
+            except UnsupportedModel as e:
+                print(f"⚠️ Using sklearn for inference: {e}")
+                self._record('engine', 'unsupported', started, e)
+            return
+
+        engine_path = self.base / ENGINE_FILE
+        if not engine_path.exists():
+            self._record('engine', 'missing', started)
+            return
+        try:
+            self.engine = CompiledModels.load(engine_path)
+            print(f"✅ Loaded exported engine from {engine_path}")
+            self._record('engine', 'loaded', started)
         except Exception as e:
-            print(f"❌ Error loading classifier: {e}")
-            self.classifier = None
+            print(f"❌ Error loading exported engine: {e}")
+            self._record('engine', 'error', started, e)
 
+    def _load_feature_store(self):
+        started = time.perf_counter()
+        if self.bundle is not None and self.bundle.feature_store is not None:
+            self.feature_store = self.bundle.feature_store
+            self._record('feature_store', 'bundle', started)
+            return
+        csv_path = self.base / 'cleaned_merged_dataset.csv'
+        if not csv_path.exists():
+            print(f"⚠️ Dataset not found at {csv_path}; team-only predictions use zero features")
+            self._record('feature_store', 'missing', started)
+            return
         try:
-            if reg_path.exists():
-                self.regressor = joblib.load(str(reg_path))
-                print(f"✅ Loaded regressor from {reg_path}")
-            else:
-                print(f"❌ Regressor not found at {reg_path}")
+            self.feature_store = FeatureStore.load(csv_path)
+            print(f"✅ Loaded feature store for {len(self.feature_store.teams)} teams")
+            self._record('feature_store', 'loaded', started)
         except Exception as e:
-            print(f"❌ Error loading regressor: {e}")
-            self.regressor = None
+            print(f"⚠️ Error loading feature store: {e}")
+            self.feature_store = None
+            self._record('feature_store', 'error', started, e)
 
+    def _build_matchups(self):
+        """Predict every ordered pair of known teams in one batched pass.
+
+        Fills ``matchups`` with dense (T, T) arrays indexed [home, away]:
+        ``probs`` (T, T, n_labels) or None, ``goal_diff`` or None, and
+        ``home_goals``/``away_goals``; the diagonal is left empty (NaN/0).
+        These are the team-only predictions at each team's latest form.
+        """
+        started = time.perf_counter()
+        teams = self.teams()
+        t = len(teams)
+        if t < 2:
+            self._record('matchups', 'missing', started)
+            return
+        home_idx, away_idx = np.nonzero(~np.eye(t, dtype=bool))
         try:
-            if scaler_path.exists():
-                self.scaler = joblib.load(str(scaler_path))
-                print(f"✅ Loaded scaler from {scaler_path}")
-            else:
-                print(f"⚠️ Scaler not found at {scaler_path} (optional)")
+            out = self.predict_arrays(
+                np.zeros((len(home_idx), len(STAT_KEYS)), dtype=np.float32),
+                [teams[i] for i in home_idx], [teams[j] for j in away_idx],
+            )
         except Exception as e:
-            print(f"⚠️ Error loading scaler: {e}")
-            self.scaler = None
+            print(f"⚠️ Error building matchup matrix: {e}")
+            self._record('matchups', 'error', started, e)
+            return
+
+        def dense(values, fill, dtype):
+            if values is None:
+                return None
+            arr = np.full((t, t) + values.shape[1:], fill, dtype=dtype)
+            arr[home_idx, away_idx] = values
+            return arr
+
+        self.matchups = {
+            'probs': dense(out['probs'], np.nan, float),
+            'goal_diff': dense(out['goal_diff'], np.nan, float),
+            'home_goals': dense(out['home_goals'], 0, int),
+            'away_goals': dense(out['away_goals'], 0, int),
+        }
+        self._team_index = {team: i for i, team in enumerate(teams)}
+        self._matchup_rows = dict(zip(zip(home_idx.tolist(), away_idx.tolist()), self._rows(out)))
+        print(f"✅ Precomputed {len(home_idx)} team matchups")
+        self._record('matchups', 'loaded', started)
+
+    def matchup(self, home_team, away_team):
+        """Precomputed team-only prediction for a fixture, or None if not in the matrix."""
+        if self.matchups is None:
+            return None
+        i = self._team_index.get(home_team)
+        j = self._team_index.get(away_team)
+        if i is None or j is None or i == j:
+            return None
+        return _copy_result(self._matchup_rows[(i, j)])
+
+    def _compile_feature_plan(self):
+        """Resolve every model feature to its sources once, at load time.
+
+        ``_stat_plan`` indexes columns of the raw (N, len(STAT_KEYS)) stat
+        matrix and ``_form_plan`` columns of the [home form | away form] rows
+        from the feature store. Features that match neither are recorded in
+        ``unknown_features`` and zero-filled.
+        """
+        n_form = len(FORM_COLUMNS)
+        stat_plan, form_plan, unknown = [], [], []
+        for f in self.features():
+            m = FEATURE_PATTERN.match(f)
+            form_col = m and f"{m.group('stat')}_last{m.group('window')}_mean"
+            if m is None or m.group('stat') not in PROXY_STATS or form_col not in FORM_COLUMNS:
+                stat_plan.append(0)
+                form_plan.append(0)
+                unknown.append(f)
+                continue
+            home_side = m.group('side') == 'H'
+            # current match stats stand in for the rolling averages
+            stat_plan.append(STAT_KEYS.index(PROXY_STATS[m.group('stat')][0 if home_side else 1]))
+            form_plan.append(FORM_COLUMNS.index(form_col) + (0 if home_side else n_form))
+        self._stat_plan = np.array(stat_plan, dtype=np.intp)
+        self._form_plan = np.array(form_plan, dtype=np.intp)
+        self._unknown_mask = np.array([f in unknown for f in self.features()], dtype=bool)
+        self.unknown_features = unknown
+        if unknown:
+            print(f"⚠️ No source for features {unknown}; they will be zero-filled")
+
+    def feature_plan(self):
+        """Describe where each model feature is read from."""
+        n_form = len(FORM_COLUMNS)
+        plan = []
+        for f, si, fi, unknown in zip(self.features(), self._stat_plan, self._form_plan, self._unknown_mask):
+            if unknown:
+                plan.append({'feature': f, 'stat': None, 'form': None})
+            else:
+                side = 'home' if fi < n_form else 'away'
+                plan.append({'feature': f, 'stat': STAT_KEYS[si], 'form': f'{side}:{FORM_COLUMNS[fi % n_form]}'})
+        return plan
 
     def teams(self):
         return self.meta.get('teams', [])
@@ -91,7 +431,50 @@ class SklearnInferencer:
         return self.meta.get('features', [])
 
     def class_labels(self):
-        return self.meta.get('class_labels', ['H', 'D', 'A'])
+        """Outcome labels in the column order of predicted probabilities."""
+        return self._labels
+
+    def _resolve_class_labels(self):
+        # predict_proba and the engine return columns in the classifier's
+        # classes_ order (alphabetical, A/D/H), not meta's H/D/A default
+        if self.engine is not None and self.engine.classes is not None:
+            return [str(c) for c in self.engine.classes]
+        classes = getattr(self.classifier, 'classes_', None)
+        if classes is not None:
+            return [str(c) for c in classes]
+        return list(self.meta.get('class_labels', ['H', 'D', 'A']))
+
+    def _assemble(self, raw, home, away, days=None):
+        """Gather the (N, n_features) model matrix from an (N, len(STAT_KEYS)) stat matrix.
+
+        Rows without any stats (the team-names-only case) are filled from
+        each team's rolling form in the feature store instead; ``days``
+        selects the form going into that day, None meaning the latest.
+        """
+        with stage('features'):
+            return self._assemble_matrix(raw, home, away, days)
+
+    def _assemble_matrix(self, raw, home, away, days):
+        X = raw[:, self._stat_plan]
+
+        if self.feature_store is not None and len(raw):
+            team_only = np.flatnonzero(~raw.any(axis=1))
+            m = len(team_only)
+            if m:
+                # one store lookup for both sides: first m rows home, next m away
+                sides = [home[i] for i in team_only] + [away[i] for i in team_only]
+                sel_days = None if days is None else [days[i] for i in team_only] * 2
+                form, found = self.feature_store.lookup_many(sides, sel_days)
+                form = np.concatenate([form[:m], form[m:]], axis=1)[:, self._form_plan]
+                found = found[:m] & found[m:]
+                if found.all():
+                    X[team_only] = form
+                else:
+                    X[team_only[found]] = form[found]
+
+        if self.unknown_features:
+            X[:, self._unknown_mask] = 0.0
+        return X
 
     def _build_vector(self, payload: dict):
         """Build feature vector from match statistics.
@@ -99,189 +482,302 @@ class SklearnInferencer:
         The trained model expects rolling average features (last 3 and last 5 matches).
         Since we don't have historical data in real-time prediction, we'll use
         current match stats as approximations for the rolling averages.
+        Team-only payloads are filled from the rolling-form feature store.
         """
-        features = self.features()
-        
-        # Extract current match stats from payload
-        # Half-time goals
-        hthg = float(payload.get('HTHG', 0))
-        htag = float(payload.get('HTAG', 0))
-        
-        # Shots
-        hs = float(payload.get('HS', 0))
-        as_shots = float(payload.get('AS', 0))
-        hst = float(payload.get('HST', 0))
-        ast = float(payload.get('AST', 0))
-        
-        # Fouls
-        hf = float(payload.get('HF', 0))
-        af = float(payload.get('AF', 0))
-        
-        # Corners
-        hc = float(payload.get('HC', 0))
-        ac = float(payload.get('AC', 0))
-        
-        # Cards
-        hy = float(payload.get('HY', 0))
-        ay = float(payload.get('AY', 0))
-        hr = float(payload.get('HR', 0))
-        ar = float(payload.get('AR', 0))
-        
-        # Build feature vector matching the trained model's expected features
-        # The model expects: [H_goals_last3_mean, H_shots_last3_mean, ..., A_red_last5_mean]
-        vec = []
-        
-        for f in features:
-            # Map rolling average features to current match stats
-            # Since we don't have historical data, use current stats as proxy
-            
-            # Home team last 3 match averages
-            if 'H_goals_last3' in f:
-                vec.append(hthg)  # Use half-time goals as proxy
-            elif 'H_shots_last3' in f:
-                vec.append(hs)
-            elif 'H_sot_last3' in f:
-                vec.append(hst)  # shots on target
-            elif 'H_fouls_last3' in f:
-                vec.append(hf)
-            elif 'H_corners_last3' in f:
-                vec.append(hc)
-            elif 'H_yellow_last3' in f:
-                vec.append(hy)
-            elif 'H_red_last3' in f:
-                vec.append(hr)
-            
-            # Away team last 3 match averages
-            elif 'A_goals_last3' in f:
-                vec.append(htag)
-            elif 'A_shots_last3' in f:
-                vec.append(as_shots)
-            elif 'A_sot_last3' in f:
-                vec.append(ast)
-            elif 'A_fouls_last3' in f:
-                vec.append(af)
-            elif 'A_corners_last3' in f:
-                vec.append(ac)
-            elif 'A_yellow_last3' in f:
-                vec.append(ay)
-            elif 'A_red_last3' in f:
-                vec.append(ar)
-            
-            # Home team last 5 match averages (use same values)
-            elif 'H_goals_last5' in f:
-                vec.append(hthg)
-            elif 'H_shots_last5' in f:
-                vec.append(hs)
-            elif 'H_sot_last5' in f:
-                vec.append(hst)
-            elif 'H_fouls_last5' in f:
-                vec.append(hf)
-            elif 'H_corners_last5' in f:
-                vec.append(hc)
-            elif 'H_yellow_last5' in f:
-                vec.append(hy)
-            elif 'H_red_last5' in f:
-                vec.append(hr)
-            
-            # Away team last 5 match averages (use same values)
-            elif 'A_goals_last5' in f:
-                vec.append(htag)
-            elif 'A_shots_last5' in f:
-                vec.append(as_shots)
-            elif 'A_sot_last5' in f:
-                vec.append(ast)
-            elif 'A_fouls_last5' in f:
-                vec.append(af)
-            elif 'A_corners_last5' in f:
-                vec.append(ac)
-            elif 'A_yellow_last5' in f:
-                vec.append(ay)
-            elif 'A_red_last5' in f:
-                vec.append(ar)
-            
-            else:
-                # Fallback for any unknown features
-                vec.append(0.0)
-        
-        return np.array(vec, dtype=np.float32).reshape(1, -1)
+        return self._build_matrix([payload])
 
-    def predict_single(self, payload: dict):
-        """Predict using sklearn models and metadata.
+    def _build_matrix(self, payloads):
+        """Stack feature vectors for several payloads into one (N, n_features) matrix."""
+        return self._assemble(*self._payload_columns(payloads))
+
+    def predict_arrays(self, raw, home, away, days=None):
+        """Run every model once over a batch given as columns.
 
-        Returns dict with same shape as before.
+        ``raw`` is an (N, len(STAT_KEYS)) stat matrix, ``home``/``away`` are
+        team names and ``days`` optional match days (see _assemble).
+        Returns a dict of column arrays: ``probs`` (N, n_labels) or None,
+        ``goal_diff`` (N,) or None, and integer ``home_goals``/``away_goals``.
         """
-        res = {'outcome': None, 'probabilities': [], 'goal_diff': None, 'suggested_score': {'home': 0, 'away': 0}}
+        return self._predict_matrix(self._assemble(raw, home, away, days), raw, home, away)
+
+    def _predict_matrix(self, X, raw, home, away):
+        """predict_arrays() over an already assembled feature matrix."""
+        n = X.shape[0]
+        out = {'probs': None, 'goal_diff': None,
+               'home_goals': np.zeros(n, dtype=int), 'away_goals': np.zeros(n, dtype=int)}
+
+        # the compiled engine wins on small batches; sklearn's Cython tree
+        # walk is faster on large ones, so use it there when it is loaded
+        engine = self.engine
+        if engine is not None and n > ENGINE_MAX_ROWS and self.classifier is not None and self.regressor is not None:
+            engine = None
+
+        if engine is not None:
+            with stage('scale'):
+                Xs = engine.scale(X)
+            if engine.has_classifier:
+                with stage('classify'):
+                    out['probs'] = engine.predict_proba(Xs)
+            if engine.has_regressor:
+                with stage('regress'):
+                    out['goal_diff'] = engine.predict_goal_diff(Xs)
+                out['home_goals'], out['away_goals'] = self._suggested_scores(out['goal_diff'])
+            if engine.has_classifier and engine.has_regressor:
+                return out
 
-        X = self._build_vector(payload)
         # apply scaler if present
         if self.scaler is not None:
             try:
-                X = self.scaler.transform(X)
+                with stage('scale'):
+                    X = self.scaler.transform(X)
             except Exception:
                 pass
 
         labels = self.class_labels()
 
-        if self.classifier is not None:
+        if self.classifier is not None and out['probs'] is None:
             try:
-                probs = self.classifier.predict_proba(X)[0]
+                with stage('classify'):
+                    out['probs'] = np.asarray(self.classifier.predict_proba(X), dtype=float)
             except Exception:
                 # some classifiers may not have predict_proba
-                preds = self.classifier.predict(X)
-                probs = np.zeros(len(labels), dtype=float)
-                for i, lab in enumerate(labels):
-                    probs[i] = float(np.mean(preds == lab))
-            res['probabilities'] = [{'label': lab, 'prob': float(round(float(p), 4))} for lab, p in zip(labels, probs)]
-            res['outcome'] = labels[int(np.argmax(probs))]
-
-        if self.regressor is not None:
+                preds = np.asarray(self.classifier.predict(X))
+                out['probs'] = (preds[:, None] == np.asarray(labels)[None, :]).astype(float)
+
+        if self.regressor is not None and out['goal_diff'] is None:
             try:
-                gd = float(self.regressor.predict(X)[0])
+                with stage('regress'):
+                    gd = np.asarray(self.regressor.predict(X), dtype=float)
             except Exception:
-                gd = 0.0
-            res['goal_diff'] = float(gd)
-            diff = int(round(gd))
-            if diff == 0:
-                res['suggested_score'] = {'home': 1, 'away': 1}
-            elif diff > 0:
-                res['suggested_score'] = {'home': max(1, 1 + diff), 'away': 1}
-            else:
-                res['suggested_score'] = {'home': 1, 'away': max(1, 1 + abs(diff))}
+                gd = np.zeros(n, dtype=float)
+            out['goal_diff'] = gd
+            out['home_goals'], out['away_goals'] = self._suggested_scores(gd)
 
         # if no models loaded, still return a simple deterministic demo (keep UI usable)
-        if self.classifier is None and self.regressor is None:
-            teams = self.teams()
-            team2idx = {t: i for i, t in enumerate(teams)}
-            hidx = team2idx.get(payload.get('HomeTeam'), 0)
-            aidx = team2idx.get(payload.get('AwayTeam'), 0)
-            ht = float(payload.get('HTHG') or 0)
-            at = float(payload.get('HTAG') or 0)
-            base = (hidx - aidx) * 0.05 + (ht - at) * 0.25
-            gd = max(min(base, 3.0), -3.0)
-            res['goal_diff'] = float(round(gd, 2))
-            logits = np.array([gd, 0.0, -gd], dtype=np.float32)
-            exp = np.exp(logits - np.max(logits))
-            probs = (exp / exp.sum()).tolist()
-            res['probabilities'] = [{'label': lab, 'prob': float(round(float(p), 4))} for lab, p in zip(labels, probs)]
-            res['outcome'] = labels[int(np.argmax(probs))]
-            diff = int(round(gd))
-            if diff == 0:
-                res['suggested_score'] = {'home': 1, 'away': 1}
-            elif diff > 0:
-                res['suggested_score'] = {'home': max(1, 1 + diff), 'away': 1}
-            else:
-                res['suggested_score'] = {'home': 1, 'away': max(1, 1 + abs(diff))}
+        if not self.has_models():
+            team2idx = {t: i for i, t in enumerate(self.teams())}
+            hidx = np.array([team2idx.get(t, 0) for t in home], dtype=float)
+            aidx = np.array([team2idx.get(t, 0) for t in away], dtype=float)
+            ht = raw[:, STAT_KEYS.index('HTHG')].astype(float)
+            at = raw[:, STAT_KEYS.index('HTAG')].astype(float)
+            gd = np.clip((hidx - aidx) * 0.05 + (ht - at) * 0.25, -3.0, 3.0)
+            logits = np.stack([gd, np.zeros(n), -gd], axis=1)
+            exp = np.exp(logits - logits.max(axis=1, keepdims=True))
+            out['probs'] = exp / exp.sum(axis=1, keepdims=True)
+            out['goal_diff'] = np.round(gd, 2)
+            out['home_goals'], out['away_goals'] = self._suggested_scores(gd)
 
-        return res
+        return out
+
+    def predict_single(self, payload: dict):
+        """Predict using sklearn models and metadata.
+
+        Returns dict with same shape as before. With a cache attached,
+        results are cached on the model version and the assembled feature
+        vector, so requests that differ only in ignored fields share an entry.
+        """
+        raw, home, away, days = self._payload_columns([payload])
+
+        # team-only requests at latest form are answered from the matchup matrix
+        if self.matchups is not None and not raw.any() and self._is_latest(days[0]):
+            with stage('matchup'):
+                res = self.matchup(home[0], away[0])
+            if res is not None:
+                return res
+
+        if self.cache is None:
+            return self._rows(self.predict_arrays(raw, home, away, days))[0]
+
+        X = self._assemble(raw, home, away, days)
+        key = X.tobytes()
+        if not self.has_models():
+            # the demo fallback also depends on the team names
+            key += f'|{home[0]}|{away[0]}'.encode()
+        res = self.cache.get_or_compute(
+            self.version, key, lambda: self._rows(self._predict_matrix(X, raw, home, away))[0]
+        )
+        # hand out a copy so callers can't mutate the cached entry
+        return _copy_result(res)
+
+    def _is_latest(self, day):
+        """True when ``day`` selects every team's latest form (no later matches known)."""
+        if day is None or self.feature_store is None:
+            return True
+        return day > self.feature_store.last_day
+
+
+def artifact_version(base):
+    """Short fingerprint of the artifact files (name, size, mtime) under ``base``."""
+    h = hashlib.sha1()
+    for name in ARTIFACT_FILES:
+        path = Path(base) / name
+        if path.exists():
+            st = path.stat()
+            h.update(f'{name}:{st.st_size}:{st.st_mtime_ns};'.encode())
+    return h.hexdigest()[:12]
+
+
+def _copy_result(res):
+    """Copy a predict_single() result deep enough that callers can mutate it."""
+    return dict(res, probabilities=[dict(p) for p in res['probabilities']],
+                suggested_score=dict(res['suggested_score']))
 
 
 # module-level instance
 _inferencer = None
+_inferencer_lock = threading.Lock()
+_prediction_cache = None
+# client for the shared model server (MODEL_SERVER_SOCKET)
+_remote = None
+
+# hot reload state
+_reload_thread = None
+_last_version_check = 0.0
+_failed_version = None
+
+
+def get_prediction_cache():
+    """Process-wide prediction cache, or None when disabled (PREDICTION_CACHE_SIZE=0)."""
+    global _prediction_cache
+    from django.conf import settings
 
+    if _prediction_cache is None and settings.PREDICTION_CACHE_SIZE > 0:
+        _prediction_cache = PredictionCache(settings.PREDICTION_CACHE_SIZE, settings.PREDICTION_CACHE_TTL)
+    return _prediction_cache
 
-def get_inferencer():
+
+def _use_engine():
+    from django.conf import settings
+
+    return settings.INFERENCE_ENGINE == 'numpy'
+
+
+def _use_bundle():
+    from django.conf import settings
+
+    return settings.INFERENCE_BUNDLE
+
+
+def _remote_inferencer():
+    """The model-server client when MODEL_SERVER_SOCKET is set, else None."""
+    global _remote
+    from django.conf import settings
+
+    if not settings.MODEL_SERVER_SOCKET:
+        return None
+    if _remote is None:
+        from .modelserver import RemoteInferencer
+
+        _remote = RemoteInferencer(settings.MODEL_SERVER_SOCKET, timeout=settings.MODEL_SERVER_TIMEOUT)
+    return _remote
+
+
+def peek_inferencer():
+    """Return the loaded inferencer without triggering a load (None if not loaded yet)."""
+    return _remote if _remote is not None else _inferencer
+
+
+def preload():
+    """Load the models in a server process before it serves, if INFERENCE_EAGER_LOAD.
+
+    Called from wsgi.py and asgi.py so no request pays the load cost. Under
+    `gunicorn --preload` this runs once in the master before fork; freezing
+    the heap keeps the GC from touching (and so copying) the model pages
+    the workers share copy-on-write.
+    """
+    import gc
+    from django.conf import settings
+
+    if not settings.INFERENCE_EAGER_LOAD:
+        return
+    get_inferencer()
+    gc.freeze()
+
+
+def get_inferencer(local=False):
+    """Return the process-wide inferencer, loading it on first use.
+
+    With MODEL_SERVER_SOCKET set this is a RemoteInferencer that forwards
+    predictions to the shared model server; ``local=True`` (used by the
+    server itself) always loads the models in this process.
+    """
     global _inferencer
+    if not local:
+        remote = _remote_inferencer()
+        if remote is not None:
+            return remote
     if _inferencer is None:
-        _inferencer = SklearnInferencer()
+        with _inferencer_lock:
+            if _inferencer is None:
+                _inferencer = SklearnInferencer(cache=get_prediction_cache(), use_engine=_use_engine(),
+                                                 use_bundle=_use_bundle())
+    _check_for_new_artifacts(_inferencer)
     return _inferencer
 
+
+def _check_for_new_artifacts(current):
+    """Start a background reload when the artifacts on disk changed.
+
+    Runs at most once per MODEL_RELOAD_CHECK_INTERVAL seconds (0 disables)
+    and costs a handful of stat() calls.
+    """
+    global _last_version_check
+    from django.conf import settings
+
+    interval = settings.MODEL_RELOAD_CHECK_INTERVAL
+    now = time.monotonic()
+    if interval <= 0 or now - _last_version_check < interval:
+        return
+    _last_version_check = now
+    version = artifact_version(current.base)
+    if version != current.version and version != _failed_version:
+        print(f"🔄 Artifacts changed ({current.version} -> {version}); reloading in background")
+        reload_inferencer()
+
+
+def reload_inferencer(wait=False, local=False):
+    """Load a fresh model bundle in a background thread and swap it in.
+
+    Requests keep using the current bundle while the new one unpickles;
+    the swap is a single reference assignment, so in-flight requests finish
+    on the bundle they started with. A bundle whose models fail to load
+    never replaces a working one. Only one reload runs at a time; calling
+    this during a reload joins that reload. Returns the reload thread.
+
+    With a model server configured the server reloads instead (and None
+    is returned) unless ``local`` is set.
+    """
+    global _reload_thread
+    if not local:
+        remote = _remote_inferencer()
+        if remote is not None:
+            remote.reload(wait=wait)
+            return None
+    with _inferencer_lock:
+        thread = _reload_thread
+        if thread is None or not thread.is_alive():
+            thread = _reload_thread = threading.Thread(target=_reload, name='model-reload', daemon=True)
+            thread.start()
+    if wait:
+        thread.join()
+    return thread
+
+
+def _reload():
+    global _inferencer, _failed_version
+    old = _inferencer
+    try:
+        new = SklearnInferencer(old.base if old is not None else None, cache=get_prediction_cache(),
+                                use_engine=_use_engine(), use_bundle=_use_bundle())
+    except Exception as e:
+        print(f"❌ Model reload failed: {e}")
+        return
+    if old is not None and old.is_ready() and not new.is_ready():
+        print(f"❌ Model version {new.version} failed to load; keeping {old.version}")
+        _failed_version = new.version
+        return
+    _inferencer = new
+    if new.cache is not None:
+        new.cache.advance(new.version)
+    _failed_version = None
+    print(f"✅ Model version {new.version} is live (was {old.version if old is not None else None})")
@@ -0,0 +1,131 @@
+"""Materialized leaderboard and cached per-user stats.
+
+Whenever profile counters change (history flushes, result reconciliation)
+``refresh_users`` copies them into LeaderboardEntry rows with one upsert,
+marks those rows dirty and drops the users' cached stats. Leaderboard
+reads call ``ensure_ranked``, which recomputes every rank with one
+window-function UPDATE if any row is dirty, at most once every
+LEADERBOARD_RERANK_INTERVAL seconds per process. Pages and rank lookups
+are then index range scans on the stored ranks. Cached stats keep the
+ranks they were read with for up to LEADERBOARD_CACHE_TTL seconds.
+"""
+import threading
+import time
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+
+ORDERINGS = {'accuracy': 'accuracy_rank', 'volume': 'volume_rank'}
+STATS_KEY = 'user-stats:{}'
+
+_rerank_lock = threading.Lock()
+_last_rerank = 0.0
+
+
+def _display_name(user_id, first_name):
+    # usernames are email addresses, so they are never shown
+    return first_name or f'Player {user_id}'
+
+
+def _accuracy(predictions, correct):
+    return correct / predictions * 100 if predictions else 0.0
+
+
+def _stats(entry, favorite_team):
+    return {
+        'total_predictions': entry.predictions,
+        'correct_predictions': entry.correct,
+        'accuracy': entry.accuracy,
+        'favorite_team': favorite_team,
+        'accuracy_rank': entry.accuracy_rank,
+        'volume_rank': entry.volume_rank,
+    }
+
+
+def refresh_users(user_ids):
+    """Copy the profile counters of ``user_ids`` into the leaderboard and the stats cache."""
+    from .models import LeaderboardEntry, UserProfile
+
+    user_ids = list(user_ids)
+    chunk = max(1, (connection.features.max_query_params or 1000) - 1)
+    for start in range(0, len(user_ids), chunk):
+        rows = list(UserProfile.objects.filter(user_id__in=user_ids[start:start + chunk]).values_list(
+            'user_id', 'user__first_name', 'predictions_count', 'correct_predictions'))
+        entries = [
+            LeaderboardEntry(user_id=user_id, name=_display_name(user_id, first_name), predictions=total,
+                             correct=correct, accuracy=_accuracy(total, correct), dirty=True)
+            for user_id, first_name, total, correct in rows
+        ]
+        LeaderboardEntry.objects.bulk_create(
+            entries, update_conflicts=True, unique_fields=['user'],
+            update_fields=['name', 'predictions', 'correct', 'accuracy', 'dirty'],
+        )
+        cache.delete_many([STATS_KEY.format(r[0]) for r in rows])
+
+
+def rerank():
+    """Recompute every stored rank in one statement and clear the dirty flags."""
+    from .models import LeaderboardEntry
+
+    table = connection.ops.quote_name(LeaderboardEntry._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(f"""
+            UPDATE {table} SET accuracy_rank = ranked.a, volume_rank = ranked.v, dirty = %s
+            FROM (
+                SELECT user_id,
+                       CASE WHEN predictions >= %s THEN ROW_NUMBER() OVER (
+                           PARTITION BY predictions >= %s ORDER BY accuracy DESC, correct DESC, user_id
+                       ) END AS a,
+                       ROW_NUMBER() OVER (ORDER BY predictions DESC, correct DESC, user_id) AS v
+                FROM {table}
+            ) AS ranked
+            WHERE {table}.user_id = ranked.user_id
+        """, [False, settings.LEADERBOARD_MIN_PREDICTIONS, settings.LEADERBOARD_MIN_PREDICTIONS])
+
+
+def ensure_ranked():
+    """Rerank if any counters changed since the last rerank and one is due; returns True if it ran."""
+    global _last_rerank
+    from .models import LeaderboardEntry
+
+    if time.monotonic() - _last_rerank < settings.LEADERBOARD_RERANK_INTERVAL:
+        return False
+    with _rerank_lock:
+        if time.monotonic() - _last_rerank < settings.LEADERBOARD_RERANK_INTERVAL:
+            return False
+        if not LeaderboardEntry.objects.filter(dirty=True).exists():
+            return False
+        rerank()
+        _last_rerank = time.monotonic()
+    return True
+
+
+def top(by, start, limit):
+    """Leaderboard rows ranked ``start`` to ``start + limit - 1`` by 'accuracy' or 'volume'."""
+    from .models import LeaderboardEntry
+
+    field = ORDERINGS[by]
+    ensure_ranked()
+    return list(LeaderboardEntry.objects.filter(**{f'{field}__gte': start})
+                .order_by(field)
+                .values('user_id', 'name', 'predictions', 'correct', 'accuracy', 'accuracy_rank', 'volume_rank')[:limit])
+
+
+def user_stats(user):
+    """Stats for ``user`` from the cache, else from its profile and leaderboard row; None without a profile."""
+    from .models import LeaderboardEntry, UserProfile
+
+    key = STATS_KEY.format(user.pk)
+    stats = cache.get(key)
+    if stats is not None:
+        return stats
+    profile = UserProfile.objects.filter(user=user).values_list('favorite_team', 'predictions_count',
+                                                                'correct_predictions').first()
+    if profile is None:
+        return None
+    favorite_team, total, correct = profile
+    entry = LeaderboardEntry.objects.filter(user=user).first() or LeaderboardEntry(
+        user=user, predictions=total, correct=correct, accuracy=_accuracy(total, correct))
+    stats = _stats(entry, favorite_team)
+    cache.set(key, stats, settings.LEADERBOARD_CACHE_TTL)
+    return stats
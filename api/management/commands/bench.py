@@ -0,0 +1,50 @@
+import json
+from pathlib import Path
+from django.core.management.base import BaseCommand, CommandError
+
+from api.benchmarks import GROUPS, compare, run
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the inferencer, the HTTP endpoints and simulation; optionally compare with a baseline.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--group', action='append', choices=GROUPS, help='group to run (repeatable; defaults to all)')
+        parser.add_argument('--only', action='append', help='run only cases whose name starts with this (repeatable)')
+        parser.add_argument('--seconds', type=float, default=1.0, help='time budget per case')
+        parser.add_argument('--dataset', help='fixtures CSV for the simulation cases (defaults to the artifacts dataset)')
+        parser.add_argument('--output', help='write the results as JSON to this file')
+        parser.add_argument('--compare', metavar='BASELINE', help='results JSON to compare against')
+        parser.add_argument('--threshold', type=float, default=0.2,
+                            help='fractional p50 increase or throughput drop that counts as a regression')
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options['compare']:
+            try:
+                baseline = json.loads(Path(options['compare']).read_text())
+            except (OSError, ValueError) as e:
+                raise CommandError(f"cannot read baseline {options['compare']}: {e}")
+
+        def log(name, r):
+            extra = f"  {r['rows_per_sec']:>12.0f} rows/s" if 'rows_per_sec' in r else ''
+            self.stdout.write(f"{name:<36}{r['p50_ms']:>10.3f}{r['p95_ms']:>10.3f}{r['p99_ms']:>10.3f}"
+                              f"{r['ops_per_sec']:>12.1f}{extra}")
+
+        self.stdout.write(f"{'case':<36}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'ops/s':>12}")
+        results = run(groups=options['group'] or GROUPS, seconds=options['seconds'],
+                      dataset=options['dataset'], only=options['only'], log=log)
+        if options['output']:
+            Path(options['output']).write_text(json.dumps(results, indent=2))
+            self.stdout.write(f"Wrote {len(results['results'])} results to {options['output']}")
+
+        if baseline is None:
+            return
+        rows = compare(results, baseline, options['threshold'])
+        for row in rows:
+            mark = self.style.ERROR('REGRESSED') if row['regressed'] else 'ok'
+            self.stdout.write(f"{row['name']:<36}p50 {row['p50_change']:>+8.1%}  ops/s {row['ops_change']:>+8.1%}  {mark}")
+        regressed = [row['name'] for row in rows if row['regressed']]
+        if regressed:
+            raise CommandError(f"{len(regressed)} regressions against {options['compare']}: {', '.join(regressed)}")
+        self.stdout.write(self.style.SUCCESS(f'No regressions in {len(rows)} compared cases'))
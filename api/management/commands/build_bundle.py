@@ -0,0 +1,32 @@
+from pathlib import Path
+from django.core.management.base import BaseCommand, CommandError
+
+from api.bundle import BUNDLE_DIR, ArtifactBundle, source_digest, write_bundle
+from api.inference import SOURCE_FILES, SklearnInferencer
+
+
+class Command(BaseCommand):
+    help = 'Convert the artifacts (pickles, meta and dataset CSV) into a memory-mapped, pickle-free bundle.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--artifacts', help='artifacts directory (defaults to the one the API uses)')
+        parser.add_argument('--output', help=f'bundle directory (defaults to <artifacts>/{BUNDLE_DIR})')
+
+    def handle(self, *args, **options):
+        # compiles the pickles, or falls back to an exported compiled_engine.npz
+        inf = SklearnInferencer(options['artifacts'], use_engine=True)
+        engine = inf.engine
+        if engine is None or not (engine.has_classifier and engine.has_regressor):
+            raise CommandError(f'no compiled classifier and regressor could be built from {inf.base}')
+        if not inf.meta:
+            raise CommandError(f'model_meta.json is missing from {inf.base}')
+
+        output = Path(options['output']) if options['output'] else inf.base / BUNDLE_DIR
+        write_bundle(output, inf.meta, engine, inf.feature_store, source_digest(inf.base, SOURCE_FILES))
+        bundle = ArtifactBundle.open(output)
+        size = sum(p.stat().st_size for p in output.iterdir())
+        teams = len(bundle.feature_store.teams) if bundle.feature_store is not None else 0
+        self.stdout.write(self.style.SUCCESS(
+            f'Wrote {len(bundle.manifest["arrays"])} arrays ({size / 1024:.0f} KiB, '
+            f'{len(engine.tree_roots)} trees, form for {teams} teams) to {output}'
+        ))
@@ -0,0 +1,73 @@
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from api.models import DailyPredictionRollup, PredictionHistory
+
+TOTALS = {
+    'predictions': Count('id'),
+    'home_wins': Count('id', filter=Q(outcome='H')),
+    'draws': Count('id', filter=Q(outcome='D')),
+    'away_wins': Count('id', filter=Q(outcome='A')),
+    'correct': Count('id', filter=Q(correct=True)),
+    'with_probabilities': Count('prob_home'),
+    'prob_home_sum': Sum('prob_home'),
+    'prob_draw_sum': Sum('prob_draw'),
+    'prob_away_sum': Sum('prob_away'),
+    'goal_diff_sum': Sum('goal_diff'),
+    'home_goals_sum': Sum('home_goals'),
+    'away_goals_sum': Sum('away_goals'),
+}
+
+
+def compact_batch(cutoff, batch_size):
+    """Roll up and delete the oldest ``batch_size`` rows before ``cutoff``; returns rows removed.
+
+    Each batch is its own short transaction, so request threads writing
+    history only ever wait for one batch.
+    """
+    ids = list(PredictionHistory.objects.filter(timestamp__lt=cutoff)
+               .order_by('id').values_list('id', flat=True)[:batch_size])
+    if not ids:
+        return 0
+    # an id range rather than id__in keeps the query small at any batch size
+    batch = PredictionHistory.objects.filter(id__gte=ids[0], id__lte=ids[-1], timestamp__lt=cutoff)
+    with transaction.atomic():
+        days = batch.annotate(day=TruncDate('timestamp')).values('day').annotate(**TOTALS).order_by()
+        for totals in days:
+            day = totals.pop('day')
+            DailyPredictionRollup.objects.get_or_create(day=day)
+            DailyPredictionRollup.objects.filter(day=day).update(
+                **{name: F(name) + (value or 0) for name, value in totals.items()}
+            )
+        deleted, _ = batch.delete()
+    return deleted
+
+
+class Command(BaseCommand):
+    help = 'Roll prediction history older than the retention window into daily totals and delete it.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, help='rows to keep, in days (defaults to HISTORY_RETENTION_DAYS)')
+        parser.add_argument('--batch-size', type=int, help='rows per transaction (defaults to HISTORY_COMPACT_BATCH)')
+
+    def handle(self, *args, **options):
+        days = options['days'] if options['days'] is not None else settings.HISTORY_RETENTION_DAYS
+        batch_size = options['batch_size'] or settings.HISTORY_COMPACT_BATCH
+        if days < 0 or batch_size < 1:
+            raise CommandError('--days must be >= 0 and --batch-size >= 1')
+
+        cutoff = timezone.now() - timedelta(days=days)
+        removed = 0
+        while True:
+            n = compact_batch(cutoff, batch_size)
+            if not n:
+                break
+            removed += n
+        self.stdout.write(self.style.SUCCESS(
+            f'Compacted {removed} prediction history rows older than {cutoff:%Y-%m-%d %H:%M} into daily rollups'
+        ))
@@ -0,0 +1,29 @@
+from pathlib import Path
+from django.core.management.base import BaseCommand, CommandError
+
+from api.engine import ENGINE_FILE, UnsupportedModel, compile_models
+from api.inference import SklearnInferencer
+
+
+class Command(BaseCommand):
+    help = 'Export the sklearn models as plain NumPy arrays for the compiled inference engine.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--artifacts', help='artifacts directory (defaults to the one the API uses)')
+        parser.add_argument('--output', help=f'output file (defaults to <artifacts>/{ENGINE_FILE})')
+
+    def handle(self, *args, **options):
+        inf = SklearnInferencer(options['artifacts'], use_engine=False)
+        if inf.classifier is None or inf.regressor is None:
+            raise CommandError(f'classifier and regressor must both load from {inf.base}')
+        try:
+            engine = compile_models(inf.classifier, inf.regressor, inf.scaler)
+        except UnsupportedModel as e:
+            raise CommandError(str(e))
+
+        output = Path(options['output']) if options['output'] else inf.base / ENGINE_FILE
+        engine.save(output)
+        self.stdout.write(self.style.SUCCESS(
+            f'Exported {len(engine.tree_roots)} trees and a {engine.lr_coef.shape[0]}-class '
+            f'linear model to {output}'
+        ))
@@ -0,0 +1,40 @@
+from pathlib import Path
+from django.core.management.base import BaseCommand, CommandError
+
+from api.startup import by_package, import_times, measure_startup
+
+
+class Command(BaseCommand):
+    help = 'Show what a worker imports at boot and what it costs (python -X importtime).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=20, help='rows to show per table')
+        parser.add_argument('--lazy', action='store_true',
+                            help='boot with INFERENCE_EAGER_LOAD=False, as a worker that loads models on demand')
+        parser.add_argument('--output', help='write the raw -X importtime report here (e.g. for tuna)')
+
+    def handle(self, *args, **options):
+        env = {'INFERENCE_EAGER_LOAD': 'False'} if options['lazy'] else None
+        try:
+            rows, raw = import_times(env)
+            timing = measure_startup(env=env)
+        except RuntimeError as e:
+            raise CommandError(str(e))
+        top = options['top']
+
+        self.stdout.write(f"{'package':<32}{'self ms':>10}{'modules':>9}")
+        for pkg, us, count in by_package(rows)[:top]:
+            self.stdout.write(f'{pkg:<32}{us / 1000:>10.1f}{count:>9}')
+
+        self.stdout.write(f"\n{'module (cumulative)':<48}{'ms':>10}")
+        for name, _, cumulative_us, _ in sorted(rows, key=lambda r: -r[2])[:top]:
+            self.stdout.write(f'{name:<48}{cumulative_us / 1000:>10.1f}')
+
+        if options['output']:
+            Path(options['output']).write_text(raw + '\n')
+            self.stdout.write(f"\nWrote the raw report to {options['output']}")
+        heavy = ', '.join(timing['heavy_modules']) or 'none'
+        self.stdout.write(self.style.SUCCESS(
+            f"\nImports: {sum(r[1] for r in rows) / 1000:.1f} ms over {len(rows)} modules; "
+            f"boot {timing['startup_ms']:.1f} ms, first /api/health {timing['first_request_ms']:.1f} ms; "
+            f"heavy libraries loaded: {heavy}"))
@@ -0,0 +1,14 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api.profiling import make_token
+
+
+class Command(BaseCommand):
+    help = 'Print a token that, sent as the X-Profile header, profiles that request.'
+
+    def handle(self, *args, **options):
+        if not settings.PROFILING_ENABLED:
+            self.stderr.write('⚠️ PROFILING_ENABLED is off; the server will ignore this token')
+        self.stdout.write(make_token())
+        self.stderr.write(f'Valid for {settings.PROFILE_TOKEN_MAX_AGE}s; profiles are written to {settings.PROFILE_DIR}')
@@ -0,0 +1,24 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from api.reconcile import load_results, reconcile
+
+
+class Command(BaseCommand):
+    help = 'Mark pending prediction history right or wrong from a results CSV and update user accuracy.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--results', help='results CSV (defaults to RESULTS_CSV)')
+
+    def handle(self, *args, **options):
+        path = options['results'] or settings.RESULTS_CSV
+        try:
+            results = load_results(path)
+        except (OSError, ValueError) as e:
+            raise CommandError(f'cannot read results from {path}: {e}')
+
+        stats = reconcile(results)
+        self.stdout.write(self.style.SUCCESS(
+            f"Matched {stats['matched']} of {stats['pending']} pending predictions against "
+            f"{stats['results']} results: {stats['correct']} correct across {stats['users']} users"
+        ))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from api.leaderboard import refresh_users, rerank
+from api.models import UserProfile
+
+
+class Command(BaseCommand):
+    help = 'Rebuild every leaderboard row from the user profiles and recompute the ranks.'
+
+    def handle(self, *args, **options):
+        user_ids = list(UserProfile.objects.values_list('user_id', flat=True))
+        refresh_users(user_ids)
+        rerank()
+        self.stdout.write(self.style.SUCCESS(f'Ranked {len(user_ids)} users'))
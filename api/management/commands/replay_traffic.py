@@ -0,0 +1,56 @@
+import json
+from pathlib import Path
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from api.traffic import HttpTarget, InProcessTarget, load, replay, summarize
+
+
+class Command(BaseCommand):
+    help = 'Replay captured API traffic (JSONL) at a target concurrency and rate and report per-endpoint latency.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('file', help='JSONL file written by the capture middleware')
+        parser.add_argument('--target', default='inprocess',
+                            help="'inprocess' (the WSGI app in this process) or a base URL such as http://127.0.0.1:8000")
+        parser.add_argument('--concurrency', type=int, default=8, help='sending threads')
+        parser.add_argument('--rate', type=float, default=0.0, help='requests per second overall (0: unthrottled)')
+        parser.add_argument('--requests', type=int, help='requests to send, cycling the file (default: each once)')
+        parser.add_argument('--only', action='append', help='replay only paths starting with this (repeatable)')
+        parser.add_argument('--user', help='email of the account that replays logged-in requests')
+        parser.add_argument('--password', help='password for --user (needed with a URL target)')
+        parser.add_argument('--output', help='write the summary as JSON to this file')
+
+    def handle(self, *args, **options):
+        try:
+            records = load(options['file'])
+        except OSError as e:
+            raise CommandError(f"cannot read {options['file']}: {e}")
+        if options['only']:
+            records = [r for r in records if r['path'].startswith(tuple(options['only']))]
+        if not records:
+            raise CommandError('no requests to replay')
+
+        if options['target'] == 'inprocess':
+            user = None
+            if options['user']:
+                user = User.objects.filter(email=options['user']).first()
+                if user is None:
+                    raise CommandError(f"no user with email {options['user']}")
+            target = InProcessTarget(user)
+        else:
+            if options['user'] and not options['password']:
+                raise CommandError('--password is required with --user and a URL target')
+            target = HttpTarget(options['target'], options['user'], options['password'])
+
+        samples, wall = replay(records, target, concurrency=options['concurrency'], rate=options['rate'],
+                               total=options['requests'])
+        summary = summarize(samples, wall)
+
+        self.stdout.write(f"{'path':<32}{'reqs':>7}{'req/s':>9}{'4xx':>6}{'err%':>7}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+        for path, s in summary.items():
+            self.stdout.write(f"{path:<32}{s['requests']:>7}{s['per_sec']:>9.1f}{s['client_errors']:>6}"
+                              f"{s['error_rate'] * 100:>6.1f}%{s['p50_ms']:>9.2f}{s['p95_ms']:>9.2f}{s['p99_ms']:>9.2f}")
+        self.stdout.write(self.style.SUCCESS(f'{len(samples)} requests in {wall:.2f}s ({len(samples) / wall:.1f} req/s)'))
+        if options['output']:
+            Path(options['output']).write_text(json.dumps({'wall_seconds': round(wall, 3), 'endpoints': summary}, indent=2))
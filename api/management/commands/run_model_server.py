@@ -0,0 +1,32 @@
+import gc
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from api.inference import get_inferencer
+from api.modelserver import ModelServer
+
+
+class Command(BaseCommand):
+    help = 'Serve the models to every worker on this host over a Unix socket (see MODEL_SERVER_SOCKET).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--socket', help='socket path (defaults to MODEL_SERVER_SOCKET)')
+        parser.add_argument('--window-ms', type=float, help='batch window (defaults to MODEL_SERVER_WINDOW_MS)')
+        parser.add_argument('--max-batch', type=int, help='requests per batch (defaults to MODEL_SERVER_MAX_BATCH)')
+        parser.add_argument('--threads', type=int, default=4, help='inference threads')
+
+    def handle(self, *args, **options):
+        path = options['socket'] or settings.MODEL_SERVER_SOCKET
+        if not path:
+            raise CommandError('pass --socket or set MODEL_SERVER_SOCKET')
+        window_ms = options['window_ms'] if options['window_ms'] is not None else settings.MODEL_SERVER_WINDOW_MS
+        max_batch = options['max_batch'] or settings.MODEL_SERVER_MAX_BATCH
+
+        inf = get_inferencer(local=True)
+        gc.freeze()
+        server = ModelServer(path, window=window_ms / 1000.0, max_batch=max_batch, threads=options['threads'])
+        self.stdout.write(self.style.SUCCESS(f'Serving model version {inf.version} on {path}'))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
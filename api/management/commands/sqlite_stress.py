@@ -0,0 +1,32 @@
+import json
+from django.core.management.base import BaseCommand, CommandError
+
+from api.dbtuning import PROFILES, stress
+
+
+class Command(BaseCommand):
+    help = 'Compare SQLite write throughput and lock waits with and without the production profile.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=8, help='concurrent worker processes')
+        parser.add_argument('--seconds', type=float, default=5.0, help='run time per profile')
+        parser.add_argument('--write-ratio', type=float, default=0.5, help='share of transactions that insert')
+        parser.add_argument('--profile', action='append', choices=list(PROFILES),
+                            help='profile to run (repeatable; defaults to all)')
+        parser.add_argument('--json', action='store_true', help='print the results as JSON')
+
+    def handle(self, *args, **options):
+        if options['workers'] < 1 or options['seconds'] <= 0:
+            raise CommandError('--workers must be >= 1 and --seconds > 0')
+        results = [
+            stress(profile, workers=options['workers'], seconds=options['seconds'],
+                   write_ratio=options['write_ratio'])
+            for profile in options['profile'] or list(PROFILES)
+        ]
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        self.stdout.write(f"{'profile':<12}{'writes/s':>10}{'lock waits':>12}{'failed':>8}{'p50 ms':>10}{'p99 ms':>10}")
+        for r in results:
+            self.stdout.write(f"{r['profile']:<12}{r['writes_per_sec']:>10}{r['lock_waits']:>12}{r['failed']:>8}"
+                              f"{r['p50_ms']:>10}{r['p99_ms']:>10}")
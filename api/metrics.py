@@ -0,0 +1,145 @@
+"""Per-stage request timings: Server-Timing headers and Prometheus histograms.
+
+With METRICS_ENABLED, TimingMiddleware gives each request a list that
+``stage()`` blocks append (name, seconds) pairs to: DRF parsing, feature
+assembly, scaling, the classifier and regressor, history writes and
+rendering. The middleware reports them in a ``Server-Timing`` header and
+adds them to per-endpoint histograms served by /api/metrics in the
+Prometheus text format. Histograms are per process.
+
+When disabled the middleware is not installed, so no list is ever set
+and ``stage()`` returns a shared no-op context manager.
+"""
+from bisect import bisect_left
+from contextlib import nullcontext
+from contextvars import ContextVar
+from time import perf_counter
+import threading
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+# histogram bucket upper bounds, in seconds
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+_timings = ContextVar('stage_timings', default=None)
+_NOOP = nullcontext()
+
+
+class _Stage:
+    __slots__ = ('name', 'timings', 'started')
+
+    def __init__(self, name, timings):
+        self.name = name
+        self.timings = timings
+
+    def __enter__(self):
+        self.started = perf_counter()
+
+    def __exit__(self, *exc):
+        self.timings.append((self.name, perf_counter() - self.started))
+
+
+def stage(name):
+    """Context manager timing ``name`` for the current request, a no-op outside one."""
+    timings = _timings.get()
+    if timings is None:
+        return _NOOP
+    return _Stage(name, timings)
+
+
+class Histograms:
+    """Thread-safe cumulative histograms keyed by (endpoint, stage)."""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._series = {}
+
+    def observe(self, endpoint, timings):
+        with self._lock:
+            for name, seconds in timings:
+                series = self._series.get((endpoint, name))
+                if series is None:
+                    # per bucket counts, the last one is +Inf; then sum and count
+                    series = self._series[(endpoint, name)] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+                series[0][bisect_left(self.buckets, seconds)] += 1
+                series[1] += seconds
+                series[2] += 1
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+    def render(self, metric='scoresight_stage_seconds'):
+        """The histograms in the Prometheus text exposition format."""
+        lines = [f'# HELP {metric} Time spent in each stage of a request.', f'# TYPE {metric} histogram']
+        with self._lock:
+            series = sorted((key, [list(counts), total, n]) for key, (counts, total, n) in self._series.items())
+        for (endpoint, name), (counts, total, n) in series:
+            labels = f'endpoint="{endpoint}",stage="{name}"'
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), counts):
+                cumulative += count
+                lines.append(f'{metric}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'{metric}_sum{{{labels}}} {total:.6f}')
+            lines.append(f'{metric}_count{{{labels}}} {n}')
+        return '\n'.join(lines) + '\n'
+
+
+histograms = Histograms()
+
+
+def server_timing(timings):
+    """Server-Timing header value; repeated stages are summed, in first-seen order."""
+    totals = {}
+    for name, seconds in timings:
+        totals[name] = totals.get(name, 0.0) + seconds
+    return ', '.join(f'{name};dur={seconds * 1000:.3f}' for name, seconds in totals.items())
+
+
+class TimingMiddleware:
+    """Collect stage timings for each request (installed when METRICS_ENABLED)."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        timings, token, started = self._start()
+        try:
+            response = self.get_response(request)
+        finally:
+            _timings.reset(token)
+        return self._finish(request, response, timings, started)
+
+    async def __acall__(self, request):
+        timings, token, started = self._start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _timings.reset(token)
+        return self._finish(request, response, timings, started)
+
+    def _start(self):
+        timings = []
+        return timings, _timings.set(timings), perf_counter()
+
+    def _finish(self, request, response, timings, started):
+        timings.append(('total', perf_counter() - started))
+        match = getattr(request, 'resolver_match', None)
+        histograms.observe(match.url_name if match and match.url_name else 'unmatched', timings)
+        response['Server-Timing'] = server_timing(timings)
+        return response
+
+    def process_template_response(self, request, response):
+        # DRF responses render after the view returns; time that too
+        timings = _timings.get()
+        if timings is not None:
+            started = perf_counter()
+            response.add_post_render_callback(lambda r: timings.append(('render', perf_counter() - started)))
+        return response
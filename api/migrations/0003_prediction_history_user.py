@@ -0,0 +1,40 @@
+# Generated by Django 4.2.30 on 2026-10-16 21:19
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def link_existing_history(apps, schema_editor):
+    """Attribute unlinked rows when the owner is unambiguous.
+
+    History was only recorded for logged-in users but never stored who
+    they were, so rows can be attributed only when a single account
+    exists. Otherwise they are left with a null user.
+    """
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+    PredictionHistory = apps.get_model('api', 'PredictionHistory')
+    user_ids = list(User.objects.values_list('pk', flat=True)[:2])
+    if len(user_ids) == 1:
+        PredictionHistory.objects.filter(user__isnull=True).update(user_id=user_ids[0])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('api', '0002_prediction_timestamp_default'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='predictionhistory',
+            name='user',
+            field=models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='predictions', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='predictionhistory',
+            index=models.Index(fields=['user', 'timestamp', 'id'], name='history_user_time_idx'),
+        ),
+        migrations.RunPython(link_existing_history, migrations.RunPython.noop),
+    ]
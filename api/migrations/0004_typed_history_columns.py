@@ -0,0 +1,176 @@
+# Generated by Django 4.2.30 on 2026-10-16 21:24
+
+from datetime import date
+from django.db import migrations, models
+
+BATCH_SIZE = 2000
+
+OUTCOME_CODES = {'Home Win': 'H', 'Draw': 'D', 'Away Win': 'A', 'H': 'H', 'D': 'D', 'A': 'A'}
+
+
+def _number(value, cast):
+    try:
+        return None if value is None else cast(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _date(value):
+    try:
+        return date.fromisoformat(str(value)[:10]) if value else None
+    except ValueError:
+        return None
+
+
+def copy_json_to_columns(apps, schema_editor):
+    """Fill the typed columns from the JSON fields, BATCH_SIZE rows at a time."""
+    PredictionHistory = apps.get_model('api', 'PredictionHistory')
+    fields = ['home_team', 'away_team', 'match_date', 'outcome', 'prob_home', 'prob_draw', 'prob_away',
+              'home_goals', 'away_goals']
+    last_id = 0
+    while True:
+        rows = list(PredictionHistory.objects.filter(id__gt=last_id).order_by('id')[:BATCH_SIZE])
+        if not rows:
+            break
+        for row in rows:
+            inputs = row.input_data if isinstance(row.input_data, dict) else {}
+            probs = row.probabilities if isinstance(row.probabilities, dict) else {}
+            score = row.suggested_score if isinstance(row.suggested_score, dict) else {}
+            row.home_team = str(inputs.get('home_team') or '')[:100]
+            row.away_team = str(inputs.get('away_team') or '')[:100]
+            row.match_date = _date(inputs.get('match_date'))
+            row.outcome = OUTCOME_CODES.get(row.outcome, '')
+            row.prob_home = _number(probs.get('home_win'), float)
+            row.prob_draw = _number(probs.get('draw'), float)
+            row.prob_away = _number(probs.get('away_win'), float)
+            row.home_goals = _number(score.get('home'), int)
+            row.away_goals = _number(score.get('away'), int)
+        PredictionHistory.objects.bulk_update(rows, fields)
+        last_id = rows[-1].id
+
+
+def copy_columns_to_json(apps, schema_editor):
+    """Rebuild the JSON fields from the typed columns when migrating back.
+
+    Only what the typed columns kept comes back: the raw match stats
+    that input_data also held are gone.
+    """
+    PredictionHistory = apps.get_model('api', 'PredictionHistory')
+    fields = ['input_data', 'probabilities', 'suggested_score']
+    last_id = 0
+    while True:
+        rows = list(PredictionHistory.objects.filter(id__gt=last_id).order_by('id')[:BATCH_SIZE])
+        if not rows:
+            break
+        for row in rows:
+            row.input_data = {
+                'home_team': row.home_team,
+                'away_team': row.away_team,
+                'match_date': row.match_date.isoformat() if row.match_date else None,
+            }
+            row.probabilities = {'home_win': row.prob_home, 'draw': row.prob_draw, 'away_win': row.prob_away}
+            row.suggested_score = {'home': row.home_goals, 'away': row.away_goals}
+        PredictionHistory.objects.bulk_update(rows, fields)
+        last_id = rows[-1].id
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_prediction_history_user'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyPredictionRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(unique=True)),
+                ('predictions', models.IntegerField(default=0)),
+                ('home_wins', models.IntegerField(default=0)),
+                ('draws', models.IntegerField(default=0)),
+                ('away_wins', models.IntegerField(default=0)),
+                ('with_probabilities', models.IntegerField(default=0)),
+                ('prob_home_sum', models.FloatField(default=0.0)),
+                ('prob_draw_sum', models.FloatField(default=0.0)),
+                ('prob_away_sum', models.FloatField(default=0.0)),
+                ('goal_diff_sum', models.FloatField(default=0.0)),
+                ('home_goals_sum', models.IntegerField(default=0)),
+                ('away_goals_sum', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='predictionhistory',
+            name='home_team',
+            field=models.CharField(default='', max_length=100),
+        ),
+        migrations.AddField(
+            model_name='predictionhistory',
+            name='away_team',
+            field=models.CharField(default='', max_length=100),
+        ),
+        migrations.AddField(
+            model_name='predictionhistory',
+            name='match_date',
+            field=models.DateField(null=True),
+        ),
+        migrations.AddField(
+            model_name='predictionhistory',
+            name='prob_home',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AddField(
+            model_name='predictionhistory',
+            name='prob_draw',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AddField(
+            model_name='predictionhistory',
+            name='prob_away',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AddField(
+            model_name='predictionhistory',
+            name='home_goals',
+            field=models.SmallIntegerField(null=True),
+        ),
+        migrations.AddField(
+            model_name='predictionhistory',
+            name='away_goals',
+            field=models.SmallIntegerField(null=True),
+        ),
+        migrations.RunPython(copy_json_to_columns, copy_columns_to_json),
+        # a default lets migrating back re-add the JSON columns to a table that has rows
+        migrations.AlterField(
+            model_name='predictionhistory',
+            name='input_data',
+            field=models.JSONField(default=dict),
+        ),
+        migrations.AlterField(
+            model_name='predictionhistory',
+            name='probabilities',
+            field=models.JSONField(default=dict),
+        ),
+        migrations.AlterField(
+            model_name='predictionhistory',
+            name='suggested_score',
+            field=models.JSONField(default=dict),
+        ),
+        migrations.RemoveField(
+            model_name='predictionhistory',
+            name='input_data',
+        ),
+        migrations.RemoveField(
+            model_name='predictionhistory',
+            name='probabilities',
+        ),
+        migrations.RemoveField(
+            model_name='predictionhistory',
+            name='suggested_score',
+        ),
+        migrations.AlterField(
+            model_name='predictionhistory',
+            name='outcome',
+            field=models.CharField(choices=[('H', 'Home Win'), ('D', 'Draw'), ('A', 'Away Win')], max_length=1),
+        ),
+    ]
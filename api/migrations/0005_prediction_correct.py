@@ -0,0 +1,27 @@
+# Generated by Django 4.2.30 on 2026-10-16 22:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_typed_history_columns'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dailypredictionrollup',
+            name='correct',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='predictionhistory',
+            name='correct',
+            field=models.BooleanField(null=True),
+        ),
+        migrations.AddIndex(
+            model_name='predictionhistory',
+            index=models.Index(condition=models.Q(('correct__isnull', True)), fields=['match_date'], name='history_pending_idx'),
+        ),
+    ]
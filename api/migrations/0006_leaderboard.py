@@ -0,0 +1,45 @@
+# Generated by Django 4.2.30 on 2026-10-16 22:21
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_entries(apps, schema_editor):
+    """One dirty row per existing profile; the first leaderboard read ranks them."""
+    UserProfile = apps.get_model('api', 'UserProfile')
+    LeaderboardEntry = apps.get_model('api', 'LeaderboardEntry')
+    rows = UserProfile.objects.values_list('user_id', 'user__first_name', 'predictions_count', 'correct_predictions')
+    LeaderboardEntry.objects.bulk_create([
+        LeaderboardEntry(user_id=user_id, name=name or f'Player {user_id}', predictions=total, correct=correct,
+                         accuracy=correct / total * 100 if total else 0.0)
+        for user_id, name, total, correct in rows.iterator()
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('api', '0005_prediction_correct'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaderboardEntry',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='leaderboard', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('name', models.CharField(default='', max_length=150)),
+                ('predictions', models.IntegerField(default=0)),
+                ('correct', models.IntegerField(default=0)),
+                ('accuracy', models.FloatField(default=0.0)),
+                ('accuracy_rank', models.IntegerField(null=True)),
+                ('volume_rank', models.IntegerField(null=True)),
+                ('dirty', models.BooleanField(default=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['accuracy_rank'], name='leaderboard_accuracy_idx'), models.Index(fields=['volume_rank'], name='leaderboard_volume_idx'), models.Index(condition=models.Q(('dirty', True)), fields=['dirty'], name='leaderboard_dirty_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_entries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+from django.db import migrations
+
+# LoginView and SignupView look users up by email, which auth_user does not index
+INDEX = 'api_auth_user_email_idx'
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('api', '0006_leaderboard'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            f'CREATE INDEX IF NOT EXISTS {INDEX} ON auth_user (email)',
+            f'DROP INDEX IF EXISTS {INDEX}',
+        ),
+    ]
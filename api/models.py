@@ -1,5 +1,6 @@
 from django.db import models
 from django.contrib.auth.models import User
+from django.utils import timezone
 
 
 class UserProfile(models.Model):
@@ -19,12 +20,86 @@ class UserProfile(models.Model):
 
 
 class PredictionHistory(models.Model):
-    timestamp = models.DateTimeField(auto_now_add=True)
-    input_data = models.JSONField()
-    outcome = models.CharField(max_length=4)
-    probabilities = models.JSONField()
+    OUTCOMES = [('H', 'Home Win'), ('D', 'Draw'), ('A', 'Away Win')]
+
+    # null for rows recorded before predictions were linked to users; the
+    # (user, timestamp, id) index below also serves user lookups
+    user = models.ForeignKey(User, null=True, on_delete=models.CASCADE, related_name='predictions', db_index=False)
+    # set when the prediction is made; rows are written later in bulk (api/history.py)
+    timestamp = models.DateTimeField(default=timezone.now)
+    home_team = models.CharField(max_length=100, default='')
+    away_team = models.CharField(max_length=100, default='')
+    match_date = models.DateField(null=True)
+    outcome = models.CharField(max_length=1, choices=OUTCOMES)
+    prob_home = models.FloatField(null=True)
+    prob_draw = models.FloatField(null=True)
+    prob_away = models.FloatField(null=True)
     goal_diff = models.FloatField(null=True)
-    suggested_score = models.JSONField()
+    home_goals = models.SmallIntegerField(null=True)
+    away_goals = models.SmallIntegerField(null=True)
+    # null until manage.py reconcile_predictions finds the final result (api/reconcile.py)
+    correct = models.BooleanField(null=True)
+
+    class Meta:
+        indexes = [
+            # a user's history newest first, keyset-paginated on (timestamp, id)
+            models.Index(fields=['user', 'timestamp', 'id'], name='history_user_time_idx'),
+            # rows still waiting for a result, by match date
+            models.Index(fields=['match_date'], condition=models.Q(correct__isnull=True), name='history_pending_idx'),
+        ]
 
     def __str__(self):
         return f"Prediction {self.timestamp} - {self.outcome}"
+
+
+class DailyPredictionRollup(models.Model):
+    """Per-day totals of PredictionHistory rows pruned by ``manage.py compact_history``.
+
+    Means are the sums divided by ``predictions``; probability sums cover
+    only rows that had probabilities (``with_probabilities``).
+    """
+    day = models.DateField(unique=True)
+    predictions = models.IntegerField(default=0)
+    home_wins = models.IntegerField(default=0)
+    draws = models.IntegerField(default=0)
+    away_wins = models.IntegerField(default=0)
+    correct = models.IntegerField(default=0)
+    with_probabilities = models.IntegerField(default=0)
+    prob_home_sum = models.FloatField(default=0.0)
+    prob_draw_sum = models.FloatField(default=0.0)
+    prob_away_sum = models.FloatField(default=0.0)
+    goal_diff_sum = models.FloatField(default=0.0)
+    home_goals_sum = models.IntegerField(default=0)
+    away_goals_sum = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.day}: {self.predictions} predictions"
+
+
+class LeaderboardEntry(models.Model):
+    """Materialized leaderboard row per user, maintained by api/leaderboard.py.
+
+    Counters are copied from UserProfile whenever they change, which marks
+    the row ``dirty``; the next leaderboard read recomputes every rank in
+    one statement (at most every LEADERBOARD_RERANK_INTERVAL seconds), so
+    reads never sort. ``accuracy_rank`` is null until the user has
+    LEADERBOARD_MIN_PREDICTIONS.
+    """
+    user = models.OneToOneField(User, primary_key=True, on_delete=models.CASCADE, related_name='leaderboard')
+    name = models.CharField(max_length=150, default='')
+    predictions = models.IntegerField(default=0)
+    correct = models.IntegerField(default=0)
+    accuracy = models.FloatField(default=0.0)
+    accuracy_rank = models.IntegerField(null=True)
+    volume_rank = models.IntegerField(null=True)
+    dirty = models.BooleanField(default=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['accuracy_rank'], name='leaderboard_accuracy_idx'),
+            models.Index(fields=['volume_rank'], name='leaderboard_volume_idx'),
+            models.Index(fields=['dirty'], condition=models.Q(dirty=True), name='leaderboard_dirty_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name}: {self.correct}/{self.predictions}"
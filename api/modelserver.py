@@ -0,0 +1,424 @@
+"""Shared model server: one process owns the models, workers talk to it over a Unix socket.
+
+Every gunicorn worker normally unpickles its own copy of the artifacts.
+With MODEL_SERVER_SOCKET set, workers instead get a RemoteInferencer
+from get_inferencer() and forward predictions to a single server started
+with ``manage.py run_model_server``. The server batches requests arriving
+from all workers into one predict_arrays call.
+
+Wire format (little-endian). Every request is a ``<BI`` header (opcode,
+body length) followed by the body; every reply a ``<BI`` header (status,
+body length) followed by the body, which is a UTF-8 message when status
+is ERROR.
+
+  PREDICT  body:  <II n, names_len; n*14 float32 stats; n int32 days
+                  (DAY_NONE for none); names_len bytes of NUL-joined
+                  UTF-8 home then away team names
+           reply: <IBBB n, n_labels (0: no probabilities), has_goal_diff,
+                  version_len; version; n*n_labels float64 probabilities;
+                  n float64 goal diffs (if present); n int32 home goals;
+                  n int32 away goals
+  INFO     reply: JSON model metadata (version, teams, features, ...)
+  MATCHUPS reply: the matchup arrays as consecutive .npy records
+  RELOAD   body:  <B wait; reply: JSON model metadata after the reload
+"""
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import io
+import json
+import os
+import socket
+import struct
+import threading
+import time
+import numpy as np
+from .batching import MicroBatcher
+from .inference import BaseInferencer, STAT_KEYS, get_inferencer, reload_inferencer, _copy_result
+
+OP_PREDICT, OP_INFO, OP_MATCHUPS, OP_RELOAD = 1, 2, 3, 4
+OK, ERROR = 0, 1
+
+HEADER = struct.Struct('<BI')
+PREDICT_HEADER = struct.Struct('<II')
+REPLY_HEADER = struct.Struct('<IBBB')
+DAY_NONE = np.iinfo(np.int32).min
+
+# seconds a client trusts its cached INFO before asking again
+INFO_TTL = 5.0
+
+MATCHUP_ARRAYS = ('probs', 'goal_diff', 'home_goals', 'away_goals')
+
+
+class ModelServerError(RuntimeError):
+    """The model server is unreachable or reported an error."""
+
+
+def encode_predict_request(raw, home, away, days=None):
+    n = len(home)
+    names = '\0'.join('' if t is None else str(t) for t in list(home) + list(away)).encode()
+    days = np.array([DAY_NONE if d is None else d for d in (days if days is not None else [None] * n)],
+                    dtype='<i4')
+    return b''.join([
+        PREDICT_HEADER.pack(n, len(names)),
+        np.ascontiguousarray(raw, dtype='<f4').tobytes(),
+        days.tobytes(),
+        names,
+    ])
+
+
+def decode_predict_request(body):
+    n, names_len = PREDICT_HEADER.unpack_from(body)
+    offset = PREDICT_HEADER.size
+    raw = np.frombuffer(body, dtype='<f4', count=n * len(STAT_KEYS), offset=offset).reshape(n, len(STAT_KEYS))
+    offset += raw.nbytes
+    days = np.frombuffer(body, dtype='<i4', count=n, offset=offset)
+    offset += days.nbytes
+    names = [t or None for t in body[offset:offset + names_len].decode().split('\0')] if n else []
+    days = [None if d == DAY_NONE else int(d) for d in days.tolist()]
+    return raw.astype(np.float32), names[:n], names[n:], days
+
+
+def encode_predict_reply(version, out):
+    n = len(out['home_goals'])
+    probs, gd = out['probs'], out['goal_diff']
+    version = version.encode()
+    parts = [REPLY_HEADER.pack(n, 0 if probs is None else probs.shape[1], gd is not None, len(version)), version]
+    if probs is not None:
+        parts.append(np.ascontiguousarray(probs, dtype='<f8').tobytes())
+    if gd is not None:
+        parts.append(np.ascontiguousarray(gd, dtype='<f8').tobytes())
+    parts.append(np.asarray(out['home_goals'], dtype='<i4').tobytes())
+    parts.append(np.asarray(out['away_goals'], dtype='<i4').tobytes())
+    return b''.join(parts)
+
+
+def decode_predict_reply(body):
+    n, n_labels, has_gd, version_len = REPLY_HEADER.unpack_from(body)
+    offset = REPLY_HEADER.size
+    version = body[offset:offset + version_len].decode()
+    offset += version_len
+
+    def take(dtype, count):
+        nonlocal offset
+        arr = np.frombuffer(body, dtype=dtype, count=count, offset=offset)
+        offset += arr.nbytes
+        return arr
+
+    out = {'probs': None, 'goal_diff': None}
+    if n_labels:
+        out['probs'] = take('<f8', n * n_labels).reshape(n, n_labels).astype(float)
+    if has_gd:
+        out['goal_diff'] = take('<f8', n).astype(float)
+    out['home_goals'] = take('<i4', n).astype(int)
+    out['away_goals'] = take('<i4', n).astype(int)
+    return version, out
+
+
+def _info(inf):
+    return {
+        'version': inf.version,
+        'teams': inf.teams(),
+        'features': inf.features(),
+        'class_labels': inf.class_labels(),
+        'ready': inf.is_ready(),
+        'has_models': inf.has_models(),
+        'load_seconds': inf.load_seconds,
+        'loaded_at': inf.loaded_at,
+        'load_report': inf.load_report,
+        'feature_plan': inf.feature_plan(),
+        'unknown_features': inf.unknown_features,
+        'pid': os.getpid(),
+    }
+
+
+class ModelServer:
+    """asyncio Unix-socket server answering requests from RemoteInferencer clients.
+
+    PREDICT requests from every connection go through one MicroBatcher, so
+    requests that arrive within ``window`` seconds of each other are
+    evaluated with a single predict_arrays call on the current bundle.
+    """
+
+    def __init__(self, path, window=0.0, max_batch=64, threads=4):
+        self.path = str(path)
+        self.executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='model-server')
+        self.batcher = MicroBatcher(self._predict, window=window, max_batch=max_batch, executor=self.executor)
+        self.started = threading.Event()
+        self._loop = None
+        self._stopping = None
+
+    def serve_forever(self):
+        asyncio.run(self._serve())
+
+    def stop(self):
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._stopping.set)
+
+    async def _serve(self):
+        self._loop = asyncio.get_running_loop()
+        self._stopping = asyncio.Event()
+        if os.path.exists(self.path):
+            os.unlink(self.path)  # left behind by a previous run
+        server = await asyncio.start_unix_server(self._handle, path=self.path)
+        os.chmod(self.path, 0o660)
+        self.started.set()
+        try:
+            await self._stopping.wait()
+        finally:
+            server.close()
+            await server.wait_closed()
+            if os.path.exists(self.path):
+                os.unlink(self.path)
+            self.executor.shutdown(wait=False)
+
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                try:
+                    op, length = HEADER.unpack(await reader.readexactly(HEADER.size))
+                    body = await reader.readexactly(length)
+                except asyncio.IncompleteReadError:
+                    break
+                try:
+                    status, reply = OK, await self._dispatch(op, body)
+                except Exception as e:
+                    status, reply = ERROR, str(e).encode()
+                writer.write(HEADER.pack(status, len(reply)) + reply)
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _dispatch(self, op, body):
+        loop = asyncio.get_running_loop()
+        if op == OP_PREDICT:
+            version, out = await self.batcher.submit(decode_predict_request(body))
+            return encode_predict_reply(version, out)
+        if op == OP_INFO:
+            info = await loop.run_in_executor(self.executor, lambda: _info(get_inferencer(local=True)))
+            info['batching'] = self.batcher.stats.snapshot()
+            return json.dumps(info).encode()
+        if op == OP_MATCHUPS:
+            return await loop.run_in_executor(self.executor, self._matchups)
+        if op == OP_RELOAD:
+            wait = bool(body[0]) if body else False
+            await loop.run_in_executor(self.executor, lambda: reload_inferencer(wait=wait, local=True))
+            info = await loop.run_in_executor(self.executor, lambda: _info(get_inferencer(local=True)))
+            return json.dumps(info).encode()
+        raise ValueError(f'unknown opcode {op}')
+
+    @staticmethod
+    def _predict(requests):
+        """MicroBatcher handler: evaluate several PREDICT requests as one batch."""
+        inf = get_inferencer(local=True)
+        counts = [len(home) for _, home, _, _ in requests]
+        raw = np.concatenate([r[0] for r in requests])
+        home = [t for r in requests for t in r[1]]
+        away = [t for r in requests for t in r[2]]
+        days = [d for r in requests for d in r[3]]
+        out = inf.predict_arrays(raw, home, away, days)
+
+        results = []
+        start = 0
+        for n in counts:
+            part = {k: None if v is None else v[start:start + n] for k, v in out.items()}
+            results.append((inf.version, part))
+            start += n
+        return results
+
+    @staticmethod
+    def _matchups():
+        inf = get_inferencer(local=True)
+        buf = io.BytesIO()
+        version = inf.version.encode()
+        buf.write(struct.pack('<B', len(version)) + version)
+        if inf.matchups is not None:
+            for name in MATCHUP_ARRAYS:
+                arr = inf.matchups[name]
+                buf.write(struct.pack('<B', arr is not None))
+                if arr is not None:
+                    np.save(buf, arr, allow_pickle=False)
+        return buf.getvalue()
+
+
+class RemoteInferencer(BaseInferencer):
+    """Drop-in inferencer that forwards predictions to a ModelServer.
+
+    Offers the interface views use (predict_single/predict_batch/
+    predict_frame/predict_arrays, teams(), features(), class_labels(),
+    version, matchups, readiness). Model metadata is cached for INFO_TTL
+    seconds and refreshed as soon as a prediction reports a new version.
+    Each thread keeps its own connection, reopened after a fork.
+    """
+
+    def __init__(self, path, timeout=10.0):
+        self.path = str(path)
+        self.timeout = timeout
+        self._local = threading.local()
+        self._info_cache = None
+        self._info_at = 0.0
+        self._matchup_cache = (None, None, None)
+
+    # transport
+
+    def _connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.path)
+        except OSError as e:
+            sock.close()
+            raise ModelServerError(f'model server at {self.path} is unreachable: {e}') from e
+        self._local.sock = sock
+        self._local.pid = os.getpid()
+        return sock
+
+    def _socket(self):
+        sock = getattr(self._local, 'sock', None)
+        if sock is None or self._local.pid != os.getpid():
+            return self._connect(), True
+        return sock, False
+
+    def _request(self, op, body=b''):
+        sock, fresh = self._socket()
+        try:
+            status, reply = self._exchange(sock, op, body)
+        except OSError:
+            self._close()
+            if fresh:
+                raise ModelServerError(f'model server at {self.path} closed the connection')
+            # the server restarted since this connection was opened; retry once
+            status, reply = self._exchange(self._connect(), op, body)
+        if status != OK:
+            raise ModelServerError(reply.decode(errors='replace'))
+        return reply
+
+    def _exchange(self, sock, op, body):
+        sock.sendall(HEADER.pack(op, len(body)) + body)
+        status, length = HEADER.unpack(self._recv(sock, HEADER.size))
+        return status, self._recv(sock, length)
+
+    def _recv(self, sock, size):
+        buf = bytearray(size)
+        view = memoryview(buf)
+        while view:
+            got = sock.recv_into(view)
+            if not got:
+                raise ConnectionResetError('model server closed the connection')
+            view = view[got:]
+        return bytes(buf)
+
+    def _close(self):
+        sock = getattr(self._local, 'sock', None)
+        self._local.sock = None
+        if sock is not None:
+            sock.close()
+
+    # metadata
+
+    def _info(self, refresh=False):
+        if refresh or self._info_cache is None or time.monotonic() - self._info_at > INFO_TTL:
+            self._set_info(json.loads(self._request(OP_INFO)))
+        return self._info_cache
+
+    def _set_info(self, info):
+        self._info_cache = info
+        self._info_at = time.monotonic()
+
+    def _seen_version(self, version):
+        if self._info_cache is None or self._info_cache['version'] != version:
+            self._info(refresh=True)
+
+    @property
+    def version(self):
+        try:
+            return self._info()['version']
+        except ModelServerError:
+            return self._info_cache['version'] if self._info_cache else None
+
+    def teams(self):
+        return self._info()['teams']
+
+    def features(self):
+        return self._info()['features']
+
+    def class_labels(self):
+        return self._info()['class_labels']
+
+    def feature_plan(self):
+        return self._info()['feature_plan']
+
+    @property
+    def unknown_features(self):
+        return self._info()['unknown_features']
+
+    def is_ready(self):
+        try:
+            return self._info()['ready']
+        except ModelServerError:
+            return False
+
+    def has_models(self):
+        return self._info()['has_models']
+
+    @property
+    def load_seconds(self):
+        return self._info()['load_seconds']
+
+    @property
+    def loaded_at(self):
+        return self._info()['loaded_at']
+
+    @property
+    def load_report(self):
+        try:
+            return self._info()['load_report']
+        except ModelServerError as e:
+            return {'model_server': {'state': 'unreachable', 'error': str(e)}}
+
+    def reload(self, wait=False):
+        self._set_info(json.loads(self._request(OP_RELOAD, struct.pack('<B', bool(wait)))))
+
+    # predictions
+
+    def predict_arrays(self, raw, home, away, days=None):
+        """Same contract as SklearnInferencer.predict_arrays(), evaluated by the server."""
+        reply = self._request(OP_PREDICT, encode_predict_request(raw, home, away, days))
+        version, out = decode_predict_reply(reply)
+        self._seen_version(version)
+        return out
+
+    @property
+    def matchups(self):
+        version = self.version
+        cached_version, arrays, rows = self._matchup_cache
+        if cached_version == version and arrays is not None:
+            return arrays
+
+        buf = io.BytesIO(self._request(OP_MATCHUPS))
+        (version_len,) = struct.unpack('<B', buf.read(1))
+        version = buf.read(version_len).decode()
+        arrays = None
+        if buf.tell() < len(buf.getbuffer()):
+            arrays = {}
+            for name in MATCHUP_ARRAYS:
+                (present,) = struct.unpack('<B', buf.read(1))
+                arrays[name] = np.load(buf, allow_pickle=False) if present else None
+        self._matchup_cache = (version, arrays, {})
+        return arrays
+
+    def matchup(self, home_team, away_team):
+        """Team-only prediction for a fixture from the server's matchup matrix, or None."""
+        m = self.matchups
+        if m is None:
+            return None
+        index = {t: i for i, t in enumerate(self.teams())}
+        i, j = index.get(home_team), index.get(away_team)
+        if i is None or j is None or i == j:
+            return None
+        rows = self._matchup_cache[2]
+        if (i, j) not in rows:
+            out = {k: None if v is None else v[i, j][None] for k, v in m.items()}
+            rows[(i, j)] = self._rows(out)[0]
+        return _copy_result(rows[(i, j)])
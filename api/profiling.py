@@ -0,0 +1,157 @@
+"""Profile single requests on demand.
+
+ProfilingMiddleware (installed when PROFILING_ENABLED) runs a request
+under a profiler when it carries an ``X-Profile`` header holding either
+a token from ``manage.py profile_token`` or, for a logged-in staff user,
+``1``. ``X-Profile-Mode`` picks the profiler:
+
+- ``cprofile`` (default): deterministic cProfile, saved as ``<id>.prof``
+  (pstats; open with snakeviz, gprof2dot or ``python -m pstats``)
+- ``sample``: a thread sampling the request's stack every
+  PROFILE_SAMPLE_INTERVAL seconds, saved as ``<id>.folded`` collapsed
+  stacks for flamegraph.pl or speedscope
+
+Files go to PROFILE_DIR, which keeps the newest PROFILE_KEEP of them, and
+the response names the profile in ``X-Profile-Id``. One request per
+process is profiled at a time; others arriving meanwhile run normally
+and get ``X-Profile-Id: busy``. Without PROFILING_ENABLED the middleware
+is not installed and requests pay nothing.
+"""
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+import cProfile
+import os
+import re
+import sys
+import threading
+import uuid
+from django.core import signing
+
+PROFILE_HEADER = 'HTTP_X_PROFILE'
+MODE_HEADER = 'HTTP_X_PROFILE_MODE'
+ID_HEADER = 'X-Profile-Id'
+TOKEN_SALT = 'api.profiling'
+SUFFIXES = {'cprofile': '.prof', 'sample': '.folded'}
+
+_busy = threading.Lock()
+
+
+def make_token():
+    """A signed token that enables profiling until PROFILE_TOKEN_MAX_AGE runs out."""
+    return signing.TimestampSigner(salt=TOKEN_SALT).sign('profile')
+
+
+def _valid_token(value, max_age):
+    try:
+        return signing.TimestampSigner(salt=TOKEN_SALT).unsign(value, max_age=max_age) == 'profile'
+    except signing.BadSignature:
+        return False
+
+
+class StackSampler(threading.Thread):
+    """Counts the collapsed stacks of one thread, sampled every ``interval`` seconds."""
+
+    def __init__(self, thread_id, interval):
+        super().__init__(name='profile-sampler', daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._done = threading.Event()
+
+    def run(self):
+        while not self._done.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f'{getattr(code, "co_qualname", code.co_name)} '
+                             f'({os.path.basename(code.co_filename)}:{code.co_firstlineno})')
+                frame = frame.f_back
+            if names:
+                self.stacks[';'.join(reversed(names))] += 1
+
+    def stop(self):
+        self._done.set()
+        self.join()
+
+    def folded(self):
+        return ''.join(f'{stack} {count}\n' for stack, count in self.stacks.most_common())
+
+
+class ProfilingMiddleware:
+    """Run requests that ask for it under a profiler (installed when PROFILING_ENABLED)."""
+
+    def __init__(self, get_response):
+        from django.conf import settings
+
+        self.get_response = get_response
+        self.directory = Path(settings.PROFILE_DIR)
+        self.keep = settings.PROFILE_KEEP
+        self.max_age = settings.PROFILE_TOKEN_MAX_AGE
+        self.interval = settings.PROFILE_SAMPLE_INTERVAL
+
+    def __call__(self, request):
+        value = request.META.get(PROFILE_HEADER)
+        if not value or not self._allowed(request, value):
+            return self.get_response(request)
+        mode = request.META.get(MODE_HEADER, 'cprofile').lower()
+        if mode not in SUFFIXES:
+            mode = 'cprofile'
+        if not _busy.acquire(blocking=False):
+            response = self.get_response(request)
+            response[ID_HEADER] = 'busy'
+            return response
+        try:
+            response, data = self._profile(request, mode)
+            profile_id = self._save(request, mode, data)
+        finally:
+            _busy.release()
+        response[ID_HEADER] = profile_id
+        return response
+
+    def _allowed(self, request, value):
+        if value == '1':
+            user = getattr(request, 'user', None)
+            return bool(user is not None and user.is_authenticated and user.is_staff)
+        return _valid_token(value, self.max_age)
+
+    def _profile(self, request, mode):
+        if mode == 'sample':
+            sampler = StackSampler(threading.get_ident(), self.interval)
+            sampler.start()
+            try:
+                response = self.get_response(request)
+            finally:
+                sampler.stop()
+            return response, sampler.folded()
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            response = self.get_response(request)
+        finally:
+            profiler.disable()
+        return response, profiler
+
+    def _save(self, request, mode, data):
+        """Write the profile and prune old ones; returns its id."""
+        stamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S')
+        slug = re.sub(r'[^A-Za-z0-9]+', '_', request.path).strip('_')[:40] or 'root'
+        profile_id = f'{stamp}-{slug}-{uuid.uuid4().hex[:8]}'
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.directory / (profile_id + SUFFIXES[mode])
+        if mode == 'sample':
+            path.write_text(data)
+        else:
+            data.dump_stats(str(path))
+        self._prune()
+        return profile_id
+
+    def _prune(self):
+        files = sorted((p for p in self.directory.iterdir() if p.suffix in SUFFIXES.values()),
+                       key=lambda p: p.stat().st_mtime_ns)
+        for old in files[:max(len(files) - self.keep, 0)]:
+            try:
+                old.unlink()
+            except OSError:
+                pass
@@ -0,0 +1,118 @@
+"""Mark prediction history right or wrong once final results are known.
+
+Results come from a CSV in the ``cleaned_merged_dataset.csv`` layout
+(Date, HomeTeam, AwayTeam, FTR). Pending history rows (``correct`` is
+null) are matched to results on (home team, away team, match date) with
+one pandas merge; matched rows get ``correct`` set with chunked
+``UPDATE ... WHERE id IN`` statements and every user's
+``correct_predictions`` goes up by their number of hits, one ``F()``
+update per distinct increment. Rows already reconciled are never looked
+at again, so reruns do not double-count. Pending rows are locked while a
+run works on them, and a run that finds some of them already marked by a
+concurrent one rolls back and starts over from the rows still pending.
+"""
+from collections import defaultdict
+from django.db import connection, transaction
+from django.db.models import F
+import numpy as np
+import pandas as pd
+
+from .leaderboard import refresh_users
+
+RESULT_COLUMNS = ('Date', 'HomeTeam', 'AwayTeam', 'FTR')
+KEY = ['home_team', 'away_team', 'match_date']
+
+# attempts before giving up on a run that keeps racing another
+MAX_ATTEMPTS = 3
+
+
+class _Conflict(Exception):
+    """Some pending rows were reconciled by a concurrent run."""
+
+
+def load_results(source):
+    """Read final results from a CSV path or file; one row per (home, away, date)."""
+    df = pd.read_csv(source, usecols=lambda c: c in RESULT_COLUMNS)
+    missing = [c for c in RESULT_COLUMNS if c not in df.columns]
+    if missing:
+        raise ValueError(f"results CSV is missing columns: {', '.join(missing)}")
+    df = df.dropna(subset=list(RESULT_COLUMNS))
+    df = df[df['FTR'].isin(['H', 'D', 'A'])]
+    results = pd.DataFrame({
+        'home_team': df['HomeTeam'].astype(str),
+        'away_team': df['AwayTeam'].astype(str),
+        'match_date': pd.to_datetime(df['Date'], errors='coerce').dt.date,
+        'result': df['FTR'].astype(str),
+    }).dropna(subset=['match_date'])
+    return results.drop_duplicates(subset=KEY, keep='last')
+
+
+def _pending_frame(results):
+    from .models import PredictionHistory
+
+    # locks the rows where the backend supports it (SQLite serialises writers instead)
+    rows = (PredictionHistory.objects.select_for_update()
+            .filter(correct__isnull=True, match_date__gte=results['match_date'].min(),
+                    match_date__lte=results['match_date'].max())
+            .values_list('id', 'user_id', *KEY, 'outcome'))
+    return pd.DataFrame.from_records(rows.iterator(chunk_size=5000), columns=['id', 'user_id', *KEY, 'outcome'])
+
+
+def _mark(ids, correct, chunk):
+    """Set ``correct`` on the still-pending rows among ``ids``; raises _Conflict if any were not."""
+    from .models import PredictionHistory
+
+    updated = 0
+    for start in range(0, len(ids), chunk):
+        updated += PredictionHistory.objects.filter(
+            id__in=ids[start:start + chunk], correct__isnull=True).update(correct=correct)
+    if updated != len(ids):
+        raise _Conflict()
+
+
+def reconcile(results):
+    """Apply ``results`` (from load_results) to pending history; returns counts of what changed."""
+    stats = {'results': len(results), 'pending': 0, 'matched': 0, 'correct': 0, 'users': 0}
+    if results.empty:
+        return stats
+    for attempt in range(MAX_ATTEMPTS):
+        try:
+            return _reconcile(results, stats)
+        except _Conflict:
+            if attempt == MAX_ATTEMPTS - 1:
+                raise RuntimeError('pending history kept changing under reconcile; try again')
+
+
+def _reconcile(results, stats):
+    from .models import UserProfile
+
+    with transaction.atomic():
+        pending = _pending_frame(results)
+        stats['pending'] = len(pending)
+        if pending.empty:
+            return stats
+        matched = pending.merge(results, on=KEY, how='inner')
+        if matched.empty:
+            return stats
+        hit = (matched['outcome'] == matched['result']).to_numpy()
+        ids = matched['id'].to_numpy()
+
+        # stay under the backend's bound on query parameters
+        chunk = max(1, (connection.features.max_query_params or 1000) - 1)
+        _mark(ids[hit].tolist(), True, chunk)
+        _mark(ids[~hit].tolist(), False, chunk)
+
+        # one UPDATE per distinct increment rather than one per user
+        users = matched.loc[hit & matched['user_id'].notna().to_numpy(), 'user_id'].astype(np.int64)
+        by_amount = defaultdict(list)
+        for user_id, n in users.value_counts().items():
+            by_amount[int(n)].append(int(user_id))
+        for n, user_ids in by_amount.items():
+            for start in range(0, len(user_ids), chunk):
+                UserProfile.objects.filter(user_id__in=user_ids[start:start + chunk]).update(
+                    correct_predictions=F('correct_predictions') + n
+                )
+
+    refresh_users([user_id for user_ids in by_amount.values() for user_id in user_ids])
+    stats.update(matched=len(matched), correct=int(hit.sum()), users=sum(map(len, by_amount.values())))
+    return stats
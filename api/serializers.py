@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
+from .models import PredictionHistory
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -24,6 +25,7 @@ class HealthSerializer(serializers.Serializer):
     status = serializers.CharField()
     model = serializers.CharField()
     version = serializers.CharField()
+    model_version = serializers.CharField(allow_null=True)
 
 
 class TeamListSerializer(serializers.Serializer):
@@ -60,3 +62,25 @@ class PredictResponseSerializer(serializers.Serializer):
     probabilities = ProbabilitySerializer(many=True)
     goal_diff = serializers.FloatField()
     suggested_score = serializers.DictField()
+
+
+class PredictionHistorySerializer(serializers.ModelSerializer):
+    """History rows in the shape predict_v2 answered with, rebuilt from the typed columns."""
+    input_data = serializers.SerializerMethodField()
+    outcome = serializers.CharField(source='get_outcome_display')
+    probabilities = serializers.SerializerMethodField()
+    suggested_score = serializers.SerializerMethodField()
+
+    class Meta:
+        model = PredictionHistory
+        fields = ('id', 'timestamp', 'input_data', 'outcome', 'probabilities', 'goal_diff', 'suggested_score')
+
+    def get_input_data(self, row):
+        match_date = row.match_date.isoformat() if row.match_date else None
+        return {'home_team': row.home_team, 'away_team': row.away_team, 'match_date': match_date}
+
+    def get_probabilities(self, row):
+        return {'home_win': row.prob_home, 'draw': row.prob_draw, 'away_win': row.prob_away}
+
+    def get_suggested_score(self, row):
+        return {'home': row.home_goals, 'away': row.away_goals}
@@ -0,0 +1,157 @@
+"""Season simulation helpers built on batched inferencer output."""
+from concurrent.futures import ProcessPoolExecutor
+import atexit
+import numpy as np
+import pandas as pd
+
+# points for (home, away) indexed by sampled outcome: 0=H, 1=D, 2=A
+_HOME_POINTS = np.array([3, 1, 0], dtype=np.int32)
+_AWAY_POINTS = np.array([0, 1, 3], dtype=np.int32)
+
+TOP_SPOTS = 4
+RELEGATION_SPOTS = 3
+
+_pool = None
+_pool_workers = 0
+
+
+def standings(home, away, home_goals, away_goals):
+    """Compute a league table from per-fixture scorelines.
+
+    All inputs are equal-length arrays, one entry per fixture. Teams are
+    listed in order of first appearance, then sorted by points and goal
+    difference (ties keep that order). Returns a list of row dicts.
+    """
+    # interleave home/away so team codes follow first-appearance order
+    codes, teams = pd.factorize(np.column_stack([home, away]).ravel())
+    codes = codes.reshape(-1, 2)
+    hc, ac = codes[:, 0], codes[:, 1]
+    n = len(teams)
+
+    hg = np.asarray(home_goals, dtype=np.int64)
+    ag = np.asarray(away_goals, dtype=np.int64)
+    home_win = hg > ag
+    draw = hg == ag
+    away_win = hg < ag
+
+    def tally(home_vals, away_vals):
+        return (np.bincount(hc, weights=home_vals, minlength=n)
+                + np.bincount(ac, weights=away_vals, minlength=n)).astype(np.int64)
+
+    played = tally(np.ones_like(hg), np.ones_like(ag))
+    wins = tally(home_win, away_win)
+    draws = tally(draw, draw)
+    losses = tally(away_win, home_win)
+    gf = tally(hg, ag)
+    ga = tally(ag, hg)
+    points = 3 * wins + draws
+
+    order = np.lexsort((np.arange(n), -(gf - ga), -points))
+    return [
+        {'team': teams[i], 'played': int(played[i]), 'wins': int(wins[i]), 'draws': int(draws[i]),
+         'losses': int(losses[i]), 'points': int(points[i]), 'gf': int(gf[i]), 'ga': int(ga[i])}
+        for i in order
+    ]
+
+
+def _get_pool(workers):
+    """Return a process pool with ``workers`` processes, reused across calls."""
+    global _pool, _pool_workers
+    if _pool is None or _pool_workers != workers:
+        if _pool is not None:
+            _pool.shutdown(wait=False)
+        _pool = ProcessPoolExecutor(max_workers=workers)
+        _pool_workers = workers
+    return _pool
+
+
+@atexit.register
+def _shutdown_pool():
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _simulate_chunk(cum_probs, home_codes, away_codes, n_teams, sims, seed):
+    """Simulate ``sims`` seasons and return (position_counts, points_sum).
+
+    ``cum_probs`` is (fixtures, 2): cumulative P(H) and P(H)+P(D).
+    ``position_counts[t, k]`` counts seasons where team t finished k-th.
+    """
+    rng = np.random.default_rng(seed)
+    n_fix = len(home_codes)
+
+    u = rng.random((sims, n_fix))
+    outcome = (u >= cum_probs[:, 0]).astype(np.int8) + (u >= cum_probs[:, 1])
+
+    # scatter-add points into a flat (sims * n_teams) table
+    base = (np.arange(sims) * n_teams)[:, None]
+    points = np.bincount((base + home_codes).ravel(), weights=_HOME_POINTS[outcome].ravel(),
+                         minlength=sims * n_teams)
+    points += np.bincount((base + away_codes).ravel(), weights=_AWAY_POINTS[outcome].ravel(),
+                          minlength=sims * n_teams)
+    points = points.reshape(sims, n_teams)
+
+    # rank by points; sub-point jitter breaks ties at random
+    order = np.argsort(-(points + rng.random((sims, n_teams)) * 0.5), axis=1)
+    position_counts = np.bincount((order * n_teams + np.arange(n_teams)).ravel(),
+                                  minlength=n_teams * n_teams).reshape(n_teams, n_teams)
+    return position_counts, points.sum(axis=0)
+
+
+def monte_carlo(probs, home_codes, away_codes, n_teams, sims, seed=None, workers=1, chunk_size=5000):
+    """Run a Monte Carlo season simulation from per-fixture H/D/A probabilities.
+
+    ``probs`` is (fixtures, 3) in H, D, A order and ``home_codes``/``away_codes``
+    are team indices in ``range(n_teams)``. Seasons are simulated in chunks
+    of ``chunk_size``; with ``workers > 1`` the chunks run on a process pool.
+    Each chunk gets its own child seed, so results for a given ``seed`` do
+    not depend on ``workers``.
+
+    Returns ``(position_counts, expected_points)`` where ``position_counts``
+    is an (n_teams, n_teams) integer array of finishing positions.
+    """
+    probs = np.asarray(probs, dtype=float)
+    probs = probs / probs.sum(axis=1, keepdims=True)
+    cum_probs = np.cumsum(probs[:, :2], axis=1)
+    home_codes = np.asarray(home_codes, dtype=np.int64)
+    away_codes = np.asarray(away_codes, dtype=np.int64)
+
+    sizes = [chunk_size] * (sims // chunk_size)
+    if sims % chunk_size:
+        sizes.append(sims % chunk_size)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    args = [(cum_probs, home_codes, away_codes, n_teams, size, s) for size, s in zip(sizes, seeds)]
+
+    if workers > 1 and len(args) > 1:
+        pool = _get_pool(workers)
+        results = list(pool.map(_simulate_chunk, *zip(*args)))
+    else:
+        results = [_simulate_chunk(*a) for a in args]
+
+    position_counts = sum(r[0] for r in results)
+    expected_points = sum(r[1] for r in results) / sims
+    return position_counts, expected_points
+
+
+def season_odds(teams, position_counts, expected_points):
+    """Summarise Monte Carlo finishing positions per team.
+
+    Returns rows sorted by expected points with title, top-4 and relegation
+    (bottom 3) probabilities and the full position distribution.
+    """
+    sims = int(position_counts[0].sum()) if len(teams) else 0
+    dist = position_counts / max(sims, 1)
+    n = len(teams)
+    rows = [
+        {
+            'team': team,
+            'expected_points': round(float(expected_points[i]), 2),
+            'title': round(float(dist[i, 0]), 4),
+            'top4': round(float(dist[i, :TOP_SPOTS].sum()), 4),
+            'relegation': round(float(dist[i, max(n - RELEGATION_SPOTS, 0):].sum()), 4),
+            'positions': [round(float(p), 4) for p in dist[i]],
+        }
+        for i, team in enumerate(teams)
+    ]
+    rows.sort(key=lambda r: r['expected_points'], reverse=True)
+    return rows
@@ -0,0 +1,97 @@
+"""What a worker pays to boot: import-time breakdowns and startup timing.
+
+Both helpers run a fresh interpreter that does what a WSGI worker does
+before serving: import WSGI_APPLICATION (settings, apps, middleware and,
+with INFERENCE_EAGER_LOAD, the models) and the URLconf.
+
+``import_times`` runs it under ``python -X importtime`` and parses the
+report; ``manage.py import_report`` prints it. ``measure_startup`` also
+sends one request through the WSGI app and reports both times and which
+heavy libraries ended up imported; the startup budget test holds it to
+STARTUP_BUDGET_MS and FIRST_REQUEST_BUDGET_MS.
+"""
+from pathlib import Path
+import json
+import os
+import subprocess
+import sys
+
+# libraries each worker should only import on the paths that need them
+HEAVY_MODULES = ('pandas', 'sklearn', 'scipy', 'joblib')
+
+_RESULT = 'STARTUP-RESULT '
+
+_BOOT = '''
+import sys, time
+started = time.perf_counter()
+from importlib import import_module
+from django.conf import settings
+module, name = settings.WSGI_APPLICATION.rsplit('.', 1)
+app = getattr(import_module(module), name)
+import_module(settings.ROOT_URLCONF)
+booted = time.perf_counter()
+'''
+
+_REQUEST = '''
+import json
+from wsgiref.util import setup_testing_defaults
+environ = {'PATH_INFO': sys.argv[1], 'HTTP_HOST': 'localhost'}
+setup_testing_defaults(environ)
+status = []
+b''.join(app(environ, lambda s, headers, exc_info=None: status.append(s)))
+done = time.perf_counter()
+print(%r + json.dumps({
+    'startup_ms': round((booted - started) * 1000, 3),
+    'first_request_ms': round((done - booted) * 1000, 3),
+    'status': int(status[0].split()[0]),
+    'heavy_modules': [m for m in %r if m in sys.modules],
+}))
+''' % (_RESULT, HEAVY_MODULES)
+
+
+def _run(args, env=None):
+    base = Path(__file__).resolve().parent.parent
+    child_env = {**os.environ, 'DJANGO_SETTINGS_MODULE': os.environ.get(
+        'DJANGO_SETTINGS_MODULE', 'scoresight_backend.settings'), **(env or {})}
+    proc = subprocess.run([sys.executable, *args], cwd=base, env=child_env,
+                          capture_output=True, text=True, timeout=300)
+    if proc.returncode != 0:
+        raise RuntimeError(f'worker boot failed:\n{proc.stderr[-2000:]}')
+    return proc
+
+
+def import_times(env=None):
+    """Parse ``-X importtime`` for a worker boot into ``(module, self_us, cumulative_us, depth)`` rows,
+    plus the raw report (which tools like tuna read)."""
+    proc = _run(['-X', 'importtime', '-c', _BOOT], env)
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+        stripped = name.lstrip()
+        rows.append((stripped, int(self_us), int(cumulative_us), (len(name) - len(stripped) - 1) // 2))
+    raw = '\n'.join(line for line in proc.stderr.splitlines() if line.startswith('import time:'))
+    return rows, raw
+
+
+def by_package(rows):
+    """Self time summed per top-level package, largest first, as ``(package, us, modules)``."""
+    totals = {}
+    for name, self_us, _, _ in rows:
+        us, count = totals.get(name.split('.')[0], (0, 0))
+        totals[name.split('.')[0]] = (us + self_us, count + 1)
+    return sorted(((pkg, us, count) for pkg, (us, count) in totals.items()), key=lambda r: -r[1])
+
+
+def measure_startup(path='/api/health', env=None):
+    """Boot a worker in a fresh interpreter and send it one GET ``path``.
+
+    Returns ``startup_ms``, ``first_request_ms``, the response ``status``
+    and ``heavy_modules``, the HEAVY_MODULES imported by then.
+    """
+    proc = _run(['-c', _BOOT + _REQUEST, path], env)
+    for line in reversed(proc.stdout.splitlines()):
+        if line.startswith(_RESULT):
+            return json.loads(line[len(_RESULT):])
+    raise RuntimeError(f'no result from worker boot:\n{proc.stdout[-2000:]}')
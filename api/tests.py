@@ -1,6 +1,50 @@
-from django.test import TestCase
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta, timezone
+from io import StringIO
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+import asyncio
+import io
+import json
+import os
+import pstats
+import shutil
+import sqlite3
+import tempfile
+import threading
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.test import AsyncClient, RequestFactory, TestCase, modify_settings, override_settings
 from django.urls import reverse
+from django.utils.functional import SimpleLazyObject
 from rest_framework.test import APIClient
+import numpy as np
+import pandas as pd
+from api import inference, reconcile, simulation
+from api.auth import get_user_cache
+from api.batching import MicroBatcher
+from api.benchmarks import compare, run
+from api.bundle import BUNDLE_DIR
+from api.cache import PredictionCache
+from api.dbtuning import configure_connection, stress
+from api.engine import ENGINE_FILE, compile_models
+from api.features import FORM_COLUMNS, SIDECAR_NAME, FeatureStore, to_day
+from api.history import HistoryBuffer
+from api.inference import STAT_KEYS, SklearnInferencer, get_inferencer
+from api.leaderboard import refresh_users
+from api.metrics import histograms, stage
+from api.models import DailyPredictionRollup, LeaderboardEntry, PredictionHistory, UserProfile
+from api.modelserver import ModelServer, ModelServerError, RemoteInferencer
+from api.profiling import make_token
+from api.simulation import monte_carlo, season_odds
+from api.startup import by_package, import_times, measure_startup
+from api.traffic import CaptureMiddleware, InProcessTarget, load, replay, summarize
 
 
 class ApiSmokeTests(TestCase):
@@ -15,3 +59,1031 @@ class ApiSmokeTests(TestCase):
     def test_predict_missing(self):
         resp = self.client.post('/api/predict_v2', data={})
         self.assertEqual(resp.status_code, 400)
+
+
+class PredictBatchTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_batch_matches_single(self):
+        matches = [
+            {'home_team': 'Arsenal', 'away_team': 'Chelsea'},
+            {'home_team': 'Liverpool', 'away_team': 'Everton', 'HS': 14, 'AS': 6},
+        ]
+        resp = self.client.post('/api/predict_batch', data={'matches': matches}, format='json')
+        self.assertEqual(resp.status_code, 200)
+        body = resp.json()
+        self.assertEqual(body['count'], 2)
+        for match, pred in zip(matches, body['predictions']):
+            single = self.client.post('/api/predict_v2', data=match, format='json')
+            self.assertEqual(pred, single.json())
+
+    def test_batch_requires_teams(self):
+        resp = self.client.post('/api/predict_batch', data={'matches': [{'home_team': 'Arsenal'}]}, format='json')
+        self.assertEqual(resp.status_code, 400)
+
+
+class SimulateTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_simulate_standings(self):
+        fixtures = [('Arsenal', 'Chelsea'), ('Chelsea', 'Liverpool'), ('Liverpool', 'Arsenal'), ('Everton', 'Arsenal')]
+        csv = 'Date,HomeTeam,AwayTeam\n' + ''.join(f'01/01/2020,{h},{a}\n' for h, a in fixtures)
+        upload = SimpleUploadedFile('fixtures.csv', csv.encode(), content_type='text/csv')
+        resp = self.client.post('/api/simulate', data={'file': upload}, format='multipart')
+        self.assertEqual(resp.status_code, 200)
+        table = {row['team']: row for row in resp.json()['standings']}
+
+        # reference: per-fixture predictions tallied by hand
+        inf = get_inferencer()
+        expected = {}
+        for h, a in fixtures:
+            score = inf.predict_single({'HomeTeam': h, 'AwayTeam': a, 'match_date': '2020-01-01'})['suggested_score']
+            for team, gf, ga in ((h, score['home'], score['away']), (a, score['away'], score['home'])):
+                row = expected.setdefault(team, {'played': 0, 'points': 0, 'gf': 0, 'ga': 0})
+                row['played'] += 1
+                row['gf'] += gf
+                row['ga'] += ga
+                row['points'] += 3 if gf > ga else (1 if gf == ga else 0)
+        for team, row in expected.items():
+            for key, value in row.items():
+                self.assertEqual(table[team][key], value)
+        points = [row['points'] for row in resp.json()['standings']]
+        self.assertEqual(points, sorted(points, reverse=True))
+
+    def test_simulate_uses_fixture_dates(self):
+        inf = get_inferencer()
+        dated = inf.predict_single({'HomeTeam': 'Liverpool', 'AwayTeam': 'Man City', 'match_date': '2012-05-01'})
+        latest = inf.predict_single({'HomeTeam': 'Liverpool', 'AwayTeam': 'Man City'})
+        self.assertNotEqual(dated['suggested_score'], latest['suggested_score'])
+
+        # day-first, as in football-data CSVs: 1 May 2012
+        upload = SimpleUploadedFile('fixtures.csv', b'Date,HomeTeam,AwayTeam\n01/05/2012,Liverpool,Man City\n',
+                                    content_type='text/csv')
+        resp = self.client.post('/api/simulate', data={'file': upload}, format='multipart')
+        self.assertEqual(resp.status_code, 200)
+        table = {row['team']: row for row in resp.json()['standings']}
+        self.assertEqual((table['Liverpool']['gf'], table['Liverpool']['ga']),
+                         (dated['suggested_score']['home'], dated['suggested_score']['away']))
+
+    def test_simulate_requires_team_columns(self):
+        upload = SimpleUploadedFile('fixtures.csv', b'Date,Foo\n01/01/2020,1\n', content_type='text/csv')
+        resp = self.client.post('/api/simulate', data={'file': upload}, format='multipart')
+        self.assertEqual(resp.status_code, 400)
+
+
+class MonteCarloTests(TestCase):
+    def test_certain_outcomes(self):
+        # team 0 wins both its fixtures, team 1 draws team 2
+        probs = np.array([[1.0, 0.0, 0.0], [0.0, 1.0, 0.0], [0.0, 0.0, 1.0]])
+        home = np.array([0, 1, 2])
+        away = np.array([1, 2, 0])
+        counts, expected = monte_carlo(probs, home, away, 3, sims=1000, seed=1, chunk_size=300)
+        self.assertEqual(counts.sum(axis=1).tolist(), [1000, 1000, 1000])
+        self.assertEqual(counts[0, 0], 1000)
+        self.assertEqual(expected.tolist(), [6.0, 1.0, 1.0])
+        rows = season_odds(['A', 'B', 'C'], counts, expected)
+        self.assertEqual(rows[0]['team'], 'A')
+        self.assertEqual(rows[0]['title'], 1.0)
+
+    def test_seed_independent_of_workers(self):
+        rng = np.random.default_rng(0)
+        probs = rng.dirichlet([1, 1, 1], size=20)
+        home = rng.integers(0, 6, 20)
+        away = (home + 1) % 6
+        inline = monte_carlo(probs, home, away, 6, sims=2000, seed=7, chunk_size=500)
+        pooled = monte_carlo(probs, home, away, 6, sims=2000, seed=7, workers=2, chunk_size=500)
+        self.assertTrue(np.array_equal(inline[0], pooled[0]))
+
+    def test_endpoint(self):
+        csv = 'HomeTeam,AwayTeam\nArsenal,Chelsea\nChelsea,Arsenal\nLiverpool,Arsenal\n'
+        upload = SimpleUploadedFile('fixtures.csv', csv.encode(), content_type='text/csv')
+        resp = APIClient().post('/api/simulate/monte_carlo', data={'file': upload, 'sims': 500, 'seed': 3},
+                                format='multipart')
+        self.assertEqual(resp.status_code, 200)
+        body = resp.json()
+        self.assertEqual(body['sims'], 500)
+        self.assertEqual({r['team'] for r in body['teams']}, {'Arsenal', 'Chelsea', 'Liverpool'})
+        self.assertAlmostEqual(sum(r['title'] for r in body['teams']), 1.0, places=3)
+
+    def test_endpoint_samples_home_wins_from_p_home(self):
+        expected = {p['label']: p['prob'] for p in
+                    get_inferencer().predict_single({'HomeTeam': 'Man City', 'AwayTeam': 'Cardiff'})['probabilities']}
+        self.assertGreater(expected['H'], expected['A'])
+
+        upload = SimpleUploadedFile('fixtures.csv', b'HomeTeam,AwayTeam\nMan City,Cardiff\n', content_type='text/csv')
+        with mock.patch.object(simulation, 'monte_carlo', wraps=simulation.monte_carlo) as mc:
+            resp = APIClient().post('/api/simulate/monte_carlo', data={'file': upload, 'sims': 200, 'seed': 1},
+                                    format='multipart')
+        self.assertEqual(resp.status_code, 200)
+        # columns handed to the sampler are H, D, A
+        h, d, a = mc.call_args.args[0][0]
+        self.assertGreater(h, a)
+        self.assertAlmostEqual(h, expected['H'], places=4)
+        self.assertAlmostEqual(a, expected['A'], places=4)
+
+
+class FeatureStoreTests(TestCase):
+    CSV = (
+        'Date,HomeTeam,AwayTeam,FTHG,FTAG,HS,AS,HST,AST,HF,AF,HC,AC,HY,AY,HR,AR\n'
+        '2020-01-01,Arsenal,Chelsea,2,0,10,4,5,1,8,9,6,2,1,2,0,0\n'
+        '2020-01-08,Chelsea,Arsenal,1,1,7,12,3,6,10,7,4,5,0,1,0,1\n'
+        '2020-01-15,Arsenal,Everton,4,1,20,8,9,2,5,6,9,3,0,3,0,0\n'
+    )
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.csv = Path(self.tmp.name) / 'cleaned_merged_dataset.csv'
+        self.csv.write_text(self.CSV)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_lookup_uses_matches_before_date(self):
+        store = FeatureStore.load(self.csv)
+        goals3 = FORM_COLUMNS.index('goals_last3_mean')
+        shots5 = FORM_COLUMNS.index('shots_last5_mean')
+        self.assertEqual(store.lookup('Arsenal', to_day('2020-01-01'))[goals3], 0.0)
+        self.assertEqual(store.lookup('Arsenal', to_day('2020-01-15'))[goals3], 1.5)
+        self.assertAlmostEqual(float(store.lookup('Arsenal')[shots5]), 14.0, places=5)
+        self.assertEqual(store.lookup('Chelsea')[goals3], 0.5)
+        self.assertIsNone(store.lookup('Wigan'))
+
+    def test_sidecar_reused_until_csv_changes(self):
+        FeatureStore.load(self.csv)
+        sidecar = self.csv.with_name(SIDECAR_NAME)
+        self.assertTrue(sidecar.exists())
+        with mock.patch.object(FeatureStore, 'from_csv') as from_csv:
+            FeatureStore.load(self.csv)
+            from_csv.assert_not_called()
+        self.csv.write_text(self.CSV + '2020-01-22,Everton,Chelsea,0,0,5,5,1,1,9,9,2,2,1,1,0,0\n')
+        self.assertIn('Everton', FeatureStore.load(self.csv).teams)
+
+    def test_team_only_prediction_uses_form(self):
+        inf = get_inferencer()
+        vec = inf._build_vector({'HomeTeam': 'Arsenal', 'AwayTeam': 'Chelsea'})
+        self.assertTrue(vec.any())
+        stats = inf._build_vector({'HomeTeam': 'Arsenal', 'AwayTeam': 'Chelsea', 'HS': 10})
+        self.assertEqual(float(stats[0, inf.features().index('H_shots_last3_mean')]), 10.0)
+
+
+class FeaturePlanTests(TestCase):
+    def test_plan_covers_all_features(self):
+        resp = APIClient().get('/api/debug_input')
+        body = resp.json()
+        self.assertEqual(body['unknown_features'], [])
+        plan = {row['feature']: row for row in body['plan']}
+        self.assertEqual(plan['H_shots_last3_mean']['stat'], 'HS')
+        self.assertEqual(plan['A_goals_last5_mean']['stat'], 'HTAG')
+        self.assertEqual(plan['A_goals_last5_mean']['form'], 'away:goals_last5_mean')
+
+    def test_unknown_features_reported_at_load(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            meta = {'features': ['H_shots_last3_mean', 'H_xg_last3_mean'], 'teams': ['Arsenal']}
+            (Path(tmp) / 'model_meta.json').write_text(json.dumps(meta))
+            inf = SklearnInferencer(tmp)
+        self.assertEqual(inf.unknown_features, ['H_xg_last3_mean'])
+        vec = inf._build_vector({'HomeTeam': 'Arsenal', 'AwayTeam': 'Arsenal', 'HS': 7})
+        self.assertEqual(vec.tolist(), [[7.0, 0.0]])
+
+
+class PredictionCacheTests(TestCase):
+    def test_lru_eviction_and_ttl(self):
+        now = [0.0]
+        cache = PredictionCache(maxsize=2, ttl=10, clock=lambda: now[0])
+        cache.get_or_compute('v1', 'a', lambda: 1)
+        cache.get_or_compute('v1', 'b', lambda: 2)
+        cache.get_or_compute('v1', 'a', lambda: 0)  # hit, refreshes 'a'
+        cache.get_or_compute('v1', 'c', lambda: 3)  # evicts 'b'
+        self.assertEqual(cache.get_or_compute('v1', 'b', lambda: 20), 20)
+        now[0] = 11
+        self.assertEqual(cache.get_or_compute('v1', 'c', lambda: 30), 30)
+        stats = cache.stats()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 5))
+        self.assertEqual(stats['evictions'], 2)
+        self.assertEqual(stats['expirations'], 1)
+
+    def test_version_change_invalidates(self):
+        cache = PredictionCache()
+        cache.get_or_compute('v1', 'a', lambda: 1)
+        cache.advance('v2')
+        self.assertEqual(cache.get_or_compute('v2', 'a', lambda: 2), 2)
+        self.assertEqual(cache.stats()['invalidations'], 1)
+
+    def test_mixed_versions_during_reload(self):
+        cache = PredictionCache()
+        cache.get_or_compute('v1', 'a', lambda: 'old')
+        cache.advance('v2')
+        self.assertEqual(cache.get_or_compute('v2', 'a', lambda: 'new'), 'new')
+        # requests still on the old model alternate with new ones
+        for _ in range(3):
+            self.assertEqual(cache.get_or_compute('v1', 'a', lambda: 'old'), 'old')
+            self.assertEqual(cache.get_or_compute('v2', 'a', lambda: 'recomputed'), 'new')
+        stats = cache.stats()
+        self.assertEqual(stats['version'], 'v2')
+        self.assertEqual((stats['hits'], stats['misses'], stats['bypassed']), (3, 2, 3))
+        self.assertEqual(stats['invalidations'], 1)
+
+    def test_concurrent_misses_coalesce(self):
+        cache = PredictionCache()
+        calls = []
+        release = threading.Event()
+
+        def compute():
+            calls.append(1)
+            release.wait(5)
+            return 'value'
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(cache.get_or_compute('v', 'k', compute)))
+                   for _ in range(8)]
+        for t in threads:
+            t.start()
+        while cache.stats()['coalesced'] < 7:
+            pass
+        release.set()
+        for t in threads:
+            t.join()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, ['value'] * 8)
+
+    def test_new_version_or_clear_does_not_join_older_computation(self):
+        cache = PredictionCache()
+        started, release = threading.Event(), threading.Event()
+
+        def old_model():
+            started.set()
+            release.wait(5)
+            return 'old'
+
+        leader = threading.Thread(target=cache.get_or_compute, args=('v1', 'k', old_model))
+        leader.start()
+        started.wait(5)
+        cache.advance('v2')
+        self.assertEqual(cache.get_or_compute('v2', 'k', lambda: 'new'), 'new')
+        cache.clear()
+        self.assertEqual(cache.get_or_compute('v2', 'k', lambda: 'recomputed'), 'recomputed')
+        release.set()
+        leader.join()
+        self.assertEqual(cache.stats()['coalesced'], 0)
+        # the older computation was not stored over the fresh result
+        self.assertEqual(cache.get_or_compute('v2', 'k', lambda: 'again'), 'recomputed')
+
+    def test_stats_endpoint_requires_admin(self):
+        client = APIClient()
+        self.assertEqual(client.get('/api/cache/stats').status_code, 403)
+        client.force_authenticate(User.objects.create_user('ops', is_staff=True))
+        resp = client.get('/api/cache/stats')
+        self.assertEqual(resp.status_code, 200)
+        self.assertIn('enabled', resp.json())
+
+    def test_cached_prediction_matches_uncached(self):
+        inf = get_inferencer()
+        payload = {'HomeTeam': 'Arsenal', 'AwayTeam': 'Chelsea', 'HS': 9}
+        expected = inf.predict_batch([payload])[0]
+        cache = PredictionCache()
+        with mock.patch.object(inf, 'cache', cache):
+            first = inf.predict_single(payload)
+            first['probabilities'][0]['prob'] = -1
+            self.assertEqual(inf.predict_single(payload), expected)
+        self.assertEqual(cache.stats()['hits'], 1)
+
+
+class MatchupTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_team_only_prediction_served_from_matrix(self):
+        inf = get_inferencer()
+        payload = {'HomeTeam': 'Arsenal', 'AwayTeam': 'Chelsea'}
+        expected = inf.predict_batch([payload])[0]
+        with mock.patch.object(inf, '_predict_matrix', side_effect=AssertionError('model called')):
+            self.assertEqual(inf.predict_single(payload), expected)
+            self.assertEqual(inf.predict_single(dict(payload, match_date='2030-01-01')), expected)
+
+    def test_matchups_endpoint(self):
+        body = self.client.get('/api/matchups').json()
+        n = len(body['teams'])
+        self.assertEqual(len(body['probabilities']), n)
+        self.assertIsNone(body['probabilities'][0][0])
+        self.assertEqual(len(body['probabilities'][0][1]), 3)
+
+        row = self.client.get('/api/matchups', {'team': 'Arsenal'}).json()
+        self.assertEqual(len(row['home']), n - 1)
+        single = self.client.post('/api/predict_v2', data={'home_team': 'Arsenal', 'away_team': 'Chelsea'},
+                                  format='json').json()
+        chelsea = next(r for r in row['home'] if r['opponent'] == 'Chelsea')
+        self.assertEqual({k: v for k, v in chelsea.items() if k != 'opponent'}, single)
+
+        self.assertEqual(self.client.get('/api/matchups', {'team': 'Nowhere FC'}).status_code, 404)
+
+
+class ReadyTests(TestCase):
+    def test_ready_reports_artifacts(self):
+        get_inferencer()  # what the server entry points do at boot
+        resp = APIClient().get('/api/ready')
+        self.assertEqual(resp.status_code, 200)
+        body = resp.json()
+        self.assertTrue(body['ready'])
+        artifacts = body['artifacts']
+        if artifacts.get('bundle', {}).get('state') == 'loaded':
+            # served from a local artifacts/bundle (manage.py build_bundle)
+            self.assertEqual(artifacts['engine']['state'], 'bundle')
+        else:
+            self.assertEqual(artifacts['classifier']['state'], 'loaded')
+            self.assertIn('seconds', artifacts['regressor'])
+
+    def test_not_ready_before_load(self):
+        with mock.patch('api.views.peek_inferencer', return_value=None):
+            resp = APIClient().get('/api/ready')
+        self.assertEqual(resp.status_code, 503)
+
+
+class HotReloadTests(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.meta_path = Path(self.tmp.name) / 'model_meta.json'
+        self.meta_path.write_text(json.dumps({'features': ['H_shots_last3_mean'], 'teams': ['Arsenal']}))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _bump_meta(self, teams):
+        self.meta_path.write_text(json.dumps({'features': ['H_shots_last3_mean'], 'teams': teams}))
+        st = self.meta_path.stat()
+        os.utime(self.meta_path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+
+    def test_reload_swaps_bundle(self):
+        cache = PredictionCache()
+        old = inference.SklearnInferencer(self.tmp.name, cache=cache)
+        with mock.patch.object(inference, '_inferencer', old), \
+                mock.patch.object(inference, '_prediction_cache', cache):
+            self._bump_meta(['Arsenal', 'Chelsea'])
+            inference.reload_inferencer(wait=True)
+            new = inference.peek_inferencer()
+            self.assertIsNot(new, old)
+            self.assertNotEqual(new.version, old.version)
+            self.assertEqual(cache.stats()['version'], new.version)
+            self.assertEqual(new.teams(), ['Arsenal', 'Chelsea'])
+            # a request holding the old bundle still sees the old artifacts
+            self.assertEqual(old.teams(), ['Arsenal'])
+
+    def test_artifact_change_triggers_background_reload(self):
+        old = inference.SklearnInferencer(self.tmp.name)
+        with mock.patch.object(inference, '_inferencer', old), \
+                mock.patch.object(inference, '_prediction_cache', PredictionCache()), \
+                mock.patch.object(inference, '_last_version_check', 0.0), \
+                override_settings(MODEL_RELOAD_CHECK_INTERVAL=0.001):
+            self.assertIs(inference.get_inferencer(), old)
+            self._bump_meta(['Liverpool'])
+            inference._last_version_check = 0.0
+            inference.get_inferencer()
+            inference._reload_thread.join()
+            self.assertEqual(inference.peek_inferencer().teams(), ['Liverpool'])
+
+    def test_reload_endpoint_requires_admin(self):
+        client = APIClient()
+        self.assertEqual(client.post('/api/admin/reload').status_code, 403)
+        client.force_authenticate(User.objects.create_superuser('admin', 'a@example.com', 'pw'))
+        with mock.patch('api.views.reload_inferencer') as reload:
+            resp = client.post('/api/admin/reload', data={'wait': 'true'}, format='json')
+        self.assertEqual(resp.status_code, 200)
+        reload.assert_called_once_with(wait=True)
+
+    def test_version_reported(self):
+        version = get_inferencer().version
+        client = APIClient()
+        self.assertEqual(client.get('/api/health').json()['model_version'], version)
+        resp = client.post('/api/predict_v2', data={'home_team': 'Arsenal', 'away_team': 'Chelsea'}, format='json')
+        self.assertEqual(resp['X-Model-Version'], version)
+
+
+class CompiledEngineTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        # the pickled estimators, even when the process serves a bundle
+        cls.inf = SklearnInferencer()
+        df = pd.read_csv(cls.inf.base / 'cleaned_merged_dataset.csv').dropna(subset=['HomeTeam', 'AwayTeam'])
+        raw = df[list(STAT_KEYS)].fillna(0).to_numpy(dtype=np.float32)
+        home, away = df['HomeTeam'].tolist(), df['AwayTeam'].tolist()
+        # dataset rows with their match stats, and the same fixtures team-only
+        cls.X = np.vstack([cls.inf._assemble(raw, home, away), cls.inf._assemble(np.zeros_like(raw), home, away)])
+
+    def test_parity_with_sklearn(self):
+        inf = self.inf
+        engine = compile_models(inf.classifier, inf.regressor, inf.scaler)
+        Xs = inf.scaler.transform(self.X)
+        Xe = engine.scale(self.X)
+        np.testing.assert_array_equal(Xe, Xs)
+        np.testing.assert_allclose(engine.predict_proba(Xe), inf.classifier.predict_proba(Xs), rtol=0, atol=1e-12)
+        np.testing.assert_allclose(engine.predict_goal_diff(Xe), inf.regressor.predict(Xs), rtol=0, atol=1e-12)
+        self.assertEqual(engine.classes.tolist(), inf.classifier.classes_.tolist())
+
+    def test_probabilities_labelled_in_classifier_order(self):
+        inf = self.inf
+        self.assertEqual(inf.class_labels(), [str(c) for c in inf.classifier.classes_])
+        payload = {'HomeTeam': 'Man City', 'AwayTeam': 'Cardiff'}
+        X = inf.scaler.transform(inf._build_vector(payload))
+        expected = dict(zip(inf.classifier.classes_, inf.classifier.predict_proba(X)[0]))
+        res = inf.predict_single(payload)
+        for p in res['probabilities']:
+            self.assertAlmostEqual(p['prob'], expected[p['label']], places=4)
+        self.assertEqual(res['outcome'], max(expected, key=expected.get))
+
+    def test_exported_engine_serves_without_pickles(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            shutil.copy(self.inf.base / 'model_meta.json', tmp)
+            call_command('export_engine', output=str(Path(tmp) / ENGINE_FILE), stdout=io.StringIO())
+            standalone = SklearnInferencer(tmp)
+        self.assertIsNone(standalone.classifier)
+        self.assertTrue(standalone.is_ready())
+        payload = {'HomeTeam': 'Arsenal', 'AwayTeam': 'Chelsea', 'HS': 11, 'AS': 4, 'HST': 5}
+        self.assertEqual(standalone.predict_single(payload), self.inf.predict_single(payload))
+
+
+class MicroBatchTests(TestCase):
+    def test_concurrent_submits_share_a_batch(self):
+        calls = []
+
+        def handler(payloads):
+            calls.append(len(payloads))
+            return [p * 2 for p in payloads]
+
+        async def run():
+            batcher = MicroBatcher(handler, window=0.01, max_batch=8)
+            return await asyncio.gather(*(batcher.submit(i) for i in range(20))), batcher
+
+        results, batcher = asyncio.run(run())
+        self.assertEqual(results, [i * 2 for i in range(20)])
+        self.assertEqual(calls, [8, 8, 4])
+        stats = batcher.stats.snapshot()
+        self.assertEqual((stats['requests'], stats['batches']), (20, 3))
+        self.assertIn('p99', stats['latency_ms'])
+
+    def test_bad_payload_only_fails_itself(self):
+        def handler(payloads):
+            return [1 / p for p in payloads]
+
+        async def run():
+            batcher = MicroBatcher(handler, window=0.001)
+            return await asyncio.gather(*(batcher.submit(p) for p in (1, 0, 4)), return_exceptions=True)
+
+        ok, failed, quarter = asyncio.run(run())
+        self.assertEqual((ok, quarter), (1.0, 0.25))
+        self.assertIsInstance(failed, ZeroDivisionError)
+
+    async def test_async_endpoint_matches_sync(self):
+        matches = [
+            {'home_team': 'Arsenal', 'away_team': 'Chelsea'},
+            {'home_team': 'Liverpool', 'away_team': 'Everton', 'HS': 14, 'AS': 6},
+        ]
+        client = AsyncClient()
+        responses = await asyncio.gather(*(
+            client.post('/api/predict_v2_async', data=m, content_type='application/json') for m in matches
+        ))
+        for match, resp in zip(matches, responses):
+            self.assertEqual(resp.status_code, 200)
+            self.assertIn('X-Model-Version', resp)
+            single = await sync_to_async(APIClient().post)('/api/predict_v2', data=match, format='json')
+            self.assertEqual(resp.json(), single.json())
+
+        resp = await client.post('/api/predict_v2_async', data={'home_team': 'Arsenal'},
+                                 content_type='application/json')
+        self.assertEqual(resp.status_code, 400)
+        self.assertEqual((await client.get('/api/predict_v2_async/stats')).status_code, 403)
+        staff = await sync_to_async(User.objects.create_user)('ops', is_staff=True)
+        await sync_to_async(client.force_login)(staff)
+        stats = (await client.get('/api/predict_v2_async/stats')).json()
+        self.assertGreaterEqual(stats['requests'], 2)
+
+
+class ModelServerTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.local = get_inferencer()
+        cls.tmp = tempfile.TemporaryDirectory()
+        cls.path = str(Path(cls.tmp.name) / 'models.sock')
+        cls.server = ModelServer(cls.path, window=0.001)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.server.started.wait(5)
+        cls.remote = RemoteInferencer(cls.path, timeout=5)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.remote._close()
+        cls.server.stop()
+        cls.tmp.cleanup()
+        super().tearDownClass()
+
+    def test_remote_matches_local(self):
+        payloads = [
+            {'HomeTeam': 'Arsenal', 'AwayTeam': 'Chelsea'},
+            {'HomeTeam': 'Liverpool', 'AwayTeam': 'Everton', 'HS': 14, 'AS': 6, 'HTHG': 1},
+            {'HomeTeam': 'Arsenal', 'AwayTeam': 'Chelsea', 'match_date': '2015-03-01'},
+            {'HomeTeam': 'Nowhere FC', 'AwayTeam': 'Chelsea'},
+        ]
+        self.assertEqual(self.remote.predict_batch(payloads), self.local.predict_batch(payloads))
+        self.assertEqual(self.remote.predict_single(payloads[1]), self.local.predict_single(payloads[1]))
+        self.assertEqual(self.remote.version, self.local.version)
+        self.assertEqual(self.remote.teams(), self.local.teams())
+        self.assertEqual(self.remote.features(), self.local.features())
+
+        df = pd.DataFrame(payloads)
+        remote, local = self.remote.predict_frame(df), self.local.predict_frame(df)
+        for key in ('probs', 'goal_diff', 'home_goals', 'away_goals'):
+            np.testing.assert_array_equal(remote[key], local[key])
+
+    def test_concurrent_clients(self):
+        teams = self.local.teams()
+        payloads = [{'HomeTeam': teams[i % len(teams)], 'AwayTeam': teams[(i + 1) % len(teams)], 'HS': i % 9}
+                    for i in range(40)]
+        with ThreadPoolExecutor(8) as pool:
+            results = list(pool.map(self.remote.predict_single, payloads))
+        self.assertEqual(results, self.local.predict_batch(payloads))
+
+    def test_matchups(self):
+        self.assertEqual(self.remote.matchup('Arsenal', 'Chelsea'), self.local.matchup('Arsenal', 'Chelsea'))
+        np.testing.assert_array_equal(self.remote.matchups['goal_diff'], self.local.matchups['goal_diff'])
+
+    def test_get_inferencer_uses_server(self):
+        match = {'home_team': 'Arsenal', 'away_team': 'Chelsea', 'HS': 10}
+        expected = APIClient().post('/api/predict_v2', data=match, format='json').json()
+        with mock.patch.object(inference, '_remote', None), override_settings(MODEL_SERVER_SOCKET=self.path):
+            inf = inference.get_inferencer()
+            self.assertIsInstance(inf, RemoteInferencer)
+            resp = APIClient().post('/api/predict_v2', data=match, format='json')
+            inf._close()
+        self.assertEqual(resp.json(), expected)
+        self.assertEqual(resp['X-Model-Version'], self.local.version)
+
+    def test_unreachable_server(self):
+        remote = RemoteInferencer(self.path + '.missing', timeout=1)
+        self.assertFalse(remote.is_ready())
+        with self.assertRaises(ModelServerError):
+            remote.predict_single({'HomeTeam': 'Arsenal', 'AwayTeam': 'Chelsea'})
+
+
+class HistoryBufferTests(TestCase):
+    def _user(self, name):
+        user = User.objects.create_user(name, f'{name}@example.com', 'pw')
+        UserProfile.objects.create(user=user, favorite_team='')
+        return user
+
+    def test_flush_groups_counter_updates(self):
+        users = [self._user(n) for n in ('ann', 'bob', 'cat')]
+        row = {'home_team': 'Arsenal', 'away_team': 'Chelsea', 'outcome': 'H', 'goal_diff': 0.5}
+        buffer = HistoryBuffer(flush_interval=3600, max_pending=100)
+        with mock.patch.object(buffer, '_ensure_thread'):
+            buffer.record(users[0].pk, [row])
+            buffer.record(users[1].pk, [row])
+            buffer.record(users[2].pk, [row, row])
+        self.assertEqual(buffer.pending(), 4)
+        self.assertEqual(PredictionHistory.objects.count(), 0)
+
+        # one insert, plus one update per distinct increment (1 and 2)
+        # savepoint, user check, insert, 2 updates, release, leaderboard read and upsert
+        with self.assertNumQueries(8):
+            self.assertEqual(buffer.flush(), 4)
+        self.assertEqual(PredictionHistory.objects.count(), 4)
+        counts = dict(UserProfile.objects.values_list('user__username', 'predictions_count'))
+        self.assertEqual(counts, {'ann': 1, 'bob': 1, 'cat': 2})
+        self.assertEqual(buffer.pending(), 0)
+
+    def test_size_threshold_wakes_flusher(self):
+        buffer = HistoryBuffer(flush_interval=3600, max_pending=2)
+        with mock.patch.object(buffer, '_ensure_thread'):
+            buffer.record(1, [{}])
+            self.assertFalse(buffer._wake.is_set())
+            buffer.record(1, [{}])
+            self.assertTrue(buffer._wake.is_set())
+
+    def test_views_record_history(self):
+        user = self._user('dan')
+        client = APIClient()
+        client.force_authenticate(user)
+        with override_settings(HISTORY_FLUSH_INTERVAL=0):
+            client.post('/api/predict_v2', data={'home_team': 'Arsenal', 'away_team': 'Chelsea'}, format='json')
+            matches = [{'home_team': 'Arsenal', 'away_team': 'Chelsea'}, {'home_team': 'Everton', 'away_team': 'Fulham'}]
+            client.post('/api/predict_batch', data={'matches': matches}, format='json')
+        self.assertEqual(UserProfile.objects.get(user=user).predictions_count, 3)
+        self.assertEqual(PredictionHistory.objects.count(), 3)
+
+
+class UserHistoryTests(TestCase):
+    def test_keyset_pages_cover_history_once(self):
+        user = User.objects.create_user('eve', 'eve@example.com', 'pw')
+        other = User.objects.create_user('fay', 'fay@example.com', 'pw')
+        start = datetime(2024, 8, 1, tzinfo=timezone.utc)
+        row = {'home_team': 'Arsenal', 'away_team': 'Chelsea', 'outcome': 'H', 'goal_diff': 0.5}
+        # pairs of rows share a timestamp so the id tie-breaker is exercised
+        PredictionHistory.objects.bulk_create(
+            [PredictionHistory(user=user, timestamp=start + timedelta(minutes=i // 2), **row) for i in range(7)]
+            + [PredictionHistory(user=other, timestamp=start, **row)]
+        )
+        expected = list(PredictionHistory.objects.filter(user=user)
+                        .order_by('-timestamp', '-id').values_list('id', flat=True))
+
+        client = APIClient()
+        self.assertEqual(client.get('/api/user/history').status_code, 403)
+        client.force_authenticate(user)
+        seen, cursor = [], None
+        while True:
+            params = {'limit': 3, **({'cursor': cursor} if cursor else {})}
+            body = client.get('/api/user/history', params).json()
+            seen += [r['id'] for r in body['results']]
+            cursor = body['next_cursor']
+            if cursor is None:
+                break
+        self.assertEqual(seen, expected)
+        self.assertEqual(client.get('/api/user/history', {'cursor': 'bogus'}).status_code, 400)
+
+
+class CompactHistoryTests(TestCase):
+    def test_old_rows_rolled_up_and_pruned(self):
+        now = datetime.now(timezone.utc)
+        old = datetime(2024, 8, 1, 12, tzinfo=timezone.utc)
+        rows = [
+            PredictionHistory(timestamp=old, outcome='H', prob_home=0.6, prob_draw=0.3, prob_away=0.1,
+                              goal_diff=1.0, home_goals=2, away_goals=1),
+            PredictionHistory(timestamp=old, outcome='A', prob_home=0.2, prob_draw=0.3, prob_away=0.5,
+                              goal_diff=-1.0, home_goals=0, away_goals=1),
+            PredictionHistory(timestamp=old + timedelta(days=1), outcome='D'),
+            PredictionHistory(timestamp=now, outcome='H'),
+        ]
+        PredictionHistory.objects.bulk_create(rows)
+
+        # batches of one also exercise adding to an existing rollup
+        call_command('compact_history', days=30, batch_size=1, stdout=StringIO())
+        self.assertEqual(list(PredictionHistory.objects.values_list('timestamp', flat=True)), [now])
+        first = DailyPredictionRollup.objects.get(day=old.date())
+        self.assertEqual((first.predictions, first.home_wins, first.away_wins, first.draws), (2, 1, 1, 0))
+        self.assertEqual(first.with_probabilities, 2)
+        self.assertAlmostEqual(first.prob_home_sum, 0.8)
+        self.assertEqual((first.goal_diff_sum, first.home_goals_sum, first.away_goals_sum), (0.0, 2, 2))
+        second = DailyPredictionRollup.objects.get(day=old.date() + timedelta(days=1))
+        self.assertEqual((second.predictions, second.draws, second.with_probabilities), (1, 1, 0))
+
+    def test_history_api_keeps_response_shape(self):
+        user = User.objects.create_user('gus', 'gus@example.com', 'pw')
+        client = APIClient()
+        client.force_authenticate(user)
+        match = {'home_team': 'Arsenal', 'away_team': 'Chelsea', 'match_date': '2024-08-17'}
+        with override_settings(HISTORY_FLUSH_INTERVAL=0):
+            predicted = client.post('/api/predict_v2', data=match, format='json').json()
+        row = user.predictions.get()
+        self.assertEqual((row.home_team, row.match_date), ('Arsenal', date(2024, 8, 17)))
+
+        entry = client.get('/api/user/history').json()['results'][0]
+        self.assertEqual(entry['input_data'], match)
+        self.assertEqual(entry['outcome'], predicted['outcome'])
+        self.assertEqual(entry['probabilities'], predicted['probabilities'])
+        self.assertEqual(entry['suggested_score'], {'home': predicted['home_goals'], 'away': predicted['away_goals']})
+
+
+class ReconcileTests(TestCase):
+    RESULTS = (
+        'Div,Date,HomeTeam,AwayTeam,FTHG,FTAG,FTR\n'
+        'E0,2024-08-17,Arsenal,Chelsea,2,0,H\n'
+        'E0,2024-08-17,Everton,Fulham,1,1,D\n'
+        'E0,2024-08-18,Leeds,Wolves,0,1,A\n'
+    )
+
+    def test_results_applied_once(self):
+        users = []
+        for name in ('hal', 'ida'):
+            user = User.objects.create_user(name, f'{name}@example.com', 'pw')
+            UserProfile.objects.create(user=user, favorite_team='', predictions_count=2)
+            users.append(user)
+        day = date(2024, 8, 17)
+
+        def row(user, home, away, outcome, match_date=day):
+            return PredictionHistory(user=user, home_team=home, away_team=away, match_date=match_date, outcome=outcome)
+
+        PredictionHistory.objects.bulk_create([
+            row(users[0], 'Arsenal', 'Chelsea', 'H'),
+            row(users[0], 'Everton', 'Fulham', 'D'),
+            row(users[1], 'Arsenal', 'Chelsea', 'A'),
+            row(users[1], 'Leeds', 'Wolves', 'A', date(2024, 9, 1)),  # no result yet
+        ])
+
+        admin = User.objects.create_superuser('root', 'root@example.com', 'pw')
+        client = APIClient()
+        client.force_authenticate(admin)
+        upload = lambda: SimpleUploadedFile('results.csv', self.RESULTS.encode(), content_type='text/csv')
+        body = client.post('/api/admin/reconcile', {'file': upload()}, format='multipart').json()
+        self.assertEqual((body['matched'], body['correct'], body['users']), (3, 2, 1))
+
+        counts = dict(UserProfile.objects.values_list('user__username', 'correct_predictions'))
+        self.assertEqual(counts, {'hal': 2, 'ida': 0})
+        self.assertEqual(list(PredictionHistory.objects.order_by('id').values_list('correct', flat=True)),
+                         [True, True, False, None])
+
+        # a rerun finds nothing pending in the results' date range
+        body = client.post('/api/admin/reconcile', {'file': upload()}, format='multipart').json()
+        self.assertEqual((body['pending'], body['matched']), (0, 0))
+        self.assertEqual(UserProfile.objects.get(user=users[0]).correct_predictions, 2)
+
+        client.force_authenticate(users[0])
+        self.assertEqual(client.post('/api/admin/reconcile', {'file': upload()}, format='multipart').status_code, 403)
+
+    def test_overlapping_runs_count_each_hit_once(self):
+        user = User.objects.create_user('jo', 'jo@example.com', 'pw')
+        UserProfile.objects.create(user=user, favorite_team='', predictions_count=2)
+        PredictionHistory.objects.bulk_create([
+            PredictionHistory(user=user, home_team='Arsenal', away_team='Chelsea', match_date=date(2024, 8, 17), outcome='H'),
+            PredictionHistory(user=user, home_team='Leeds', away_team='Wolves', match_date=date(2024, 8, 18), outcome='A'),
+        ])
+        results = reconcile.load_results(io.StringIO(self.RESULTS))
+        # what a second, overlapping run read before the first one wrote
+        stale = reconcile._pending_frame(results)
+
+        self.assertEqual(reconcile.reconcile(results)['correct'], 2)
+        self.assertEqual(UserProfile.objects.get(user=user).correct_predictions, 2)
+
+        frames, fresh = [stale], reconcile._pending_frame
+        with mock.patch.object(reconcile, '_pending_frame', side_effect=lambda r: frames.pop() if frames else fresh(r)):
+            stats = reconcile.reconcile(results)
+        self.assertEqual((stats['matched'], stats['correct']), (0, 0))
+        self.assertEqual(UserProfile.objects.get(user=user).correct_predictions, 2)
+
+
+class LeaderboardTests(TestCase):
+    def setUp(self):
+        # user ids are reused between tests, cached stats must not be
+        self.addCleanup(cache.clear)
+
+    def _user(self, name, total, correct):
+        user = User.objects.create_user(name, f'{name}@example.com', 'pw', first_name=name.title())
+        UserProfile.objects.create(user=user, favorite_team='', predictions_count=total, correct_predictions=correct)
+        return user
+
+    def test_ranks_follow_counter_changes(self):
+        users = [self._user('amy', 20, 15), self._user('ben', 40, 20), self._user('cal', 5, 5)]
+        refresh_users([u.pk for u in users])
+        client = APIClient()
+        with override_settings(LEADERBOARD_MIN_PREDICTIONS=10, LEADERBOARD_RERANK_INTERVAL=0):
+            body = client.get('/api/leaderboard').json()
+            # cal is perfect but below the minimum, so unranked by accuracy
+            self.assertEqual([r['name'] for r in body['results']], ['Amy', 'Ben'])
+            self.assertNotIn('me', body)
+            body = client.get('/api/leaderboard', {'by': 'volume', 'start': 2, 'limit': 1}).json()
+            self.assertEqual([(r['name'], r['volume_rank']) for r in body['results']], [('Amy', 2)])
+
+            UserProfile.objects.filter(user=users[1]).update(correct_predictions=36)
+            refresh_users([users[1].pk])
+            client.force_authenticate(users[1])
+            self.assertEqual(client.get('/api/user/stats').json()['accuracy'], 90.0)
+            with self.assertNumQueries(3):  # dirty check, rerank, page; 'me' comes from the cache
+                body = client.get('/api/leaderboard').json()
+        self.assertEqual([r['name'] for r in body['results']], ['Ben', 'Amy'])
+        self.assertEqual(body['me']['accuracy'], 90.0)
+        self.assertEqual(client.get('/api/leaderboard', {'by': 'name'}).status_code, 400)
+
+    def test_history_flush_updates_leaderboard(self):
+        user = self._user('dot', 0, 0)
+        client = APIClient()
+        client.force_authenticate(user)
+        with override_settings(HISTORY_FLUSH_INTERVAL=0):
+            self.assertEqual(client.get('/api/user/stats').json()['total_predictions'], 0)
+            client.post('/api/predict_v2', data={'home_team': 'Arsenal', 'away_team': 'Chelsea'}, format='json')
+        self.assertEqual(LeaderboardEntry.objects.get(user=user).predictions, 1)
+        self.assertEqual(client.get('/api/user/stats').json()['total_predictions'], 1)
+
+
+class SqliteTuningTests(TestCase):
+    def test_production_profile_applies_pragmas(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            raw = sqlite3.connect(f'{tmp}/db.sqlite3')
+            wrapper = SimpleNamespace(vendor='sqlite', connection=raw)
+            with override_settings(SQLITE_PROFILE='default'):
+                configure_connection(None, wrapper)
+            self.assertEqual(raw.execute('PRAGMA journal_mode').fetchone()[0], 'delete')
+            with override_settings(SQLITE_PROFILE='production'):
+                configure_connection(None, wrapper)
+            self.assertEqual(raw.execute('PRAGMA journal_mode').fetchone()[0], 'wal')
+            self.assertEqual(raw.execute('PRAGMA synchronous').fetchone()[0], 1)  # NORMAL
+            self.assertEqual(raw.execute('PRAGMA busy_timeout').fetchone()[0], 5000)
+            raw.close()
+
+    def test_stress_reports_both_profiles(self):
+        for profile in ('default', 'production'):
+            result = stress(profile, workers=2, seconds=0.3)
+            self.assertGreater(result['writes'], 0)
+            self.assertEqual(result['failed'], 0)
+            self.assertIn('lock_waits', result)
+
+    def test_stress_production_profile_follows_settings(self):
+        pragmas = {'journal_mode': 'WAL', 'synchronous': 'OFF', 'busy_timeout': 100, 'mmap_size': 1 << 20}
+        with override_settings(SQLITE_PRAGMAS=pragmas):
+            result = stress('production', workers=1, seconds=0.1)
+        # the workers count lock waits themselves, so no busy timeout
+        self.assertEqual(result['pragmas'], {'journal_mode': 'WAL', 'synchronous': 'OFF', 'mmap_size': 1 << 20})
+        self.assertEqual(stress('default', workers=1, seconds=0.1)['pragmas'], {})
+
+
+class CachedAuthTests(TestCase):
+    def setUp(self):
+        self.addCleanup(cache.clear)
+        self.addCleanup(get_user_cache().clear)
+
+    def test_logged_in_requests_skip_the_database(self):
+        user = User.objects.create_user('kim@example.com', 'kim@example.com', 'pw', first_name='Kim')
+        UserProfile.objects.create(user=user, favorite_team='Arsenal')
+        match = {'home_team': 'Arsenal', 'away_team': 'Chelsea'}
+        client = APIClient()
+        # history is queued in memory and never flushed here
+        buffer = HistoryBuffer(flush_interval=3600)
+        with override_settings(SESSION_ENGINE='django.contrib.sessions.backends.signed_cookies',
+                               AUTHENTICATION_BACKENDS=['api.auth.CachedModelBackend']), \
+                mock.patch('api.views.get_history_buffer', return_value=buffer), \
+                mock.patch.object(buffer, '_ensure_thread'):
+            resp = client.post('/api/login', {'email': 'kim@example.com', 'password': 'pw'}, format='json')
+            self.assertEqual(resp.status_code, 200)
+            # the first request loads the user and the stats once
+            self.assertEqual(client.get('/api/user/stats').status_code, 200)
+            with self.assertNumQueries(0):
+                self.assertEqual(client.post('/api/predict_v2', data=match, format='json').status_code, 200)
+                self.assertEqual(client.get('/api/user/stats').json()['favorite_team'], 'Arsenal')
+
+            # saving the user drops it from the cache, so the next request sees the change
+            User.objects.filter(pk=user.pk).update(is_active=False)
+            user.refresh_from_db()
+            user.save()
+            self.assertEqual(client.get('/api/user/stats').status_code, 403)
+        self.assertEqual(buffer.pending(), 1)
+
+
+class MetricsTests(TestCase):
+    def test_stage_timings_reported(self):
+        self.addCleanup(histograms.clear)
+        get_inferencer()  # load outside the timed request
+        histograms.clear()
+        # outside a timed request stages cost nothing
+        self.assertIs(stage('features'), stage('scale'))
+
+        match = {'home_team': 'Arsenal', 'away_team': 'Chelsea', 'HS': 12, 'AS': 7}
+        with modify_settings(MIDDLEWARE={'prepend': 'api.metrics.TimingMiddleware'}):
+            resp = APIClient().post('/api/predict_v2', data=match, format='json')
+            stages = [part.split(';')[0] for part in resp['Server-Timing'].split(', ')]
+            for name in ('parse', 'features', 'classify', 'regress', 'render', 'total'):
+                self.assertIn(name, stages)
+            client = APIClient()
+            self.assertEqual(client.get('/api/metrics').status_code, 403)
+            client.force_authenticate(User.objects.create_user('ops', is_staff=True))
+            body = client.get('/api/metrics').content.decode()
+
+        self.assertIn('# TYPE scoresight_stage_seconds histogram', body)
+        self.assertIn('scoresight_stage_seconds_count{endpoint="predict_v2",stage="classify"} 1', body)
+        self.assertIn('scoresight_stage_seconds_bucket{endpoint="predict_v2",stage="total",le="+Inf"} 1', body)
+
+
+class BenchmarkTests(TestCase):
+    def test_inference_cases_and_compare(self):
+        current = run(groups=('inference',), seconds=0.01, only=['inference.predict_batch_16'])
+        stats = current['results']['inference.predict_batch_16']
+        self.assertLessEqual(stats['p50_ms'], stats['p99_ms'])
+        self.assertGreater(stats['rows_per_sec'], stats['ops_per_sec'])
+
+        slower = {'results': {'inference.predict_batch_16': dict(stats, p50_ms=stats['p50_ms'] / 2)}}
+        faster = {'results': {'inference.predict_batch_16': dict(stats, p50_ms=stats['p50_ms'] * 2)}}
+        self.assertTrue(compare(current, slower)[0]['regressed'])
+        self.assertFalse(compare(current, faster)[0]['regressed'])
+        self.assertEqual(compare(current, {'results': {}}), [])
+
+
+class TrafficReplayTests(TestCase):
+    def test_capture_then_replay(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = f'{tmp}/traffic.jsonl'
+            with override_settings(TRAFFIC_CAPTURE_RATE=1.0, TRAFFIC_CAPTURE_FILE=path), \
+                    modify_settings(MIDDLEWARE={'prepend': 'api.traffic.CaptureMiddleware'}):
+                client = APIClient()
+                client.post('/api/predict_v2', {'home_team': 'Arsenal', 'away_team': 'Chelsea'}, format='json')
+                client.get('/api/teams')
+                client.post('/api/login', {'email': 'x@example.com', 'password': 'secret'}, format='json')
+            records = load(path)
+
+        self.assertEqual([r['path'] for r in records], ['/api/predict_v2', '/api/teams', '/api/login'])
+        self.assertEqual(records[0]['status'], 200)
+        self.assertIn('Arsenal', records[0]['body'])
+        self.assertNotIn('body', records[2])  # credentials are never stored
+
+        samples, wall = replay(records[:2], InProcessTarget(), concurrency=2, total=6)
+        summary = summarize(samples, wall)
+        self.assertEqual(summary['/api/predict_v2']['requests'], 3)
+        self.assertEqual(summary['/api/teams']['errors'], 0)
+        self.assertEqual(sorted({s[1] for s in samples}), [200])
+
+    async def test_async_capture_writes_off_the_event_loop(self):
+        async def get_response(request):
+            return HttpResponse(status=200)
+
+        def lazy_user():
+            User.objects.filter(pk=0).exists()  # raises SynchronousOnlyOperation on the event loop
+            return AnonymousUser()
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = f'{tmp}/traffic.jsonl'
+            with override_settings(TRAFFIC_CAPTURE_RATE=1.0, TRAFFIC_CAPTURE_FILE=path):
+                middleware = CaptureMiddleware(get_response)
+                request = RequestFactory().get('/api/teams')
+                request.user = SimpleLazyObject(lazy_user)
+                response = await middleware(request)
+            records = load(path)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([(r['path'], r['authenticated']) for r in records], [('/api/teams', False)])
+
+
+class ProfilingTests(TestCase):
+    def test_signed_or_staff_requests_are_profiled(self):
+        match = {'home_team': 'Arsenal', 'away_team': 'Chelsea', 'HS': 12, 'AS': 7}
+        with tempfile.TemporaryDirectory() as tmp, \
+                override_settings(PROFILE_DIR=tmp, PROFILE_KEEP=2, PROFILE_SAMPLE_INTERVAL=0.0005), \
+                modify_settings(MIDDLEWARE={'append': 'api.profiling.ProfilingMiddleware'}):
+            client = APIClient()
+            self.assertNotIn('X-Profile-Id', client.get('/api/teams'))
+            self.assertNotIn('X-Profile-Id', client.get('/api/teams', HTTP_X_PROFILE='1'))
+            self.assertNotIn('X-Profile-Id', client.get('/api/teams', HTTP_X_PROFILE=make_token() + 'x'))
+
+            resp = client.post('/api/predict_v2', match, format='json', HTTP_X_PROFILE=make_token())
+            self.assertEqual(resp.status_code, 200)
+            stats = pstats.Stats(str(Path(tmp) / (resp['X-Profile-Id'] + '.prof')))
+            self.assertTrue(any(func[2] == 'predict_single' for func in stats.stats))
+
+            csv = b'HomeTeam,AwayTeam\nArsenal,Chelsea\nChelsea,Arsenal\nLiverpool,Arsenal\n'
+            upload = SimpleUploadedFile('fixtures.csv', csv, content_type='text/csv')
+            resp = client.post('/api/simulate/monte_carlo', {'file': upload, 'sims': 50000, 'seed': 1},
+                               format='multipart', HTTP_X_PROFILE=make_token(), HTTP_X_PROFILE_MODE='sample')
+            folded = (Path(tmp) / (resp['X-Profile-Id'] + '.folded')).read_text()
+            stack, count = folded.splitlines()[0].rsplit(' ', 1)
+            self.assertIn(';', stack)
+            self.assertGreater(int(count), 0)
+
+            staff = User.objects.create_user('ops@example.com', 'ops@example.com', 'pw', is_staff=True)
+            client.force_login(staff)
+            resp = client.get('/api/teams', HTTP_X_PROFILE='1')
+            self.assertIn('X-Profile-Id', resp)
+            # the retention cap keeps the two newest
+            self.assertEqual(len(list(Path(tmp).iterdir())), 2)
+
+
+class StartupBudgetTests(TestCase):
+    def test_worker_boot_within_budget(self):
+        timing = measure_startup()
+        self.assertEqual(timing['status'], 200)
+        self.assertLess(timing['startup_ms'], settings.STARTUP_BUDGET_MS)
+        self.assertLess(timing['first_request_ms'], settings.FIRST_REQUEST_BUDGET_MS)
+
+        # a worker loading models on demand imports none of the heavy libraries to serve /api/health
+        lazy = measure_startup(env={'INFERENCE_EAGER_LOAD': 'False'})
+        self.assertEqual(lazy['heavy_modules'], [])
+        self.assertLess(lazy['first_request_ms'], settings.FIRST_REQUEST_BUDGET_MS)
+
+    def test_import_report_parses_importtime(self):
+        rows, raw = import_times({'INFERENCE_EAGER_LOAD': 'False'})
+        names = {name for name, _, _, _ in rows}
+        self.assertIn('api.views', names)
+        self.assertNotIn('pandas', names)
+        self.assertIn('django', [pkg for pkg, _, _ in by_package(rows)])
+        self.assertTrue(raw.startswith('import time:'))
+
+
+class ArtifactBundleTests(TestCase):
+    def test_bundle_serves_without_pickles(self):
+        reference = SklearnInferencer()
+        with tempfile.TemporaryDirectory() as tmp:
+            for name in ('model_meta.json', 'match_outcome_classifier.pkl', 'goal_diff_regressor.pkl',
+                         'feature_scaler.pkl', 'cleaned_merged_dataset.csv'):
+                shutil.copy(reference.base / name, tmp)
+            call_command('build_bundle', artifacts=tmp, stdout=io.StringIO())
+
+            inf = SklearnInferencer(tmp, use_bundle=True)
+            self.assertEqual(inf.load_report['bundle']['state'], 'loaded')
+            self.assertIsNone(inf.classifier)
+            self.assertIsInstance(inf.engine.tree_value, np.memmap)
+            self.assertIsInstance(inf.feature_store.values, np.memmap)
+            payloads = [{'HomeTeam': 'Arsenal', 'AwayTeam': 'Chelsea'},
+                        {'HomeTeam': 'Chelsea', 'AwayTeam': 'Liverpool', 'HS': 9, 'AS': 12, 'HST': 3}]
+            self.assertEqual(inf.predict_batch(payloads), reference.predict_batch(payloads))
+
+            # a bundle-only deploy needs nothing else
+            for name in ('model_meta.json', 'match_outcome_classifier.pkl', 'goal_diff_regressor.pkl',
+                         'feature_scaler.pkl', 'cleaned_merged_dataset.csv', 'feature_store.npz'):
+                (Path(tmp) / name).unlink()
+            self.assertEqual(SklearnInferencer(tmp, use_bundle=True).predict_batch(payloads),
+                             reference.predict_batch(payloads))
+
+            # a bundle built from other artifacts is ignored
+            shutil.copy(reference.base / 'model_meta.json', tmp)
+            with open(Path(tmp) / 'model_meta.json', 'a') as f:
+                f.write('\n')
+            stale = SklearnInferencer(tmp, use_bundle=True)
+            self.assertEqual(stale.load_report['bundle']['state'], 'stale')
+            self.assertIsNone(stale.engine)
+            self.assertTrue((Path(tmp) / BUNDLE_DIR / 'manifest.json').exists())
@@ -0,0 +1,273 @@
+"""Capture sampled API traffic to JSONL and replay it under load.
+
+CaptureMiddleware (installed when TRAFFIC_CAPTURE_RATE > 0) appends one
+JSON line per sampled /api/ request to TRAFFIC_CAPTURE_FILE: method,
+path, query string, content type, body, whether the caller was logged
+in, the status and how long it took. Bodies of TRAFFIC_CAPTURE_REDACT
+paths (login, signup) are never stored, nor are bodies larger than
+TRAFFIC_CAPTURE_MAX_BODY. Each line goes out in a single O_APPEND
+write, so several workers can share the file.
+
+``replay`` sends captured requests to the in-process WSGI app (through
+the Django test client) or to a running server, from ``concurrency``
+threads at an overall ``rate``, and ``summarize`` reports latency
+percentiles, error rates and throughput per endpoint. Driven by
+``manage.py replay_traffic``.
+"""
+from base64 import b64decode, b64encode
+from http.cookiejar import CookieJar
+from time import perf_counter, sleep, time
+import itertools
+import json
+import os
+import random
+import threading
+import urllib.error
+import urllib.request
+import numpy as np
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+
+
+class CaptureMiddleware:
+    """Append a sample of API requests to TRAFFIC_CAPTURE_FILE."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        from django.conf import settings
+
+        self.get_response = get_response
+        self.rate = settings.TRAFFIC_CAPTURE_RATE
+        self.path = settings.TRAFFIC_CAPTURE_FILE
+        self.max_body = settings.TRAFFIC_CAPTURE_MAX_BODY
+        self.redact = tuple(settings.TRAFFIC_CAPTURE_REDACT)
+        self._random = random.Random()
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self._sampled(request):
+            return self.get_response(request)
+        body = self._body(request)
+        started = perf_counter()
+        response = self.get_response(request)
+        self._write(request, body, response, perf_counter() - started)
+        return response
+
+    async def __acall__(self, request):
+        if not self._sampled(request):
+            return await self.get_response(request)
+        body = self._body(request)
+        started = perf_counter()
+        response = await self.get_response(request)
+        # file I/O and the lazy request.user lookup stay off the event loop
+        await sync_to_async(self._write)(request, body, response, perf_counter() - started)
+        return response
+
+    def _sampled(self, request):
+        return request.path.startswith('/api/') and self._random.random() < self.rate
+
+    def _body(self, request):
+        """The request body, or None when it is redacted or too large to keep."""
+        if request.path.startswith(self.redact):
+            return None
+        try:
+            length = int(request.META.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            return None
+        if not length or length > self.max_body:
+            return None
+        return request.body
+
+    def _write(self, request, body, response, seconds):
+        user = getattr(request, 'user', None)
+        record = {
+            'ts': round(time(), 3),
+            'method': request.method,
+            'path': request.path,
+            'query': request.META.get('QUERY_STRING', ''),
+            'content_type': request.META.get('CONTENT_TYPE', ''),
+            'authenticated': bool(user is not None and user.is_authenticated),
+            'status': response.status_code,
+            'duration_ms': round(seconds * 1000, 3),
+        }
+        if body is not None:
+            try:
+                record['body'] = body.decode('utf-8')
+            except UnicodeDecodeError:
+                record['body_b64'] = b64encode(body).decode('ascii')
+        line = (json.dumps(record, separators=(',', ':')) + '\n').encode()
+        try:
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+            try:
+                os.write(fd, line)
+            finally:
+                os.close(fd)
+        except OSError as e:
+            print(f"⚠️ Could not record request to {self.path}: {e}")
+
+
+def load(path):
+    """Captured requests from a JSONL file, skipping blank and malformed lines."""
+    records = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(record, dict) and 'path' in record:
+                records.append(record)
+    return records
+
+
+def _body(record):
+    if 'body_b64' in record:
+        return b64decode(record['body_b64'])
+    return record.get('body', '').encode('utf-8')
+
+
+class InProcessTarget:
+    """Sends requests through the Django test client, one client per thread."""
+
+    def __init__(self, user=None):
+        self.user = user
+        self._local = threading.local()
+
+    def _client(self, authenticated):
+        from django.test import Client
+
+        key = 'auth' if authenticated and self.user is not None else 'anon'
+        client = getattr(self._local, key, None)
+        if client is None:
+            client = Client(HTTP_HOST='localhost')
+            if key == 'auth':
+                client.force_login(self.user)
+            setattr(self._local, key, client)
+        return client
+
+    def send(self, record):
+        client = self._client(record.get('authenticated'))
+        path = record['path'] + (f"?{record['query']}" if record.get('query') else '')
+        method = record.get('method', 'GET').upper()
+        if method == 'GET':
+            return client.get(path).status_code
+        return client.generic(method, path, _body(record),
+                              content_type=record.get('content_type') or 'application/octet-stream').status_code
+
+
+class HttpTarget:
+    """Sends requests to a running server; logged-in requests use a session from /api/login."""
+
+    def __init__(self, base_url, email=None, password=None, timeout=30.0):
+        self.base_url = base_url.rstrip('/')
+        self.email = email
+        self.password = password
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _opener(self, authenticated):
+        key = 'auth' if authenticated and self.email else 'anon'
+        opener = getattr(self._local, key, None)
+        if opener is None:
+            jar = CookieJar()
+            opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(jar))
+            opener.jar = jar
+            if key == 'auth':
+                login = json.dumps({'email': self.email, 'password': self.password}).encode()
+                opener.open(urllib.request.Request(f'{self.base_url}/api/login', data=login,
+                                                   headers={'Content-Type': 'application/json'}),
+                            timeout=self.timeout).read()
+            setattr(self._local, key, opener)
+        return opener
+
+    def send(self, record):
+        opener = self._opener(record.get('authenticated'))
+        url = self.base_url + record['path'] + (f"?{record['query']}" if record.get('query') else '')
+        method = record.get('method', 'GET').upper()
+        headers = {}
+        data = None
+        if method != 'GET':
+            data = _body(record)
+            headers['Content-Type'] = record.get('content_type') or 'application/octet-stream'
+            csrf = next((c.value for c in opener.jar if c.name == 'csrftoken'), None)
+            if csrf:
+                headers['X-CSRFToken'] = csrf
+        try:
+            with opener.open(urllib.request.Request(url, data=data, headers=headers, method=method),
+                             timeout=self.timeout) as resp:
+                resp.read()
+                return resp.status
+        except urllib.error.HTTPError as e:
+            return e.code
+
+
+def replay(records, target, concurrency=8, rate=0.0, total=None):
+    """Send ``total`` requests (default: every record once), cycling through ``records``.
+
+    ``rate`` is the overall requests per second, 0 meaning as fast as the
+    threads go. Returns one ``(path, status, seconds)`` tuple per request,
+    status None when the request raised, plus the wall time.
+    """
+    total = len(records) if total is None else total
+    counter = itertools.count()
+    lock = threading.Lock()
+    samples = []
+    started = perf_counter()
+
+    def worker():
+        while True:
+            with lock:
+                i = next(counter)
+            if i >= total:
+                return
+            if rate > 0:
+                # open loop: request i is due at started + i / rate
+                delay = started + i / rate - perf_counter()
+                if delay > 0:
+                    sleep(delay)
+            record = records[i % len(records)]
+            t0 = perf_counter()
+            try:
+                status = target.send(record)
+            except Exception:
+                status = None
+            sample = (record['path'], status, perf_counter() - t0)
+            with lock:
+                samples.append(sample)
+
+    threads = [threading.Thread(target=worker, name=f'replay-{n}') for n in range(max(1, concurrency))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return samples, perf_counter() - started
+
+
+def summarize(samples, wall):
+    """Per-endpoint count, throughput, 4xx/5xx and error rates and latency percentiles."""
+    by_path = {}
+    for path, status, seconds in samples:
+        by_path.setdefault(path, []).append((status, seconds))
+    summary = {}
+    for path, rows in sorted(by_path.items()):
+        ms = np.array([s for _, s in rows]) * 1000
+        statuses = [status for status, _ in rows]
+        failed = sum(1 for s in statuses if s is None or s >= 500)
+        summary[path] = {
+            'requests': len(rows),
+            'per_sec': round(len(rows) / wall, 2) if wall else 0.0,
+            'client_errors': sum(1 for s in statuses if s is not None and 400 <= s < 500),
+            'errors': failed,
+            'error_rate': round(failed / len(rows), 4),
+            'p50_ms': round(float(np.percentile(ms, 50)), 3),
+            'p95_ms': round(float(np.percentile(ms, 95)), 3),
+            'p99_ms': round(float(np.percentile(ms, 99)), 3),
+        }
+    return summary
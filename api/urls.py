@@ -1,15 +1,30 @@
 from django.urls import path
 from .views import (
-    HealthView, TeamsView, PredictV2View, DebugInputView,
-    SignupView, LoginView, UserStatsView
+    HealthView, TeamsView, PredictV2View, PredictV2AsyncView, BatchStatsView, PredictBatchView, DebugInputView, SimulateView,
+    MonteCarloSimulateView, CacheStatsView, MetricsView, MatchupsView, ReadyView,
+    ReloadModelsView, ReconcileView,
+    SignupView, LoginView, UserStatsView, UserHistoryView, LeaderboardView
 )
 
 urlpatterns = [
     path('health', HealthView.as_view(), name='health'),
+    path('ready', ReadyView.as_view(), name='ready'),
     path('teams', TeamsView.as_view(), name='teams'),
     path('predict_v2', PredictV2View.as_view(), name='predict_v2'),
+    path('predict_v2_async', PredictV2AsyncView.as_view(), name='predict_v2_async'),
+    path('predict_v2_async/stats', BatchStatsView.as_view(), name='predict_v2_async_stats'),
+    path('predict_batch', PredictBatchView.as_view(), name='predict_batch'),
+    path('matchups', MatchupsView.as_view(), name='matchups'),
+    path('simulate', SimulateView.as_view(), name='simulate'),
+    path('simulate/monte_carlo', MonteCarloSimulateView.as_view(), name='simulate_monte_carlo'),
+    path('cache/stats', CacheStatsView.as_view(), name='cache_stats'),
+    path('metrics', MetricsView.as_view(), name='metrics'),
     path('debug_input', DebugInputView.as_view(), name='debug_input'),
+    path('admin/reload', ReloadModelsView.as_view(), name='admin_reload'),
+    path('admin/reconcile', ReconcileView.as_view(), name='admin_reconcile'),
     path('signup', SignupView.as_view(), name='signup'),
     path('login', LoginView.as_view(), name='login'),
     path('user/stats', UserStatsView.as_view(), name='user_stats'),
+    path('user/history', UserHistoryView.as_view(), name='user_history'),
+    path('leaderboard', LeaderboardView.as_view(), name='leaderboard'),
 ]
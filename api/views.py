@@ -2,8 +2,13 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework import status
-from rest_framework.permissions import IsAuthenticated, AllowAny
-from django.shortcuts import get_object_or_404
+from rest_framework.permissions import IsAuthenticated, AllowAny, IsAdminUser
+from django.conf import settings
+from django.http import Http404, HttpResponse, JsonResponse
+from django.middleware.csrf import CsrfViewMiddleware
+from django.views import View
+from asgiref.sync import sync_to_async
+from django.utils.dateparse import parse_date
 from django.contrib.auth.models import User
 from django.contrib.auth import authenticate, login
 from .serializers import (
@@ -12,26 +17,134 @@ from .serializers import (
     PredictRequestSerializer,
     PredictResponseSerializer,
     UserSerializer,
+    PredictionHistorySerializer,
 )
-from .inference import get_inferencer
+from .inference import get_inferencer, get_prediction_cache, peek_inferencer, reload_inferencer, STAT_KEYS
+from .batching import get_batcher, batch_stats
+from .history import get_history_buffer
+from .metrics import histograms, stage
+from .leaderboard import ORDERINGS as LEADERBOARD_ORDERINGS, top as leaderboard_top, user_stats
 from .models import PredictionHistory, UserProfile
-import pandas as pd
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime
+import json
+import numpy as np
+
+
+MODEL_VERSION_HEADER = 'X-Model-Version'
+
+
+def _versioned(response, inf):
+    """Tag a response with the version of the model bundle that produced it."""
+    response[MODEL_VERSION_HEADER] = inf.version
+    return response
 
 
 class HealthView(APIView):
     def get(self, request):
-        data = {'status': 'ok', 'model': 'sklearn', 'version': 'v2'}
+        inf = peek_inferencer()
+        data = {'status': 'ok', 'model': 'sklearn', 'version': 'v2',
+                'model_version': inf.version if inf is not None else None}
         return Response(HealthSerializer(data).data)
 
 
+class ReloadModelsView(APIView):
+    """Admin-only: reload model artifacts in the background and swap them in.
+
+    Pass ``wait=true`` to block until the reload finishes.
+    """
+    permission_classes = [IsAdminUser]
+
+    def post(self, request):
+        previous = peek_inferencer()
+        wait = str(request.data.get('wait', '')).lower() in ('1', 'true', 'yes')
+        reload_inferencer(wait=wait)
+        current = peek_inferencer()
+        return Response({
+            'status': 'reloaded' if wait else 'reloading',
+            'previous_version': previous.version if previous is not None else None,
+            'model_version': current.version if current is not None else None,
+        }, status=status.HTTP_200_OK if wait else status.HTTP_202_ACCEPTED)
+
+
+class ReconcileView(APIView):
+    """Admin-only: apply final results to pending prediction history.
+
+    Takes an optional results CSV upload under ``file`` (the
+    cleaned_merged_dataset.csv layout); without one RESULTS_CSV is used.
+    """
+    permission_classes = [IsAdminUser]
+
+    def post(self, request):
+        from .reconcile import load_results, reconcile
+
+        source = request.FILES.get('file') or settings.RESULTS_CSV
+        try:
+            results = load_results(source)
+        except (OSError, ValueError) as e:
+            return Response({'detail': f'unable to read results: {e}'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(reconcile(results))
+
+
+class ReadyView(APIView):
+    """Readiness probe: model load state and per-artifact load times.
+
+    Unlike HealthView this reflects the loaded models: 200 once the
+    classifier and regressor are loaded, 503 otherwise. It never triggers
+    a load itself.
+    """
+
+    def get(self, request):
+        inf = peek_inferencer()
+        if inf is None:
+            return Response({'ready': False, 'state': 'not_loaded'}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        ready = inf.is_ready()
+        return Response({
+            'ready': ready,
+            'state': 'loaded',
+            'model_version': inf.version,
+            'load_seconds': inf.load_seconds,
+            'loaded_at': inf.loaded_at,
+            'artifacts': inf.load_report,
+        }, status=status.HTTP_200_OK if ready else status.HTTP_503_SERVICE_UNAVAILABLE)
+
+
 class DebugInputView(APIView):
-    """Return expected feature vector format and a sample vector for quick debugging."""
+    """Return expected feature vector format, a sample vector and the compiled feature plan."""
 
     def get(self, request):
         inf = get_inferencer()
         features = inf.features() if hasattr(inf, 'features') else []
         sample = [0 for _ in features]
-        return Response({'features': features, 'sample_vector': sample})
+        return Response({
+            'features': features,
+            'sample_vector': sample,
+            'stat_keys': list(STAT_KEYS),
+            'plan': inf.feature_plan(),
+            'unknown_features': inf.unknown_features,
+        })
+
+
+class MetricsView(APIView):
+    """Admin-only: per-endpoint stage latency histograms in the Prometheus text format (METRICS_ENABLED).
+
+    Scrapers authenticate as a staff user, e.g. with HTTP basic auth.
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return HttpResponse(histograms.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+class CacheStatsView(APIView):
+    """Admin-only: hit/miss/eviction counters for the prediction cache."""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        cache = get_prediction_cache()
+        if cache is None:
+            return Response({'enabled': False})
+        return Response({'enabled': True, **cache.stats()})
 
 
 class TeamsView(APIView):
@@ -42,14 +155,87 @@ class TeamsView(APIView):
 
 
 class UserStatsView(APIView):
+    """The logged-in user's counters, accuracy and leaderboard ranks, cached per user."""
     permission_classes = [IsAuthenticated]
-    
+
+    def get(self, request):
+        stats = user_stats(request.user)
+        if stats is None:
+            raise Http404
+        return Response(stats)
+
+
+class LeaderboardView(APIView):
+    """Top users by ``?by=accuracy`` (default) or ``volume``, from the materialized ranks.
+
+    ``?start=`` is the first rank returned and ``?limit=`` the page size
+    (default 20, at most LEADERBOARD_PAGE_MAX). Logged-in users also get
+    their own row as ``me``.
+    """
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        by = request.query_params.get('by', 'accuracy')
+        if by not in LEADERBOARD_ORDERINGS:
+            return Response({'detail': 'by must be accuracy or volume'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            start = max(1, int(request.query_params.get('start', 1)))
+            limit = int(request.query_params.get('limit', 20))
+        except ValueError:
+            return Response({'detail': 'start and limit must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+        limit = max(1, min(limit, settings.LEADERBOARD_PAGE_MAX))
+
+        data = {'by': by, 'results': leaderboard_top(by, start, limit)}
+        if request.user.is_authenticated:
+            data['me'] = user_stats(request.user)
+        return Response(data)
+
+
+def _encode_cursor(row):
+    return urlsafe_b64encode(f"{row.timestamp.isoformat()}|{row.pk}".encode()).decode()
+
+
+def _decode_cursor(cursor):
+    """Return the (timestamp, id) position a cursor points after, or None if malformed."""
+    try:
+        timestamp, pk = urlsafe_b64decode(cursor.encode()).decode().rsplit('|', 1)
+        return datetime.fromisoformat(timestamp), int(pk)
+    except (ValueError, UnicodeError):
+        return None
+
+
+class UserHistoryView(APIView):
+    """The logged-in user's predictions, newest first.
+
+    Keyset-paginated on (timestamp, id): pass the ``next_cursor`` of one
+    page as ``?cursor=`` to get the next. Every page is a range scan on
+    the (user, timestamp, id) index, however deep it is. ``?limit=``
+    sets the page size (default 50, at most HISTORY_PAGE_MAX).
+    """
+    permission_classes = [IsAuthenticated]
+
     def get(self, request):
-        profile = get_object_or_404(UserProfile, user=request.user)
+        try:
+            limit = int(request.query_params.get('limit', 50))
+        except ValueError:
+            return Response({'detail': 'limit must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        limit = max(1, min(limit, settings.HISTORY_PAGE_MAX))
+
+        rows = PredictionHistory.objects.filter(user=request.user)
+        cursor = request.query_params.get('cursor')
+        if cursor:
+            position = _decode_cursor(cursor)
+            if position is None:
+                return Response({'detail': 'invalid cursor'}, status=status.HTTP_400_BAD_REQUEST)
+            timestamp, pk = position
+            # (timestamp, id) < position, phrased so the index range stays on timestamp
+            rows = rows.filter(timestamp__lte=timestamp).exclude(timestamp=timestamp, id__gte=pk)
+
+        page = list(rows.order_by('-timestamp', '-id')[:limit + 1])
+        next_cursor = _encode_cursor(page[limit - 1]) if len(page) > limit else None
         return Response({
-            'total_predictions': profile.predictions_count,
-            'accuracy': profile.accuracy,
-            'favorite_team': profile.favorite_team
+            'results': PredictionHistorySerializer(page[:limit], many=True).data,
+            'next_cursor': next_cursor,
         })
 
 
@@ -147,14 +333,98 @@ class LoginView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
+def _match_payload(data, home_team, away_team):
+    """Build the inferencer payload for one match; missing stats default to 0."""
+    match_data = {'HomeTeam': home_team, 'AwayTeam': away_team, 'match_date': data.get('match_date')}
+    for key in STAT_KEYS:
+        match_data[key] = data.get(key, 0)
+    return match_data
+
+
+def _format_prediction(res):
+    """Transform an inferencer result into the shape the frontend expects."""
+    # Create probability dict with clear labels
+    prob_dict = {}
+    for item in res.get('probabilities', []):
+        label = item['label']
+        prob = item['prob']
+        if label == 'H':
+            prob_dict['home_win'] = prob
+        elif label == 'D':
+            prob_dict['draw'] = prob
+        elif label == 'A':
+            prob_dict['away_win'] = prob
+
+    # Ensure all keys exist (fallback to 0)
+    prob_dict.setdefault('home_win', 0.0)
+    prob_dict.setdefault('draw', 0.0)
+    prob_dict.setdefault('away_win', 0.0)
+
+    # Determine outcome text and points
+    outcome_code = res.get('outcome', 'D')
+    if outcome_code == 'H':
+        outcome_text = 'Home Win'
+        home_points, away_points = 3, 0
+    elif outcome_code == 'A':
+        outcome_text = 'Away Win'
+        home_points, away_points = 0, 3
+    else:
+        outcome_text = 'Draw'
+        home_points, away_points = 1, 1
+
+    return {
+        'outcome': outcome_text,
+        'probabilities': prob_dict,
+        'home_goals': res.get('suggested_score', {}).get('home', 1),
+        'away_goals': res.get('suggested_score', {}).get('away', 1),
+        'home_points': home_points,
+        'away_points': away_points,
+        'goal_difference': round(res.get('goal_diff', 0), 2)
+    }
+
+
+OUTCOME_CODES = {'Home Win': 'H', 'Draw': 'D', 'Away Win': 'A'}
+
+
+def _history_date(match_date):
+    try:
+        return parse_date(str(match_date)[:10]) if match_date else None
+    except ValueError:
+        return None
+
+
+def _history_kwargs(response_data, home_team, away_team, match_date):
+    probs = response_data.get('probabilities', {})
+    return dict(
+        home_team=str(home_team)[:100],
+        away_team=str(away_team)[:100],
+        match_date=_history_date(match_date),
+        outcome=OUTCOME_CODES.get(response_data.get('outcome'), ''),
+        prob_home=probs.get('home_win'),
+        prob_draw=probs.get('draw'),
+        prob_away=probs.get('away_win'),
+        goal_diff=response_data.get('goal_difference'),
+        home_goals=response_data.get('home_goals'),
+        away_goals=response_data.get('away_goals'),
+    )
+
+
+def _record_prediction(user, response_data, home_team, away_team, match_date):
+    """Queue the history row and counter increment for a logged-in user's prediction."""
+    with stage('history'):
+        get_history_buffer().record(user.pk, [_history_kwargs(response_data, home_team, away_team, match_date)])
+
+
 class PredictV2View(APIView):
     permission_classes = [AllowAny]  # Changed to allow anonymous predictions for demo
     
     def post(self, request):
+        with stage('parse'):
+            data = request.data
         # Handle both frontend simple request and complex stats request
-        home_team = request.data.get('home_team') or request.data.get('HomeTeam')
-        away_team = request.data.get('away_team') or request.data.get('AwayTeam')
-        match_date = request.data.get('match_date')
+        home_team = data.get('home_team') or data.get('HomeTeam')
+        away_team = data.get('away_team') or data.get('AwayTeam')
+        match_date = data.get('match_date')
         
         if not home_team or not away_team:
             return Response(
@@ -164,100 +434,18 @@ class PredictV2View(APIView):
         
         inf = get_inferencer()
         
-        # Create a simple prediction request with just team names
-        # The inferencer will use default values for stats
-        match_data = {
-            'HomeTeam': home_team,
-            'AwayTeam': away_team,
-            'HTHG': request.data.get('HTHG', 0),
-            'HTAG': request.data.get('HTAG', 0),
-            'HS': request.data.get('HS', 0),
-            'AS': request.data.get('AS', 0),
-            'HST': request.data.get('HST', 0),
-            'AST': request.data.get('AST', 0),
-            'HC': request.data.get('HC', 0),
-            'AC': request.data.get('AC', 0),
-            'HF': request.data.get('HF', 0),
-            'AF': request.data.get('AF', 0),
-            'HY': request.data.get('HY', 0),
-            'AY': request.data.get('AY', 0),
-            'HR': request.data.get('HR', 0),
-            'AR': request.data.get('AR', 0)
-        }
+        # The inferencer will use default values for missing stats
+        match_data = _match_payload(data, home_team, away_team)
         
         try:
             res = inf.predict_single(match_data)
-            
-            # Transform response to match frontend expectations
-            # Extract probabilities and create structured response
-            probs_raw = res.get('probabilities', [])
-            labels = inf.class_labels()  # ['H', 'D', 'A']
-            
-            # Create probability dict with clear labels
-            prob_dict = {}
-            for item in probs_raw:
-                label = item['label']
-                prob = item['prob']
-                if label == 'H':
-                    prob_dict['home_win'] = prob
-                elif label == 'D':
-                    prob_dict['draw'] = prob
-                elif label == 'A':
-                    prob_dict['away_win'] = prob
-            
-            # Ensure all keys exist (fallback to 0)
-            prob_dict.setdefault('home_win', 0.0)
-            prob_dict.setdefault('draw', 0.0)
-            prob_dict.setdefault('away_win', 0.0)
-            
-            # Determine outcome text
-            outcome_code = res.get('outcome', 'D')
-            if outcome_code == 'H':
-                outcome_text = 'Home Win'
-            elif outcome_code == 'A':
-                outcome_text = 'Away Win'
-            else:
-                outcome_text = 'Draw'
-            
-            # Calculate points based on outcome
-            if outcome_code == 'H':
-                home_points = 3
-                away_points = 0
-            elif outcome_code == 'A':
-                home_points = 0
-                away_points = 3
-            else:
-                home_points = 1
-                away_points = 1
-            
-            response_data = {
-                'outcome': outcome_text,
-                'probabilities': prob_dict,
-                'home_goals': res.get('suggested_score', {}).get('home', 1),
-                'away_goals': res.get('suggested_score', {}).get('away', 1),
-                'home_points': home_points,
-                'away_points': away_points,
-                'goal_difference': round(res.get('goal_diff', 0), 2)
-            }
+            response_data = _format_prediction(res)
             
             # Save prediction history if user is authenticated
             if request.user.is_authenticated:
-                try:
-                    profile = UserProfile.objects.get(user=request.user)
-                    profile.predictions_count += 1
-                    profile.save()
-                    
-                    PredictionHistory.objects.create(
-                        input_data={'home_team': home_team, 'away_team': away_team, 'match_date': match_date},
-                        outcome=response_data.get('outcome', ''),
-                        probabilities=response_data.get('probabilities', {}),
-                        goal_diff=response_data.get('goal_difference'),
-                        suggested_score={'home': response_data.get('home_goals'), 'away': response_data.get('away_goals')},
-                    )
-                except Exception:
-                    pass  # DB optional - don't fail prediction
+                _record_prediction(request.user, response_data, home_team, away_team, match_date)
             
-            return Response(response_data, status=status.HTTP_200_OK)
+            return _versioned(Response(response_data, status=status.HTTP_200_OK), inf)
         except Exception as e:
             return Response(
                 {'error': str(e)},
@@ -265,64 +453,285 @@ class PredictV2View(APIView):
             )
 
 
+def _predict_payloads(payloads):
+    """MicroBatcher handler: one predict_batch call, each result tagged with the model version."""
+    inf = get_inferencer()
+    return [(res, inf.version) for res in inf.predict_batch(payloads)]
+
+
+def _csrf_failure(request):
+    """Apply DRF's session CSRF check; returns the rejection reason or None."""
+    check = CsrfViewMiddleware(lambda req: None)
+    check.process_request(request)
+    rejected = check.process_view(request, None, (), {})
+    return None if rejected is None else 'CSRF Failed'
+
+
+class PredictV2AsyncView(View):
+    """Async PredictV2View for ASGI deployments.
+
+    Concurrent requests are queued and evaluated together as one
+    ``predict_batch`` call (see api/batching.py); the batch window and cap
+    come from PREDICT_ASYNC_WINDOW_MS and PREDICT_ASYNC_MAX_BATCH. Users
+    logged in through the session get their prediction recorded, with the
+    same CSRF check DRF applies to session-authenticated requests.
+    """
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        view = super().as_view(**initkwargs)
+        # set directly: csrf_exempt() would hide that the view is async
+        view.csrf_exempt = True
+        return view
+
+    async def post(self, request):
+        try:
+            data = json.loads(request.body or b'{}')
+        except ValueError:
+            return JsonResponse({'error': 'Request body must be JSON.'}, status=status.HTTP_400_BAD_REQUEST)
+        if not isinstance(data, dict):
+            return JsonResponse({'error': 'Request body must be a JSON object.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        home_team = data.get('home_team') or data.get('HomeTeam')
+        away_team = data.get('away_team') or data.get('AwayTeam')
+        match_date = data.get('match_date')
+        if not home_team or not away_team:
+            return JsonResponse({'error': 'home_team and away_team are required.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        user = await sync_to_async(lambda: request.user if request.user.is_authenticated else None)()
+        if user is not None:
+            reason = await sync_to_async(_csrf_failure)(request)
+            if reason is not None:
+                return JsonResponse({'detail': reason}, status=status.HTTP_403_FORBIDDEN)
+
+        batcher = get_batcher(_predict_payloads)
+        try:
+            res, version = await batcher.submit(_match_payload(data, home_team, away_team))
+        except Exception as e:
+            return JsonResponse({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        response_data = _format_prediction(res)
+        if user is not None:
+            await sync_to_async(_record_prediction)(user, response_data, home_team, away_team, match_date)
+
+        response = JsonResponse(response_data)
+        response[MODEL_VERSION_HEADER] = version
+        return response
+
+
+class BatchStatsView(APIView):
+    """Admin-only: latency percentiles, throughput and batch sizes of the async predict endpoint."""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response({
+            'window_ms': settings.PREDICT_ASYNC_WINDOW_MS,
+            'max_batch': settings.PREDICT_ASYNC_MAX_BATCH,
+            **batch_stats(),
+        })
+
+
+class MatchupsView(APIView):
+    """Precomputed team-only predictions for every ordered pair of teams.
+
+    Without parameters returns the whole matrix as dense arrays indexed
+    [home][away] (null on the diagonal). With ``?team=<name>`` returns that
+    team's fixtures against every opponent, home and away, in predict_v2 shape.
+    """
+
+    def get(self, request):
+        inf = get_inferencer()
+        m = inf.matchups
+        if m is None:
+            return Response({'error': 'matchup matrix is not available.'}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        teams = inf.teams()
+
+        team = request.query_params.get('team')
+        if team is not None:
+            if team not in teams:
+                return Response({'error': f'unknown team: {team}'}, status=status.HTTP_404_NOT_FOUND)
+            others = [t for t in teams if t != team]
+            return _versioned(Response({
+                'team': team,
+                'home': [dict(opponent=o, **_format_prediction(inf.matchup(team, o))) for o in others],
+                'away': [dict(opponent=o, **_format_prediction(inf.matchup(o, team))) for o in others],
+            }), inf)
+
+        def nested(arr, decimals):
+            if arr is None:
+                return None
+            rounded = np.round(arr, decimals) if decimals is not None else arr
+            return [[None if i == j else cell for j, cell in enumerate(row)]
+                    for i, row in enumerate(rounded.tolist())]
+
+        return _versioned(Response({
+            'teams': teams,
+            'labels': inf.class_labels(),
+            'probabilities': nested(m['probs'], 4),
+            'goal_diff': nested(m['goal_diff'], 4),
+            'home_goals': nested(m['home_goals'], None),
+            'away_goals': nested(m['away_goals'], None),
+        }), inf)
+
+
+class PredictBatchView(APIView):
+    """Predict many fixtures in one request.
+
+    Accepts ``{"matches": [...]}`` (or a bare list) where each item has the
+    same keys as a predict_v2 request, and returns one predict_v2-shaped
+    result per match, in order. All matches go through a single model call.
+    """
+    permission_classes = [AllowAny]
+
+    def post(self, request):
+        with stage('parse'):
+            data = request.data
+        matches = data if isinstance(data, list) else data.get('matches')
+        if not isinstance(matches, list) or not matches:
+            return Response(
+                {'error': 'matches must be a non-empty list.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(matches) > settings.PREDICT_BATCH_MAX_SIZE:
+            return Response(
+                {'error': f'at most {settings.PREDICT_BATCH_MAX_SIZE} matches per request.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        payloads = []
+        teams = []
+        for i, item in enumerate(matches):
+            if not isinstance(item, dict):
+                return Response({'error': f'matches[{i}] must be an object.'}, status=status.HTTP_400_BAD_REQUEST)
+            home_team = item.get('home_team') or item.get('HomeTeam')
+            away_team = item.get('away_team') or item.get('AwayTeam')
+            if not home_team or not away_team:
+                return Response(
+                    {'error': f'matches[{i}]: home_team and away_team are required.'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            payloads.append(_match_payload(item, home_team, away_team))
+            teams.append((home_team, away_team, item.get('match_date')))
+
+        inf = get_inferencer()
+        try:
+            predictions = [_format_prediction(res) for res in inf.predict_batch(payloads)]
+        except Exception as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        if request.user.is_authenticated:
+            with stage('history'):
+                get_history_buffer().record(request.user.pk, [
+                    _history_kwargs(prediction, home, away, match_date)
+                    for prediction, (home, away, match_date) in zip(predictions, teams)
+                ])
+
+        return _versioned(Response({'count': len(predictions), 'predictions': predictions}, status=status.HTTP_200_OK), inf)
+
+
+FIXTURE_COLUMNS = ('HomeTeam', 'AwayTeam', 'Date')
+
+
+def _read_fixtures(request):
+    """Parse the uploaded fixtures CSV; returns (fixtures, error_response)."""
+    import pandas as pd
+
+    # expect uploaded CSV file under 'file'
+    csv_file = request.FILES.get('file')
+    if csv_file is None:
+        return None, Response({'detail': 'file is required'}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        # only the team and date columns are needed, which skips parsing wide files
+        df = pd.read_csv(csv_file, usecols=lambda c: c in FIXTURE_COLUMNS)
+    except Exception:
+        return None, Response({'detail': 'unable to parse CSV'}, status=status.HTTP_400_BAD_REQUEST)
+    if 'HomeTeam' not in df.columns or 'AwayTeam' not in df.columns:
+        return None, Response({'detail': 'HomeTeam and AwayTeam columns are required'}, status=status.HTTP_400_BAD_REQUEST)
+    if 'Date' in df.columns:
+        # each fixture is predicted from the teams' form before its date; unparseable dates use the latest form
+        dates = pd.to_datetime(df['Date'], dayfirst=True, errors='coerce')
+        df['Date'] = [d.date() if not pd.isna(d) else None for d in dates]
+
+    return df.dropna(subset=['HomeTeam', 'AwayTeam']), None
+
+
 class SimulateView(APIView):
+    """Simulate a season from an uploaded fixtures CSV.
+
+    Every fixture is predicted in one batched model call from its team names
+    (and, with a Date column, the teams' form before that day) and the table
+    is built with grouped array aggregation.
+    """
     parser_classes = (MultiPartParser, FormParser)
 
     def post(self, request):
-        # expect uploaded CSV file under 'file'
-        csv_file = request.FILES.get('file')
-        if csv_file is None:
-            return Response({'detail': 'file is required'}, status=status.HTTP_400_BAD_REQUEST)
+        from .simulation import standings
+
+        fixtures, error = _read_fixtures(request)
+        if error is not None:
+            return error
+        if fixtures.empty:
+            return Response({'standings': []})
+
+        inf = get_inferencer()
+        pred = inf.predict_frame(fixtures)
+        table = standings(
+            fixtures['HomeTeam'].to_numpy(), fixtures['AwayTeam'].to_numpy(),
+            pred['home_goals'], pred['away_goals'],
+        )
+        return _versioned(Response({'standings': table}), inf)
+
+
+class MonteCarloSimulateView(APIView):
+    """Monte Carlo season simulation from an uploaded fixtures CSV.
+
+    Samples every fixture from the classifier's H/D/A probabilities for
+    ``sims`` seasons and returns finishing-position distributions with
+    title, top-4 and relegation odds per team.
+    """
+    parser_classes = (MultiPartParser, FormParser)
+
+    def post(self, request):
+        from .simulation import monte_carlo, season_odds
 
         try:
-            df = pd.read_csv(csv_file, parse_dates=['Date'], dayfirst=True)
-        except Exception:
-            try:
-                df = pd.read_csv(csv_file)
-            except Exception:
-                return Response({'detail': 'unable to parse CSV'}, status=status.HTTP_400_BAD_REQUEST)
+            sims = int(request.data.get('sims', 10000))
+            seed = request.data.get('seed')
+            seed = int(seed) if seed not in (None, '') else None
+        except (TypeError, ValueError):
+            return Response({'detail': 'sims and seed must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+        if not 1 <= sims <= settings.SIMULATION_MAX_SIMS:
+            return Response(
+                {'detail': f'sims must be between 1 and {settings.SIMULATION_MAX_SIMS}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        fixtures, error = _read_fixtures(request)
+        if error is not None:
+            return error
+        if fixtures.empty:
+            return Response({'sims': sims, 'teams': []})
 
         inf = get_inferencer()
+        pred = inf.predict_frame(fixtures)
+        if pred['probs'] is None:
+            return Response({'detail': 'outcome classifier is not loaded'}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        # probs columns follow the classifier's classes (A/D/H); the sampler wants H/D/A
+        labels = inf.class_labels()
+        probs = pred['probs'][:, [labels.index(lab) for lab in ('H', 'D', 'A')]]
 
-        # standings dict
-        table = {}
-
-        def ensure_team(t):
-            if t not in table:
-                table[t] = {'team': t, 'played': 0, 'wins': 0, 'draws': 0, 'losses': 0, 'points': 0, 'gf': 0, 'ga': 0}
-
-        for _, row in df.iterrows():
-            home = row.get('HomeTeam')
-            away = row.get('AwayTeam')
-            if pd.isna(home) or pd.isna(away):
-                continue
-            payload = {'HomeTeam': home, 'AwayTeam': away}
-            pr = inf.predict_single(payload)
-            score = pr.get('suggested_score', {'home': 0, 'away': 0})
-            hg = int(score.get('home', 0))
-            ag = int(score.get('away', 0))
-
-            ensure_team(home); ensure_team(away)
-            table[home]['played'] += 1
-            table[away]['played'] += 1
-            table[home]['gf'] += hg
-            table[home]['ga'] += ag
-            table[away]['gf'] += ag
-            table[away]['ga'] += hg
-
-            if hg > ag:
-                table[home]['wins'] += 1
-                table[away]['losses'] += 1
-                table[home]['points'] += 3
-            elif hg == ag:
-                table[home]['draws'] += 1
-                table[away]['draws'] += 1
-                table[home]['points'] += 1
-                table[away]['points'] += 1
-            else:
-                table[away]['wins'] += 1
-                table[home]['losses'] += 1
-                table[away]['points'] += 3
+        # index teams in meta['teams'] order; unknown names go last
+        known = {t: i for i, t in enumerate(inf.teams())}
+        home = fixtures['HomeTeam'].to_numpy()
+        away = fixtures['AwayTeam'].to_numpy()
+        teams = sorted(set(home) | set(away), key=lambda t: (known.get(t, len(known)), t))
+        code = {t: i for i, t in enumerate(teams)}
+        home_codes = np.array([code[t] for t in home])
+        away_codes = np.array([code[t] for t in away])
 
-        standings = sorted(table.values(), key=lambda r: (r['points'], r['gf'] - r['ga']), reverse=True)
-        return Response({'standings': standings})
+        position_counts, expected_points = monte_carlo(
+            probs, home_codes, away_codes, len(teams), sims, seed=seed,
+            workers=settings.SIMULATION_WORKERS, chunk_size=settings.SIMULATION_CHUNK_SIZE,
+        )
+        return _versioned(Response({'sims': sims, 'teams': season_odds(teams, position_counts, expected_points)}), inf)
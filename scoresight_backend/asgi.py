@@ -0,0 +1,10 @@
+import os
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'scoresight_backend.settings')
+application = get_asgi_application()
+
+# load the models before serving (and, with gunicorn --preload, before forking)
+from api.inference import preload
+
+preload()
@@ -39,6 +39,35 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Time each request stage (api/metrics.py): Server-Timing response headers and
+# per-endpoint histograms at /api/metrics (staff users only; scrape with basic
+# auth). Off, the middleware is not installed
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'False') == 'True'
+if METRICS_ENABLED:
+    MIDDLEWARE.insert(0, 'api.metrics.TimingMiddleware')
+
+# Record this share of /api/ requests (0-1) as JSONL to TRAFFIC_CAPTURE_FILE for
+# manage.py replay_traffic (api/traffic.py); 0 leaves the middleware out.
+# Bodies over TRAFFIC_CAPTURE_MAX_BODY bytes or on the listed paths are not kept
+TRAFFIC_CAPTURE_RATE = float(os.environ.get('TRAFFIC_CAPTURE_RATE', '0'))
+TRAFFIC_CAPTURE_FILE = os.environ.get('TRAFFIC_CAPTURE_FILE', str(BASE_DIR / 'traffic.jsonl'))
+TRAFFIC_CAPTURE_MAX_BODY = int(os.environ.get('TRAFFIC_CAPTURE_MAX_BODY', str(64 * 1024)))
+TRAFFIC_CAPTURE_REDACT = ('/api/login', '/api/signup')
+if TRAFFIC_CAPTURE_RATE > 0:
+    MIDDLEWARE.insert(0, 'api.traffic.CaptureMiddleware')
+
+# Profile single requests on demand (api/profiling.py): send X-Profile with a token
+# from manage.py profile_token (or 1 as a logged-in staff user). Profiles go to
+# PROFILE_DIR, newest PROFILE_KEEP kept. Off, the middleware is not installed
+PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED', 'False') == 'True'
+PROFILE_DIR = os.environ.get('PROFILE_DIR', str(BASE_DIR / 'profiles'))
+PROFILE_KEEP = int(os.environ.get('PROFILE_KEEP', '50'))
+PROFILE_TOKEN_MAX_AGE = int(os.environ.get('PROFILE_TOKEN_MAX_AGE', '3600'))
+PROFILE_SAMPLE_INTERVAL = float(os.environ.get('PROFILE_SAMPLE_INTERVAL', '0.001'))
+if PROFILING_ENABLED:
+    # after AuthenticationMiddleware, so staff users can be recognised
+    MIDDLEWARE.append('api.profiling.ProfilingMiddleware')
+
 ROOT_URLCONF = 'scoresight_backend.urls'
 
 TEMPLATES = [
@@ -58,6 +87,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'scoresight_backend.wsgi.application'
+ASGI_APPLICATION = 'scoresight_backend.asgi.application'
 
 DATABASES = {
     'default': {
@@ -66,8 +96,39 @@ DATABASES = {
     }
 }
 
+# 'production' tunes SQLite for several workers writing at once (api/dbtuning.py):
+# WAL journal, synchronous=NORMAL, a busy timeout (ms) and mmap window (bytes)
+# on every new connection, and connections kept open SQLITE_CONN_MAX_AGE seconds
+SQLITE_PROFILE = os.environ.get('SQLITE_PROFILE', 'default')
+SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', '5000'))
+SQLITE_MMAP_SIZE = int(os.environ.get('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024)))
+SQLITE_CONN_MAX_AGE = int(os.environ.get('SQLITE_CONN_MAX_AGE', '600'))
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': SQLITE_BUSY_TIMEOUT_MS,
+    'mmap_size': SQLITE_MMAP_SIZE,
+    'temp_store': 'MEMORY',
+}
+if SQLITE_PROFILE == 'production':
+    DATABASES['default'].update(
+        CONN_MAX_AGE=SQLITE_CONN_MAX_AGE,
+        CONN_HEALTH_CHECKS=True,
+        OPTIONS={'timeout': SQLITE_BUSY_TIMEOUT_MS / 1000},
+    )
+
 AUTH_PASSWORD_VALIDATORS = []
 
+# 'cached' serves logged-in requests without database reads (api/auth.py):
+# sessions live in signed cookies and users come from a per-process cache
+# of AUTH_USER_CACHE_SIZE entries kept AUTH_USER_CACHE_TTL seconds
+AUTH_MODE = os.environ.get('AUTH_MODE', 'session')
+AUTH_USER_CACHE_SIZE = int(os.environ.get('AUTH_USER_CACHE_SIZE', '10000'))
+AUTH_USER_CACHE_TTL = float(os.environ.get('AUTH_USER_CACHE_TTL', '60'))
+if AUTH_MODE == 'cached':
+    SESSION_ENGINE = 'django.contrib.sessions.backends.signed_cookies'
+    AUTHENTICATION_BACKENDS = ['api.auth.CachedModelBackend']
+
 LANGUAGE_CODE = 'en-us'
 
 TIME_ZONE = 'UTC'
@@ -89,6 +150,84 @@ REST_FRAMEWORK = {
     ),
 }
 
+# Load model artifacts when the server boots (wsgi.py/asgi.py, before gunicorn
+# forks with --preload) instead of on the first request; commands stay lazy
+INFERENCE_EAGER_LOAD = os.environ.get('INFERENCE_EAGER_LOAD', 'True') == 'True'
+
+# Worker boot budgets checked by the startup test (api/startup.py): booting a
+# worker (with INFERENCE_EAGER_LOAD, models included) and its first request
+STARTUP_BUDGET_MS = float(os.environ.get('STARTUP_BUDGET_MS', '10000'))
+FIRST_REQUEST_BUDGET_MS = float(os.environ.get('FIRST_REQUEST_BUDGET_MS', '1000'))
+
+# 'numpy' evaluates the models with the compiled NumPy engine (api/engine.py);
+# 'sklearn' always calls the estimators directly
+INFERENCE_ENGINE = os.environ.get('INFERENCE_ENGINE', 'numpy')
+
+# Serve models from the memory-mapped artifacts/bundle (manage.py build_bundle)
+# when it exists and was built from the current artifacts; needs the numpy engine
+INFERENCE_BUNDLE = os.environ.get('INFERENCE_BUNDLE', 'True') == 'True'
+
+# Seconds between checks of the artifact files for changes; a change triggers a
+# background model reload (0 disables the check)
+MODEL_RELOAD_CHECK_INTERVAL = float(os.environ.get('MODEL_RELOAD_CHECK_INTERVAL', '30'))
+
+# Unix socket of a shared model server (manage.py run_model_server). When set,
+# workers forward predictions to it instead of loading the models themselves;
+# timeout in seconds, and how the server batches concurrent requests (a 0 ms
+# window batches whatever arrived by the next event loop iteration)
+MODEL_SERVER_SOCKET = os.environ.get('MODEL_SERVER_SOCKET', '')
+MODEL_SERVER_TIMEOUT = float(os.environ.get('MODEL_SERVER_TIMEOUT', '10'))
+MODEL_SERVER_WINDOW_MS = float(os.environ.get('MODEL_SERVER_WINDOW_MS', '0'))
+MODEL_SERVER_MAX_BATCH = int(os.environ.get('MODEL_SERVER_MAX_BATCH', '64'))
+
+# Upper bound on fixtures accepted by /api/predict_batch in one request
+PREDICT_BATCH_MAX_SIZE = int(os.environ.get('PREDICT_BATCH_MAX_SIZE', '1000'))
+
+# /api/predict_v2_async micro-batching: how long the first queued request waits
+# for others (ms), the batch size that flushes immediately, and inference threads
+PREDICT_ASYNC_WINDOW_MS = float(os.environ.get('PREDICT_ASYNC_WINDOW_MS', '5'))
+PREDICT_ASYNC_MAX_BATCH = int(os.environ.get('PREDICT_ASYNC_MAX_BATCH', '64'))
+PREDICT_ASYNC_THREADS = int(os.environ.get('PREDICT_ASYNC_THREADS', '4'))
+
+# Prediction history and profile counters are queued and written in bulk by a
+# background thread every HISTORY_FLUSH_INTERVAL seconds or once
+# HISTORY_FLUSH_SIZE rows are pending; an interval of 0 writes in the request
+HISTORY_FLUSH_INTERVAL = float(os.environ.get('HISTORY_FLUSH_INTERVAL', '1'))
+HISTORY_FLUSH_SIZE = int(os.environ.get('HISTORY_FLUSH_SIZE', '500'))
+
+# manage.py compact_history rolls PredictionHistory rows older than this many
+# days into DailyPredictionRollup and deletes them, HISTORY_COMPACT_BATCH rows
+# per transaction
+HISTORY_RETENTION_DAYS = int(os.environ.get('HISTORY_RETENTION_DAYS', '90'))
+HISTORY_COMPACT_BATCH = int(os.environ.get('HISTORY_COMPACT_BATCH', '2000'))
+
+# Final results applied by manage.py reconcile_predictions and /api/admin/reconcile
+# when no CSV is given (same layout as cleaned_merged_dataset.csv)
+RESULTS_CSV = os.environ.get('RESULTS_CSV', str(BASE_DIR / 'artifacts' / 'cleaned_merged_dataset.csv'))
+
+# Leaderboard (api/leaderboard.py): predictions needed for an accuracy rank,
+# minimum seconds between reranks, largest page of /api/leaderboard and how
+# long per-user stats stay cached
+LEADERBOARD_MIN_PREDICTIONS = int(os.environ.get('LEADERBOARD_MIN_PREDICTIONS', '10'))
+LEADERBOARD_RERANK_INTERVAL = float(os.environ.get('LEADERBOARD_RERANK_INTERVAL', '30'))
+LEADERBOARD_PAGE_MAX = int(os.environ.get('LEADERBOARD_PAGE_MAX', '100'))
+LEADERBOARD_CACHE_TTL = float(os.environ.get('LEADERBOARD_CACHE_TTL', '30'))
+
+# Largest page /api/user/history returns
+HISTORY_PAGE_MAX = int(os.environ.get('HISTORY_PAGE_MAX', '200'))
+
+# In-process LRU cache in front of predict_single: max entries (0 disables)
+# and entry lifetime in seconds
+PREDICTION_CACHE_SIZE = int(os.environ.get('PREDICTION_CACHE_SIZE', '4096'))
+PREDICTION_CACHE_TTL = float(os.environ.get('PREDICTION_CACHE_TTL', '300'))
+
+# Monte Carlo season simulation: upper bound on seasons per request, process
+# pool size (1 runs inline) and seasons simulated per chunk. The pool is per
+# server worker, so raise SIMULATION_WORKERS only with few workers per host
+SIMULATION_MAX_SIMS = int(os.environ.get('SIMULATION_MAX_SIMS', '100000'))
+SIMULATION_WORKERS = int(os.environ.get('SIMULATION_WORKERS', '1'))
+SIMULATION_CHUNK_SIZE = int(os.environ.get('SIMULATION_CHUNK_SIZE', '5000'))
+
 # CORS config - Allow your Vercel frontend
 CORS_ALLOWED_ORIGINS = [
     'http://localhost:3000',
@@ -100,4 +239,6 @@ CORS_ALLOWED_ORIGIN_REGEXES = [
     r"^https://score-sight-frontend.*\.vercel\.app$",
 ]
 CORS_ALLOW_CREDENTIALS = True
+# let the frontend read which model version answered and the stage timings
+CORS_EXPOSE_HEADERS = ['X-Model-Version', 'Server-Timing']
 CORS_ALLOW_ALL_ORIGINS = False
@@ -8,11 +8,18 @@ def root_view(request):
         'version': '1.0.0',
         'endpoints': {
             'health': '/api/health',
+            'ready': '/api/ready',
             'teams': '/api/teams',
             'predict': '/api/predict_v2',
+            'predict_async': '/api/predict_v2_async',
+            'predict_batch': '/api/predict_batch',
+            'matchups': '/api/matchups',
+            'simulate': '/api/simulate',
+            'simulate_monte_carlo': '/api/simulate/monte_carlo',
             'signup': '/api/signup',
             'login': '/api/login',
-            'user_stats': '/api/user/stats'
+            'user_stats': '/api/user/stats',
+            'user_history': '/api/user/history'
         }
     })
 
@@ -3,3 +3,8 @@ from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'scoresight_backend.settings')
 application = get_wsgi_application()
+
+# load the models before serving (and, with gunicorn --preload, before forking)
+from api.inference import preload
+
+preload()